@@ -0,0 +1,464 @@
+"""
+Servicio local de análisis
+Mantiene en memoria los runs ya leídos y responde consultas de filtro,
+estadísticas, histograma y exportación con los mismos parámetros que
+DataProcessingThread (ver pipeline.DEFAULT_PARAMS), de modo que varias
+personas analizan los mismos archivos sin que cada interfaz los vuelva a
+parsear.
+
+    GET  /runs    runs en memoria
+    POST /query   {"kind": "load" | "filter" | "stats" | "histogram" | "export",
+                   "source": archivo o lista, "params": {...}, opciones}
+    POST /frame   {"source": ..., "params": {...} o null}: datos crudos
+                  validados (sin params) o procesados, como columnas .npz
+
+El servicio corre en un bucle asyncio; la lectura y los cálculos se ejecutan
+en un pool de hilos (config.SERVICE_MAX_WORKERS). Los runs y los resultados
+de cada conjunto de parámetros de filtro se guardan como tareas: los pedidos
+simultáneos de lo mismo esperan la misma tarea, y todos leen los mismos
+DataFrames (copy-on-write: ninguna consulta los modifica). Un archivo
+modificado en disco se vuelve a leer.
+
+La interfaz avanzada actúa como cliente con config.SERVICE_URL: la lectura,
+la validación, el filtro y las estadísticas los hace el servicio; los análisis
+por lote y el renderizado siguen en la interfaz.
+
+Sin autenticación: escuchar fuera de 127.0.0.1 solo en una red de confianza.
+
+Uso:
+    python analysis_service.py --port 8765 --preload run1.csv run2.csv.gz
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import urllib.error
+import urllib.request
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+import config
+from pipeline import FILTER_PARAMS, complete_params, export_frame, process_dataframe
+from shared_columns import column_arrays
+
+
+# Run leído por el servicio (datos validados, compartidos por todas las consultas)
+LoadedRun = namedtuple('LoadedRun', ['paths', 'df', 'validation', 'loaded'])
+
+QUERY_KINDS = ('load', 'filter', 'stats', 'histogram', 'export')
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+
+class ServiceError(RuntimeError):
+    """Error informado por el servicio de análisis (o sin conexión)"""
+
+
+class RemoteValidation(namedtuple('RemoteValidation', ['is_valid', 'is_clean', 'text'])):
+    """Resultado de validación recibido del servicio (como ValidationResult)"""
+
+    def summary(self):
+        return self.text
+
+
+def source_paths(source):
+    """Lista de rutas absolutas de un archivo o lista de archivos"""
+    paths = [source] if isinstance(source, (str, os.PathLike)) else list(source or [])
+    if not paths:
+        raise ValueError("La consulta no indica 'source'")
+    return [os.path.abspath(path) for path in paths]
+
+
+def filter_key(params):
+    """Clave de los parámetros que cambian los datos procesados"""
+    params = complete_params(params)
+    return tuple(repr(params.get(key)) for key in FILTER_PARAMS)
+
+
+def frame_bytes(df):
+    """
+    Serializar un DataFrame como columnas .npz (sin pickle)
+
+    Returns:
+        bytes: Archivo .npz con una entrada por columna y la distribución
+    """
+    arrays, columns = {}, []
+    for k, (name, values, categories) in enumerate(column_arrays(df)):
+        arrays[f'c{k}'] = np.ascontiguousarray(values)
+        if categories is not None:
+            arrays[f'c{k}_categories'] = np.array(categories, dtype=str)
+        columns.append({'name': str(name), 'text': categories is not None})
+
+    if isinstance(df.index, pd.RangeIndex):
+        index = [df.index.start, df.index.stop, df.index.step]
+    else:
+        arrays['index'] = df.index.to_numpy(dtype=np.int64)
+        index = 'index'
+    arrays['layout'] = np.array(json.dumps({'columns': columns, 'index': index}))
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def frame_from_bytes(data):
+    """Restaurar un DataFrame de frame_bytes (texto como Categorical, igual que las sesiones)"""
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        layout = json.loads(str(arrays['layout']))
+        frame = {}
+        for k, entry in enumerate(layout['columns']):
+            values = arrays[f'c{k}']
+            if entry['text']:
+                values = pd.Categorical.from_codes(values, arrays[f'c{k}_categories'])
+            frame[entry['name']] = values
+        if isinstance(layout['index'], list):
+            index = pd.RangeIndex(*layout['index'])
+        else:
+            index = pd.Index(arrays['index'])
+    return pd.DataFrame(frame, index=index, copy=False)
+
+
+def _load_run(paths):
+    """Leer, validar e indexar la hora del PC (como FileLoadThread)"""
+    from progressive_loader import ProgressiveLoader
+
+    df = ProgressiveLoader(paths).load()
+    validation = None
+    if config.VALIDATE_ON_LOAD:
+        from data_validation import apply_validation
+        df, validation = apply_validation(df)
+    if config.PARSE_PC_TIME_ON_LOAD:
+        from pc_time import index_pc_time
+        index_pc_time(df)
+    return LoadedRun(paths, df, validation, datetime.now().isoformat(timespec='seconds'))
+
+
+def _histogram(df, column, bins, value_range):
+    """Histograma de una columna (valores finitos)"""
+    from tdc_core import to_numeric
+
+    if column not in df.columns:
+        raise ValueError(f"Columna desconocida: {column}")
+    values = to_numeric(df[column]).to_numpy(dtype=np.float64)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    return {
+        'column': column,
+        'entries': int(len(values)),
+        'counts': counts.tolist(),
+        'edges': edges.tolist(),
+    }
+
+
+class AnalysisService:
+    """Runs en memoria y consultas concurrentes sobre ellos"""
+
+    def __init__(self, max_runs=None, max_results=None, max_workers=None):
+        """
+        Args:
+            max_runs (int): Runs en memoria (config.SERVICE_MAX_RUNS)
+            max_results (int): Resultados de filtro recordados (config.SERVICE_RESULT_CACHE)
+            max_workers (int): Hilos de cálculo (config.SERVICE_MAX_WORKERS)
+        """
+        self.max_runs = max_runs or config.SERVICE_MAX_RUNS
+        self.max_results = max_results or config.SERVICE_RESULT_CACHE
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.SERVICE_MAX_WORKERS, thread_name_prefix='servicio'
+        )
+        # Clave -> tarea; el más antiguo sale primero
+        self._runs = OrderedDict()
+        self._results = OrderedDict()
+        self.requests = 0
+
+    async def _shared(self, cache, key, limit, function, *args):
+        """Resultado recordado; los pedidos simultáneos esperan la misma tarea"""
+        task = cache.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+            cache[key] = task
+            while len(cache) > limit:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        try:
+            # shield: un cliente que se desconecta no cancela la tarea de los demás
+            return await asyncio.shield(task)
+        except Exception:
+            if cache.get(key) is task:
+                del cache[key]
+            raise
+
+    @staticmethod
+    def _run_key(paths):
+        # Un archivo modificado en disco tiene otra clave y se vuelve a leer
+        return tuple((path, os.stat(path).st_mtime_ns, os.path.getsize(path)) for path in paths)
+
+    async def run(self, source):
+        """Run leído (desde la memoria si ya se leyó)"""
+        paths = source_paths(source)
+        key = self._run_key(paths)
+        return await self._shared(self._runs, key, self.max_runs, _load_run, paths)
+
+    async def processed(self, source, params):
+        """Datos procesados con params (compartidos entre consultas iguales)"""
+        run = await self.run(source)
+        key = (self._run_key(run.paths), 'filter', filter_key(params))
+        return await self._shared(
+            self._results, key, self.max_results, process_dataframe, run.df, complete_params(params)
+        )
+
+    async def statistics(self, source, params):
+        """Estadísticas por columna de los datos procesados"""
+        from result_rendering import column_statistics
+
+        df = await self.processed(source, params)
+        key = (self._run_key(source_paths(source)), 'stats', filter_key(params))
+        return await self._shared(self._results, key, self.max_results, column_statistics, df)
+
+    async def query(self, request):
+        """
+        Responder una consulta
+
+        Args:
+            request (dict): 'kind', 'source', 'params' y las opciones de la consulta:
+                filter: 'max_rows'; histogram: 'column', 'bins', 'range';
+                export: 'path' (en la máquina del servicio)
+
+        Returns:
+            dict: Respuesta serializable como JSON
+        """
+        kind = request.get('kind')
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Consulta desconocida: {kind!r} (válidas: {', '.join(QUERY_KINDS)})")
+        source, params = request.get('source'), request.get('params')
+        loop = asyncio.get_running_loop()
+
+        if kind == 'load':
+            run = await self.run(source)
+            validation = run.validation
+            return {
+                'source': run.paths,
+                'rows': len(run.df),
+                'columns': [str(col) for col in run.df.columns],
+                'valid': validation is None or bool(validation.is_valid),
+                'clean': validation is None or bool(validation.is_clean),
+                'validation': validation.summary() if validation is not None else None,
+                'loaded': run.loaded,
+            }
+
+        if kind == 'stats':
+            stats = await self.statistics(source, params)
+            return {'stats': {str(col): row for col, row in stats.to_dict(orient='index').items()}}
+
+        df = await self.processed(source, params)
+        if kind == 'filter':
+            from result_rendering import table_content
+            preview = table_content(df, int(request.get('max_rows', config.MAX_ROWS_DISPLAY)), 1)
+            return {
+                'rows': len(df),
+                'columns': [str(col) for col in df.columns],
+                'preview': {'headers': list(preview.headers), 'cells': [list(row) for row in preview.cells]},
+            }
+        if kind == 'histogram':
+            value_range = request.get('range')
+            return await loop.run_in_executor(
+                self._executor, _histogram, df, request.get('column', 'T1_FineNS'),
+                int(request.get('bins', 100)), tuple(value_range) if value_range else None
+            )
+        # export
+        path = request.get('path')
+        if not path:
+            raise ValueError("La consulta 'export' requiere 'path'")
+        written = await loop.run_in_executor(self._executor, export_frame, df, path)
+        return {'path': written, 'rows': len(df)}
+
+    async def frame(self, request):
+        """Datos crudos validados (sin params) o procesados, serializados con frame_bytes"""
+        params = request.get('params')
+        if params is None:
+            df = (await self.run(request.get('source'))).df
+        else:
+            df = await self.processed(request.get('source'), params)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, frame_bytes, df)
+
+    def runs(self):
+        """Runs ya leídos en memoria"""
+        listing = []
+        for task in self._runs.values():
+            if task.done() and not task.cancelled() and task.exception() is None:
+                run = task.result()
+                listing.append({'source': run.paths, 'rows': len(run.df), 'loaded': run.loaded})
+        return listing
+
+    async def _dispatch(self, method, target, body):
+        path = urlsplit(target).path
+        if method == 'GET' and path == '/runs':
+            return 200, 'application/json', json.dumps(self.runs()).encode('utf-8')
+        if method == 'POST' and path in ('/query', '/frame'):
+            request = json.loads(body or b'{}')
+            if path == '/frame':
+                return 200, 'application/octet-stream', await self.frame(request)
+            answer = await self.query(request)
+            return 200, 'application/json', json.dumps(answer, default=str).encode('utf-8')
+        return 404, 'application/json', json.dumps({'error': f"Ruta desconocida: {method} {path}"}).encode('utf-8')
+
+    async def handle(self, reader, writer):
+        """Atender una conexión HTTP/1.1 (una petición por conexión)"""
+        self.requests += 1
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target = request_line.decode('latin-1').split()[:2]
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            try:
+                status, content_type, data = await self._dispatch(method, target, body)
+            except (ValueError, KeyError, TypeError, FileNotFoundError) as error:
+                status, content_type = 400, 'application/json'
+                data = json.dumps({'error': str(error)}).encode('utf-8')
+            except Exception as error:
+                status, content_type = 500, 'application/json'
+                data = json.dumps({'error': f"{type(error).__name__}: {error}"}).encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                "Connection: close\r\n\r\n".encode('latin-1') + data
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=None, port=None):
+        """
+        Empezar a escuchar
+
+        Returns:
+            asyncio.Server: Servidor (port=0 elige un puerto libre)
+        """
+        return await asyncio.start_server(
+            self.handle, host or config.SERVICE_HOST, config.SERVICE_PORT if port is None else port
+        )
+
+    def close(self):
+        """Liberar los hilos y los datos en memoria"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._runs.clear()
+        self._results.clear()
+
+
+class ServiceClient:
+    """Cliente síncrono (urllib) del servicio, para scripts y la interfaz"""
+
+    def __init__(self, url=None, timeout=None):
+        """
+        Args:
+            url (str): Dirección del servicio (config.SERVICE_URL o host:puerto por defecto)
+            timeout (float): Segundos de espera por consulta (config.SERVICE_TIMEOUT_S)
+        """
+        default = f"http://{config.SERVICE_HOST}:{config.SERVICE_PORT}"
+        self.url = (url or config.SERVICE_URL or default).rstrip('/')
+        self.timeout = timeout or config.SERVICE_TIMEOUT_S
+        # Último resultado procesado: los mismos parámetros devuelven el mismo objeto
+        self._last = None
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else json.dumps(payload, default=str).encode('utf-8')
+        request = urllib.request.Request(
+            self.url + path, data=data, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as error:
+            try:
+                message = json.loads(error.read())['error']
+            except (ValueError, KeyError):
+                message = f"HTTP {error.code}"
+            raise ServiceError(message) from None
+        except urllib.error.URLError as error:
+            raise ServiceError(f"No se pudo conectar con el servicio {self.url}: {error.reason}") from None
+
+    def runs(self):
+        """Runs en memoria del servicio"""
+        return json.loads(self._request('/runs'))
+
+    def query(self, kind, source, params=None, **options):
+        """
+        Consulta (ver AnalysisService.query)
+
+        Raises:
+            ServiceError: Si el servicio rechaza la consulta o no responde
+        """
+        return json.loads(self._request('/query', dict(options, kind=kind, source=source, params=params)))
+
+    def frame(self, source, params=None):
+        """Datos crudos validados (sin params) o procesados"""
+        return frame_from_bytes(self._request('/frame', {'source': source, 'params': params}))
+
+    def validation(self, source):
+        """Validación del run como RemoteValidation (None si no se validó)"""
+        info = self.query('load', source)
+        if info['validation'] is None:
+            return None
+        return RemoteValidation(info['valid'], info['clean'], info['validation'])
+
+    def processed(self, source, params):
+        """
+        Datos procesados y estadísticas por columna
+
+        Returns:
+            tuple: (pd.DataFrame, estadísticas como column_statistics)
+        """
+        key = (tuple(source_paths(source)), filter_key(params))
+        if self._last is None or self._last[0] != key:
+            df = self.frame(source, params)
+            stats = pd.DataFrame.from_dict(self.query('stats', source, params)['stats'], orient='index')
+            self._last = (key, df, stats)
+        return self._last[1], self._last[2]
+
+
+async def _serve(host, port, preload):
+    service = AnalysisService()
+    server = await service.start(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Servicio de análisis en http://{address[0]}:{address[1]}")
+    for path in preload:
+        info = await service.query({'kind': 'load', 'source': path})
+        print(f"  ✓ {os.path.basename(path)}: {info['rows']:,} filas")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio local de análisis (consultas HTTP/JSON)")
+    parser.add_argument('--host', default=config.SERVICE_HOST, help="Dirección (config.SERVICE_HOST)")
+    parser.add_argument('--port', type=int, default=config.SERVICE_PORT, help="Puerto (config.SERVICE_PORT)")
+    parser.add_argument('--preload', nargs='*', default=[], help="Archivos a leer al arrancar")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.preload))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Archivos CSV comprimidos (.csv.gz / .csv.zst)
+Las adquisiciones archivadas se guardan comprimidas (el Timestamp_PC repetido
+y el FineNS cuantizado comprimen 8-10 veces). Este módulo las lee y escribe
+sin pasar por un archivo descomprimido en disco:
+
+    - lectura: un hilo descomprime por adelantado (config.DECOMPRESS_READ_AHEAD
+      bloques) mientras el parser de pandas consume el bloque anterior; zlib y
+      zstd liberan el GIL, de modo que descompresión y parseo se solapan. El
+      avance se mide en bytes comprimidos consumidos.
+    - escritura: el CSV se corta en bloques de config.COMPRESS_BLOCK_BYTES que
+      se comprimen en paralelo (config.COMPRESS_WORKERS hilos) como miembros
+      gzip o frames zstd independientes y se escriben en orden. El resultado
+      es un .gz / .zst estándar (gzip -d y zstd -d lo leen).
+
+Ni gzip ni zstd permiten repartir la descompresión de un archivo cualquiera
+sin un índice, por eso la lectura usa un único hilo de descompresión.
+
+Los .zst requieren zstandard (opcional: pip install zstandard).
+"""
+
+import gzip
+import importlib.util
+import io
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+COMPRESSED_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+# Bytes descomprimidos que el hilo de lectura entrega por vez
+READ_BLOCK_BYTES = 1 << 20
+
+
+def compression_of(path):
+    """
+    Compresión de un archivo según su extensión
+
+    Returns:
+        str: 'gzip', 'zstd' o None
+    """
+    if not isinstance(path, str) and not hasattr(path, '__fspath__'):
+        return None
+    name = str(path).lower()
+    for suffix, compression in COMPRESSED_SUFFIXES.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+def is_compressed_file(path):
+    """Indicar si path es un archivo comprimido (.gz o .zst)"""
+    return compression_of(path) is not None
+
+
+def zstd_available():
+    """Indicar si zstandard está instalado (sin importarlo)"""
+    return importlib.util.find_spec('zstandard') is not None
+
+
+def _zstandard():
+    """
+    Importar zstandard
+
+    Raises:
+        ImportError: Si zstandard no está instalado
+    """
+    if not zstd_available():
+        raise ImportError("Los archivos .zst requieren zstandard (pip install zstandard)")
+    import zstandard
+    return zstandard
+
+
+class DecompressingReader(io.RawIOBase):
+    """Lectura descomprimida con un hilo que descomprime por adelantado"""
+
+    def __init__(self, path, read_ahead=None):
+        """
+        Args:
+            path (str): Archivo .gz o .zst
+            read_ahead (int): Bloques en espera (config.DECOMPRESS_READ_AHEAD)
+        """
+        super().__init__()
+        self.compression = compression_of(path)
+        zstandard = _zstandard() if self.compression == 'zstd' else None
+        self._raw = open(path, 'rb')
+        if zstandard is not None:
+            self._stream = zstandard.ZstdDecompressor().stream_reader(self._raw, read_across_frames=True)
+        else:
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='rb')
+        # Bytes comprimidos ya entregados al parser (para el avance)
+        self.position = 0
+        self._queue = queue.Queue(maxsize=read_ahead or config.DECOMPRESS_READ_AHEAD)
+        self._buffer = memoryview(b'')
+        self._eof = False
+        self._error = None
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._produce, name='descompresión', daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        try:
+            while not self._closing.is_set():
+                data = self._stream.read(READ_BLOCK_BYTES)
+                if not data:
+                    break
+                self._put((data, self._raw.tell()))
+        except BaseException as error:
+            self._error = error
+        finally:
+            self._put((b'', self._raw.tell()))
+
+    def _put(self, item):
+        # No bloquear para siempre si el lector se cerró sin terminar
+        while not self._closing.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        if not self._buffer:
+            if self._eof:
+                return 0
+            data, self.position = self._queue.get()
+            if not data:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+                return 0
+            self._buffer = memoryview(data)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._closing.set()
+            self._thread.join()
+            self._stream.close()
+            self._raw.close()
+        super().close()
+
+
+def open_input(path):
+    """
+    Abrir un archivo de datos en modo binario, descomprimiendo si hace falta
+
+    Returns:
+        io.BufferedReader: Lectura de bytes del CSV (usar con input_position)
+    """
+    if is_compressed_file(path):
+        return io.BufferedReader(DecompressingReader(path))
+    return open(path, 'rb')
+
+
+def input_position(handle):
+    """Bytes del archivo en disco (comprimido o no) consumidos por el lector"""
+    if isinstance(handle.raw, DecompressingReader):
+        return handle.raw.position
+    return handle.tell()
+
+
+class CompressingWriter(io.RawIOBase):
+    """Escritura comprimida por bloques independientes comprimidos en paralelo"""
+
+    def __init__(self, path, level=None, workers=None, block_bytes=None):
+        """
+        Args:
+            path (str): Archivo .gz o .zst
+            level (int): Nivel de compresión (config.GZIP_LEVEL / config.ZSTD_LEVEL)
+            workers (int): Hilos de compresión (config.COMPRESS_WORKERS)
+            block_bytes (int): Bytes por bloque (config.COMPRESS_BLOCK_BYTES)
+        """
+        super().__init__()
+        self.compression = compression_of(path)
+        if self.compression == 'zstd':
+            zstandard = _zstandard()
+            level = level if level is not None else config.ZSTD_LEVEL
+            # Un compresor por hilo (ZstdCompressor no admite uso concurrente)
+            local = threading.local()
+
+            def compress(data):
+                if not hasattr(local, 'compressor'):
+                    local.compressor = zstandard.ZstdCompressor(level=level)
+                return local.compressor.compress(data)
+        else:
+            level = level if level is not None else config.GZIP_LEVEL
+
+            def compress(data):
+                return gzip.compress(data, compresslevel=level, mtime=0)
+
+        self._compress = compress
+        self.workers = workers or config.COMPRESS_WORKERS
+        self.block_bytes = block_bytes or config.COMPRESS_BLOCK_BYTES
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._file = open(path, 'wb')
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='compresión')
+        self._pending = deque()
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self.bytes_in += len(data)
+        while len(self._buffer) >= self.block_bytes:
+            self._submit(bytes(self._buffer[:self.block_bytes]))
+            del self._buffer[:self.block_bytes]
+        return len(data)
+
+    def _submit(self, block):
+        self._pending.append(self._pool.submit(self._compress, block))
+        # Memoria acotada: como mucho dos bloques por hilo en vuelo
+        while len(self._pending) > 2 * self.workers:
+            self._write_next()
+
+    def _write_next(self):
+        data = self._pending.popleft().result()
+        self._file.write(data)
+        self.bytes_out += len(data)
+
+    def close(self):
+        if not self.closed:
+            try:
+                # Un archivo vacío también recibe un bloque (gzip/zstd válido)
+                if self._buffer or (not self.bytes_out and not self._pending):
+                    self._submit(bytes(self._buffer))
+                    self._buffer.clear()
+                while self._pending:
+                    self._write_next()
+            finally:
+                self._pool.shutdown()
+                self._file.close()
+        super().close()
+
+
+def open_output(path):
+    """
+    Abrir un archivo de salida en modo binario, comprimiendo según la extensión
+
+    Returns:
+        Archivo binario de escritura (usar con with)
+    """
+    if is_compressed_file(path):
+        return CompressingWriter(path)
+    return open(path, 'wb')
+
+
+def write_csv(df, path, sep=None):
+    """
+    Exportar a CSV con el formato de entrada (separador ';' y coma decimal)
+
+    Las rutas .csv.gz / .csv.zst se escriben comprimidas.
+
+    Args:
+        df (pd.DataFrame): Datos a exportar
+        path (str): Archivo de salida
+        sep (str): Separador de columnas (por defecto config.CSV_SEPARATOR)
+    """
+    with open_output(path) as handle:
+        df.to_csv(handle, sep=sep or config.CSV_SEPARATOR, decimal=config.DECIMAL_SEPARATOR, index=False)
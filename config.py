@@ -19,6 +19,7 @@ CSV_SEPARATOR = ';'
 DECIMAL_SEPARATOR = ','
 MAX_ROWS_DISPLAY = 50  # Máximo de filas mostradas en tablas
 MAX_INITIAL_ROWS = 100  # Máximo de filas iniciales en carga
+READ_CHUNK_ROWS = 250_000  # Filas por bloque en las lecturas por bloques
 
 # CONFIGURACIÓN DE PROCESAMIENTO
 DEFAULT_LOTE_NUMBER = 1
@@ -27,6 +28,72 @@ DEFAULT_MAX_INDEX = 0
 DEFAULT_REMOVE_NULLS = True
 DEFAULT_NORMALIZE = False
 
+# GRAFO DE ETAPAS
+STAGE_MAX_WORKERS = 4  # Hilos para las etapas independientes (estadísticas, histogramas, exportación)
+
+# CONFIGURACIÓN DE ANÁLISIS TDC
+TDC_COARSE_PERIOD_NS = 100.0  # Período del contador ResetCount (ns)
+COINCIDENCE_WINDOW_NS = 100.0  # Ventana |T2 - T1| para contar coincidencias
+FINE_HISTOGRAM_BINS = 50  # Bins del histograma FineNS (0 - período)
+TIME_DIFF_HISTOGRAM_BINS = 100  # Bins del histograma T2 - T1
+FINE_LSB_NS = 40.0 / 11.0  # Paso del código fino del TDC (≈3,64 ns)
+FINE_CALIBRATION_FILE = None  # Tabla .npz de calibración FineNS a reutilizar
+TDC_RESET_COUNTER_BITS = None  # Ancho del contador ResetCount si desborda (None = no desborda)
+
+# NÚCLEOS DE CÁLCULO
+KERNEL_BACKEND = 'auto'  # 'auto' (Numba si está instalado), 'numba' o 'numpy'
+NUMBA_CACHE = True  # Guardar en disco las funciones compiladas por Numba
+
+# ANÁLISIS POR LOTE
+LOTE_PARALLEL_MIN_ROWS = 2_000_000  # Desde este tamaño se reparte en procesos
+LOTE_MAX_WORKERS = None  # None = número de CPUs
+
+# DETECCIÓN DE HUECOS
+DEAD_TIME_THRESHOLD_NS = None  # Umbral fijo de tiempo muerto (None = relativo)
+DEAD_TIME_MEDIAN_FACTOR = 10.0  # Umbral relativo: factor × mediana del intervalo
+
+# AJUSTE DEL PICO T2 - T1 (RESOLUCIÓN TEMPORAL)
+PEAK_FIT_BINS = 80  # Bins del histograma ajustado (por lote)
+PEAK_FIT_RANGE_SIGMAS = 5.0  # Semiancho del rango: sigmas robustas (IQR) alrededor de la mediana
+PEAK_FIT_MIN_ENTRIES = 20  # Mínimo de pares en el rango para ajustar un lote
+PEAK_FIT_MAX_ITER = 100  # Iteraciones máximas del ajuste (Levenberg-Marquardt)
+
+# HORA DEL PC
+PC_TIME_COLUMN = 'PC_ms'  # Nombre en los filtros de Timestamp_PC en ms desde la medianoche del primer día (no se agrega a los datos)
+PARSE_PC_TIME_ON_LOAD = True  # Convertir e indexar al cargar (si no, en el primer filtro por hora)
+
+# FUSIÓN DE ARCHIVOS
+MERGE_TIME_CHANNEL = 'T1'  # Canal cuyo tiempo reconstruido ordena la fusión (el otro si falta)
+MERGE_SOURCE_COLUMN = 'Archivo'  # Columna con el número de archivo de origen (None = no agregar)
+
+# ORDENAMIENTO POR TIEMPO
+SORT_MEMORY_ROWS = 5_000_000  # Filas ordenadas en memoria; archivos mayores se ordenan por tramos en disco
+SORT_TEMP_DIR = None  # Carpeta de los tramos temporales (None = la del sistema)
+
+# ARCHIVOS COMPRIMIDOS
+GZIP_LEVEL = 6  # Nivel de compresión de las exportaciones .csv.gz
+ZSTD_LEVEL = 3  # Nivel de compresión de las exportaciones .csv.zst
+COMPRESS_BLOCK_BYTES = 4 << 20  # Bytes de CSV por bloque comprimido (cada bloque se comprime en un hilo)
+COMPRESS_WORKERS = 4  # Hilos de compresión al exportar
+DECOMPRESS_READ_AHEAD = 8  # Bloques descomprimidos por adelantado mientras se parsea el anterior
+
+# ARCHIVO PARQUET
+ARCHIVE_ROW_GROUP_ROWS = 100_000  # Filas por grupo (estadísticas mín./máx. por grupo)
+ARCHIVE_COMPRESSION = 'zstd'  # Compresión de los archivos Parquet
+ARCHIVE_TIME_COLUMN = 'Tiempo_ns'  # Tiempo reconstruido agregado para filtrar por rango
+
+# FILTRO POR EXPRESIÓN
+FILTER_CACHE_SIZE = 64  # Expresiones compiladas en caché
+FILTER_MASK_CACHE_SIZE = 16  # Máscaras de condiciones en caché por conjunto de datos
+FILTER_RANGE_COLUMNS = ['Num_Lote', 'T1_Index', 'T2_Index', 'PC_ms']  # Rangos por búsqueda binaria
+
+# TASA DE HITS
+RATE_BASE_BIN_NS = 1000.0  # Ventana base (1 µs); las ventanas múltiplo no releen los hits
+RATE_MAX_BASE_BINS = 1_000_000  # Máximo de ventanas base (la base se agranda si hace falta)
+RATE_WINDOW_NS = 1_000_000.0  # Ventana por defecto (1 ms)
+RATE_INTERARRIVAL_BINS = 60  # Bins (logarítmicos) de intervalos entre hits
+RATE_DEAD_TIME_PERCENTILE = 0.1  # Percentil (%) de intervalos usado como tiempo muerto
+
 # COLUMNAS ESPERADAS (para validación)
 EXPECTED_COLUMNS = [
     'Timestamp_PC',
@@ -96,6 +163,7 @@ EXPORT_FORMATS = {
         'engine': 'openpyxl'
     }
 }
+EXCEL_SHEET_ROWS = 1_048_575  # Filas de datos por hoja (límite de Excel); las siguientes van a otra hoja
 
 # CONFIGURACIÓN DE LOGGING
 LOG_ENABLED = False
@@ -114,6 +182,7 @@ DATABASE_NAME = 'data_processor'
 VALIDATE_ON_LOAD = True
 VALIDATE_NUMERIC_COLUMNS = True
 REMOVE_INVALID_ROWS = False
+VALIDATION_TIME_TOLERANCE_NS = 1.0  # Diferencia admitida en t1_nS (redondeo del export)
 
 # ESTADÍSTICAS A MOSTRAR
 STATISTICS_TO_CALCULATE = [
@@ -125,10 +194,43 @@ STATISTICS_TO_CALCULATE = [
     'median'      # Mediana
 ]
 
+# MEMORIA COMPARTIDA
+SHARED_COLUMN_BUFFERS = False  # Datos cargados en memoria compartida (vistas de solo lectura)
+PROCESS_IN_WORKER = False  # Procesar en un proceso aparte (requiere SHARED_COLUMN_BUFFERS)
+
+# MONITOR DE BLOQUEOS DE LA INTERFAZ
+STALL_THRESHOLD_MS = 100  # Bloqueo del bucle de eventos a partir de esta duración
+STALL_HEARTBEAT_MS = 10  # Intervalo del temporizador que mide la latencia
+STALL_SAMPLE_MS = 20  # Intervalo de muestreo de la pila del hilo principal durante un bloqueo
+
+# COMPARACIÓN DE RUNS
+COMPARE_KS_ALPHA = 0.01  # Nivel de la prueba KS para marcar distribuciones distintas
+COMPARE_LOTE_METRICS = [  # Columnas del resumen por lote comparadas con la referencia
+    'Eventos', 'Tasa coincidencia (%)', 'T1_FineNS promedio', 'T2_FineNS promedio',
+    'T2_T1_ns promedio', 'T2_T1_ns std',
+]
+
+# HISTORIAL DE RESULTADOS
+HISTORY_MEMORY_MB = 512  # Memoria de las instantáneas para deshacer/rehacer: columnas y contenido renderizado (se descartan las más antiguas)
+
+# SESIONES
+SESSION_SUFFIX = '.tdcsession'  # Carpeta de una sesión guardada
+SESSION_SAVE_RAW = True  # Guardar también los datos crudos (permite reprocesar sin releer el CSV)
+
+# SERVICIO DE ANÁLISIS
+SERVICE_HOST = '127.0.0.1'  # Dirección del servicio (sin autenticación: solo redes de confianza)
+SERVICE_PORT = 8765  # Puerto del servicio
+SERVICE_URL = None  # p. ej. 'http://127.0.0.1:8765': la interfaz avanzada lee y filtra a través del servicio
+SERVICE_MAX_RUNS = 4  # Runs en memoria en el servicio (sale el usado hace más tiempo)
+SERVICE_RESULT_CACHE = 16  # Resultados de filtro y estadísticas recordados
+SERVICE_MAX_WORKERS = 4  # Hilos de lectura y cálculo del servicio
+SERVICE_TIMEOUT_S = 600  # Espera máxima del cliente por consulta (s)
+
 # CACHÉ
 ENABLE_CACHE = True
 CACHE_SIZE = 100  # MB
 CACHE_TIMEOUT = 3600  # segundos
+AGGREGATE_CACHE_DIR = '.cache_agregados'  # Agregados para reportes
 
 # VERSIÓN DE LA APLICACIÓN
 APP_VERSION = '1.0'
@@ -4,95 +4,272 @@ Interfaz gráfica avanzada para procesamiento de datos experimentales
 Incluye visualización de gráficos y análisis estadístico mejorado
 """
 
+import time
+_MODULE_START = time.perf_counter()
+
 import sys
 import os
-import pandas as pd
-import numpy as np
-from datetime import datetime
 from pathlib import Path
 import json
 
+# pandas, NumPy y los módulos de análisis se importan en el primer uso
+# (ver DataProcessingThread.run, load_file, ...) para acelerar el arranque
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QGroupBox, QLabel, QLineEdit, QPushButton, QSpinBox, QDoubleSpinBox,
     QComboBox, QTableWidget, QTableWidgetItem, QTabWidget, QFileDialog,
     QMessageBox, QProgressBar, QCheckBox, QSlider, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont, QColor
-from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QDateTimeAxis, QValueAxis
-from PyQt6.QtCore import QPointF, QDateTime
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QFontMetrics, QKeySequence
+
+import config
+from snapshot_history import SnapshotHistory
+from stall_monitor import StallMonitor, monitor_requested
+from startup_profile import StartupProfiler, profile_requested
+
+_IMPORTS_DONE = time.perf_counter()
+
+# Ayuda del campo de filtro por expresión
+FILTER_HELP = (
+    "Condiciones sobre columnas con and/or/not, comparaciones y aritmética.\n"
+    "Nombres con caracteres especiales entre comillas invertidas: `t1_nS.1`\n"
+    "Enter para procesar"
+)
 
 
 class DataProcessingThread(QThread):
     """Thread para procesar datos sin bloquear la interfaz"""
     progress = pyqtSignal(int)
-    finished = pyqtSignal(pd.DataFrame)
+    finished = pyqtSignal(object)
     error = pyqtSignal(str)
     
-    def __init__(self, df, params):
+    def __init__(self, df, params, max_rows=50, char_width=7, descriptor=None, graph=None,
+                 client=None, source=None):
         super().__init__()
         self.df = df
+        # Descriptor del bloque compartido con los datos crudos (si lo hay)
+        self.descriptor = descriptor
         self.params = params
+        self.max_rows = max_rows
+        self.char_width = char_width
+        # Grafo de etapas de la ventana: recuerda los resultados entre procesamientos
+        self.graph = graph
+        # Servicio de análisis (ServiceClient) y archivos del run en el servicio
+        self.client = client
+        self.source = source
     
     def run(self):
         try:
-            # Filtrar por número de lote si está especificado
-            filtered_df = self.df.copy()
-            
-            if self.params['lote_number'] > 0:
-                filtered_df = filtered_df[filtered_df['Num_Lote'] == self.params['lote_number']]
-            
-            self.progress.emit(25)
-            
-            # Filtrar por rango de índices si está especificado
-            if self.params['min_index'] > 0:
-                filtered_df = filtered_df[filtered_df['T1_Index'] >= self.params['min_index']]
-            
-            if self.params['max_index'] > 0:
-                filtered_df = filtered_df[filtered_df['T1_Index'] <= self.params['max_index']]
+            from pipeline import complete_params, processing_graph
+            from result_rendering import build_payload
             
-            self.progress.emit(50)
-            
-            # Eliminar filas vacías si se indica
-            if self.params['remove_nulls']:
-                filtered_df = filtered_df.dropna(how='all')
-            
-            # Procesar datos numéricos
-            numeric_cols = ['T1_ResetCount', 'T1_FineNS', 'T2_ResetCount', 'T2_FineNS']
-            for col in numeric_cols:
-                if col in filtered_df.columns:
-                    filtered_df[col] = pd.to_numeric(
-                        filtered_df[col].astype(str).str.replace(',', '.'),
-                        errors='coerce'
+            buffer = None
+            if self.descriptor is not None and config.PROCESS_IN_WORKER and self.client is None:
+                # Proceso de trabajo: lee los datos crudos del bloque compartido
+                # y devuelve el resultado en un bloque nuevo que pasa a ser nuestro
+                from pipeline import process_shared, worker_pool
+                from shared_columns import ColumnBuffer
+                self.progress.emit(25)
+                descriptor, analyses = worker_pool().submit(
+                    process_shared, self.descriptor, self.params
+                ).result()
+                buffer = ColumnBuffer.attach(descriptor, owner=True)
+                filtered_df = buffer.frame()
+                self.progress.emit(75)
+                payload = None
+                if len(filtered_df) > 0:
+                    # Renderizar resultados fuera del hilo de la interfaz
+                    payload = build_payload(
+                        filtered_df, self.params, self.max_rows, self.char_width,
+                        buffer=buffer,
+                        **analyses
                     )
-            
-            self.progress.emit(75)
-            
-            # Normalizar si se indica
-            if self.params['normalize']:
-                for col in filtered_df.select_dtypes(include=[np.number]).columns:
-                    min_val = filtered_df[col].min()
-                    max_val = filtered_df[col].max()
-                    if max_val - min_val != 0:
-                        filtered_df[f'{col}_normalized'] = (filtered_df[col] - min_val) / (max_val - min_val)
+            else:
+                # Filtro, estadísticas, análisis y renderizado como etapas: las
+                # independientes corren a la vez y el avance sigue su costo medido
+                graph = self.graph or processing_graph()
+                params = dict(
+                    complete_params(self.params),
+                    max_rows=self.max_rows, char_width=self.char_width
+                )
+                values = {'validate': self.df}
+                if self.client is not None:
+                    # El servicio filtra y calcula las estadísticas (compartidas
+                    # con los demás clientes); aquí solo análisis y renderizado
+                    processed, stats = self.client.processed(self.source, self.params)
+                    values = {'filter': processed, 'stats': stats}
+                results = graph.run(
+                    ['render'], params, values=values,
+                    progress=self.progress.emit
+                )
+                payload = results['render']
             
             self.progress.emit(100)
-            
-            if len(filtered_df) > 0:
-                self.finished.emit(filtered_df)
+            if payload is not None:
+                self.finished.emit(payload)
             else:
+                if buffer is not None:
+                    buffer.release()
                 self.error.emit("No data found with the specified parameters")
                 
         except Exception as e:
             self.error.emit(f"Error during processing: {str(e)}")
 
 
+class FileLoadThread(QThread):
+    """Thread para leer archivos por bloques sin bloquear la interfaz"""
+    first_block = pyqtSignal(object)
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+    
+    def __init__(self, file_paths, max_rows=50, char_width=7, client=None):
+        super().__init__()
+        self.file_paths = file_paths
+        # Con un ServiceClient los datos se piden al servicio de análisis
+        self.client = client
+        self.max_rows = max_rows
+        self.char_width = char_width
+    
+    def run(self):
+        try:
+            from progressive_loader import LoadedData, ProgressiveLoader
+            from result_rendering import table_content
+            
+            if self.client is not None:
+                # El servicio lee y valida una sola vez para todos sus clientes
+                validation = self.client.validation(self.file_paths)
+                df = self.client.frame(self.file_paths)
+                self.first_block.emit(table_content(df, self.max_rows, self.char_width))
+                self.progress.emit(100, len(df))
+            else:
+                loader = ProgressiveLoader(self.file_paths, first_rows=self.max_rows)
+                
+                def on_block(block):
+                    # El primer bloque se muestra mientras sigue la lectura
+                    if loader.rows_read == len(block):
+                        self.first_block.emit(table_content(block, self.max_rows, self.char_width))
+                    self.progress.emit(int(100 * loader.fraction), loader.rows_read)
+                
+                df = loader.load(on_block)
+                
+                # Validación vectorizada justo después del parseo
+                validation = None
+                if config.VALIDATE_ON_LOAD:
+                    from data_validation import apply_validation
+                    df, validation = apply_validation(df)
+            
+            # Publicar los datos en memoria compartida; la ventana conservará
+            # solo las vistas de solo lectura
+            buffer = None
+            if config.SHARED_COLUMN_BUFFERS:
+                from shared_columns import ColumnBuffer
+                buffer = ColumnBuffer.from_dataframe(df)
+                df = buffer.frame()
+            
+            # Hora del PC como entero ordenable, fuera de las columnas de datos
+            # (índice de filtro del DataFrame que conservará la ventana)
+            if config.PARSE_PC_TIME_ON_LOAD:
+                from pc_time import index_pc_time
+                index_pc_time(df)
+            
+            self.finished.emit(LoadedData(df, validation, buffer))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class SessionThread(QThread):
+    """Thread para tareas en segundo plano (sesiones, comparación de runs, archivo, reportes)"""
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+    
+    def __init__(self, task, *args):
+        super().__init__()
+        self.task = task
+        self.args = args
+    
+    def run(self):
+        try:
+            self.finished.emit(self.task(*self.args))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+def restore_session(path, max_rows=50, char_width=7):
+    """Restaurar una sesión y renderizar sus resultados (en SessionThread)"""
+    from result_rendering import build_payload
+    from session_store import load_session
+    
+    session = load_session(path)
+    payload = build_payload(
+        session.processed_df, session.params, max_rows, char_width,
+        stats=session.aggregates['column_stats'],
+        **session.analyses
+    )
+    return session, payload
+
+
+def compare_with_runs(current, files, params, max_rows=50, char_width=7):
+    """
+    Comparar el run actual (o el primer archivo) con otros runs (en SessionThread)
+    
+    Args:
+        current (dict): Agregados del run actual, o None
+        files (list): Archivos CSV, agregados .npz o sesiones
+        params (dict): Parámetros para procesar los archivos CSV
+    
+    Returns:
+        tuple: (resultado de compare_runs, SVG por campo, tabla KS, tabla por lote)
+    """
+    from report_generator import REPORT_HISTOGRAMS
+    from result_rendering import table_content
+    from run_comparison import compare_runs, field_overlay_svg
+    
+    sources = ([current] if current is not None else []) + list(files)
+    result = compare_runs(sources, params)
+    svgs = {
+        field: field_overlay_svg(result, field)
+        for field in REPORT_HISTOGRAMS
+        if all(field in run['histograms'] for run in result['runs'])
+    }
+    ks_table = table_content(result['ks'], max_rows * 20, char_width, float_format='{:.4g}')
+    lote_table = table_content(result['lotes'], max_rows * 20, char_width, float_format='{:.4g}')
+    return result, svgs, ks_table, lote_table
+
+
 class AdvancedDataProcessorGUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.df = None
         self.processed_df = None
+        self.file_path = None
+        # Archivos del run cargado (None si vino de una sesión)
+        self.source_paths = None
+        self.validation = None
+        self.last_payload = None
+        # Bloques compartidos propiedad de la ventana (datos crudos y resultado)
+        self.raw_buffer = None
+        self.processed_buffer = None
+        # Carga en segundo plano y procesamiento pedido durante la carga
+        self.load_thread = None
+        self.loading_path = None
+        self.loading_paths = None
+        self.process_pending = False
+        self.session_thread = None
+        self.compare_thread = None
+        self.comparison = None
+        self.archive_thread = None
+        self.report_thread = None
+        # Grafo de etapas del procesamiento (se crea al primer procesamiento)
+        self.stage_graph = None
+        # Resultados anteriores para deshacer/rehacer (comparten columnas)
+        self.history = SnapshotHistory()
+        # Cliente del servicio de análisis (config.SERVICE_URL)
+        self.service_client = None
+        if config.SERVICE_URL:
+            from analysis_service import ServiceClient
+            self.service_client = ServiceClient(config.SERVICE_URL)
         self.initUI()
     
     def initUI(self):
@@ -136,10 +313,10 @@ class AdvancedDataProcessorGUI(QMainWindow):
         self.file_label.setStyleSheet("color: gray; font-style: italic;")
         self.file_label.setFont(self.small_font)
         file_layout.addWidget(self.file_label, 1)
-        file_btn = QPushButton("Cargar")
-        file_btn.setMaximumWidth(80)
-        file_btn.clicked.connect(self.load_file)
-        file_layout.addWidget(file_btn)
+        self.file_btn = QPushButton("Cargar")
+        self.file_btn.setMaximumWidth(80)
+        self.file_btn.clicked.connect(self.load_file)
+        file_layout.addWidget(self.file_btn)
         layout.addLayout(file_layout)
         
         layout.addSpacing(15)
@@ -156,6 +333,24 @@ class AdvancedDataProcessorGUI(QMainWindow):
         lote_layout.addStretch()
         layout.addLayout(lote_layout)
         
+        self.all_lotes_check = QCheckBox("Procesar todos los lotes")
+        self.all_lotes_check.setChecked(False)
+        self.all_lotes_check.toggled.connect(
+            lambda checked: self.lote_spinbox.setEnabled(not checked)
+        )
+        layout.addWidget(self.all_lotes_check)
+        
+        window_layout = QHBoxLayout()
+        window_layout.addWidget(QLabel("Ventana coincidencia (ns):"))
+        self.coincidence_spinbox = QDoubleSpinBox()
+        self.coincidence_spinbox.setMinimum(0.0)
+        self.coincidence_spinbox.setMaximum(1e9)
+        self.coincidence_spinbox.setDecimals(2)
+        self.coincidence_spinbox.setValue(config.COINCIDENCE_WINDOW_NS)
+        window_layout.addWidget(self.coincidence_spinbox)
+        window_layout.addStretch()
+        layout.addLayout(window_layout)
+        
         # Rango de índices
         range_label = QLabel("Rango de índices T1:")
         range_label.setFont(self.small_font)
@@ -180,6 +375,33 @@ class AdvancedDataProcessorGUI(QMainWindow):
         range_layout.addStretch()
         layout.addLayout(range_layout)
         
+        # Filtro libre por expresión
+        filter_label = QLabel("Filtro (expresión):")
+        filter_label.setFont(self.small_font)
+        filter_label.setStyleSheet("color: #555;")
+        layout.addWidget(filter_label)
+        
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("T1_FineNS > 20 and T2_ResetCount - T1_ResetCount < 500")
+        self.filter_edit.setToolTip(FILTER_HELP)
+        self.filter_edit.textChanged.connect(self.validate_filter)
+        self.filter_edit.returnPressed.connect(self.process_data)
+        layout.addWidget(self.filter_edit)
+        
+        # Rango de hora del PC (Timestamp_PC)
+        pc_time_layout = QHBoxLayout()
+        pc_time_layout.addWidget(QLabel("Hora PC:"))
+        self.pc_from_edit = QLineEdit()
+        self.pc_from_edit.setPlaceholderText("desde HH:MM:SS")
+        self.pc_from_edit.returnPressed.connect(self.process_data)
+        pc_time_layout.addWidget(self.pc_from_edit)
+        pc_time_layout.addWidget(QLabel("–"))
+        self.pc_to_edit = QLineEdit()
+        self.pc_to_edit.setPlaceholderText("hasta HH:MM:SS")
+        self.pc_to_edit.returnPressed.connect(self.process_data)
+        pc_time_layout.addWidget(self.pc_to_edit)
+        layout.addLayout(pc_time_layout)
+        
         layout.addSpacing(15)
         layout.addWidget(self.create_separator("OPCIONES"))
         
@@ -192,17 +414,49 @@ class AdvancedDataProcessorGUI(QMainWindow):
         self.normalize_check.setChecked(False)
         layout.addWidget(self.normalize_check)
         
+        self.calibrate_check = QCheckBox("Calibrar FineNS (densidad de códigos)")
+        self.calibrate_check.setChecked(False)
+        layout.addWidget(self.calibrate_check)
+        
+        self.gaps_check = QCheckBox("Analizar huecos y tiempos muertos")
+        self.gaps_check.setChecked(False)
+        layout.addWidget(self.gaps_check)
+        
+        self.rates_check = QCheckBox("Analizar tasa de hits y tiempo muerto")
+        self.rates_check.setChecked(False)
+        layout.addWidget(self.rates_check)
+        
+        self.fit_check = QCheckBox("Ajustar pico T2-T1 (resolución temporal)")
+        self.fit_check.setChecked(False)
+        layout.addWidget(self.fit_check)
+        
         layout.addSpacing(20)
         layout.addWidget(self.create_separator("CONTROL"))
         
         # Botones de control
-        process_btn = QPushButton("▶ Procesar Datos")
-        process_btn.setStyleSheet(
+        self.process_btn = QPushButton("▶ Procesar Datos")
+        self.process_btn.setStyleSheet(
             "background-color: #4CAF50; color: white; font-weight: bold; "
             "padding: 10px; border-radius: 5px; font-size: 11px;"
         )
-        process_btn.clicked.connect(self.process_data)
-        layout.addWidget(process_btn)
+        self.process_btn.clicked.connect(self.process_data)
+        layout.addWidget(self.process_btn)
+        
+        # Historial de resultados: volver a un procesamiento anterior
+        history_layout = QHBoxLayout()
+        self.undo_btn = QPushButton("↶ Deshacer")
+        self.undo_btn.setShortcut(QKeySequence(QKeySequence.StandardKey.Undo))
+        self.undo_btn.clicked.connect(self.undo_result)
+        history_layout.addWidget(self.undo_btn)
+        self.redo_btn = QPushButton("↷ Rehacer")
+        self.redo_btn.setShortcut(QKeySequence(QKeySequence.StandardKey.Redo))
+        self.redo_btn.clicked.connect(self.redo_result)
+        history_layout.addWidget(self.redo_btn)
+        layout.addLayout(history_layout)
+        self.history_label = QLabel("")
+        self.history_label.setStyleSheet("color: #666; font-size: 9px;")
+        layout.addWidget(self.history_label)
+        self.update_history_controls()
         
         export_csv_btn = QPushButton("💾 Exportar CSV")
         export_csv_btn.setStyleSheet(
@@ -220,6 +474,47 @@ class AdvancedDataProcessorGUI(QMainWindow):
         export_xlsx_btn.clicked.connect(lambda: self.export_data('xlsx'))
         layout.addWidget(export_xlsx_btn)
         
+        self.archive_btn = QPushButton("🗄 Archivar (Parquet)")
+        self.archive_btn.setStyleSheet(
+            "background-color: #009688; color: white; font-weight: bold; "
+            "padding: 8px; border-radius: 5px; font-size: 10px;"
+        )
+        self.archive_btn.setToolTip(
+            "Agregar el run procesado a un dataset Parquet particionado\n"
+            "por fecha / run / lote (requiere pyarrow)"
+        )
+        self.archive_btn.clicked.connect(self.archive_data)
+        layout.addWidget(self.archive_btn)
+        
+        self.report_btn = QPushButton("📄 Generar Reporte")
+        self.report_btn.setStyleSheet(
+            "background-color: #607D8B; color: white; font-weight: bold; "
+            "padding: 8px; border-radius: 5px; font-size: 10px;"
+        )
+        self.report_btn.clicked.connect(self.generate_report)
+        layout.addWidget(self.report_btn)
+        
+        self.compare_btn = QPushButton("⚖ Comparar Runs")
+        self.compare_btn.setStyleSheet(
+            "background-color: #795548; color: white; font-weight: bold; "
+            "padding: 8px; border-radius: 5px; font-size: 10px;"
+        )
+        self.compare_btn.setToolTip(
+            "Comparar el run procesado (o el primer archivo elegido) con otros runs:\n"
+            "diferencias por columna y por lote y prueba KS de los histogramas"
+        )
+        self.compare_btn.clicked.connect(self.compare_runs)
+        layout.addWidget(self.compare_btn)
+        
+        session_layout = QHBoxLayout()
+        self.save_session_btn = QPushButton("🗂 Guardar Sesión")
+        self.save_session_btn.clicked.connect(self.save_session)
+        session_layout.addWidget(self.save_session_btn)
+        self.open_session_btn = QPushButton("📂 Abrir Sesión")
+        self.open_session_btn.clicked.connect(self.open_session)
+        session_layout.addWidget(self.open_session_btn)
+        layout.addLayout(session_layout)
+        
         layout.addSpacing(10)
         
         # Barra de progreso
@@ -252,17 +547,55 @@ class AdvancedDataProcessorGUI(QMainWindow):
         return label
     
     def create_results_panel(self):
-        """Crear panel de resultados y visualización"""
-        tab_widget = QTabWidget()
-        tab_widget.setStyleSheet(
+        """Crear panel de resultados; cada pestaña se construye al verla por primera vez"""
+        self.tab_widget = QTabWidget()
+        self.tab_widget.setStyleSheet(
             "QTabBar::tab { padding: 8px 20px; } "
             "QTabBar::tab:selected { background-color: #e0e0e0; }"
         )
         
-        # Tab 1: Datos crudos
-        raw_tab = QWidget()
-        raw_layout = QVBoxLayout(raw_tab)
+        # Título de la pestaña -> (constructor, función que muestra resultados)
+        self.tab_specs = [
+            ("Datos Crudos", self.build_raw_tab, None),
+            ("Datos Procesados", self.build_processed_tab, self.show_processed_table),
+            ("Estadísticas", self.build_stats_tab, self.show_statistics),
+            ("Resumen", self.build_summary_tab, self.show_summary),
+            ("Por Lote", self.build_lotes_tab, self.show_lote_summary),
+            ("Huecos", self.build_gaps_tab, self.show_gaps),
+            ("Tasa", self.build_rates_tab, self.show_rates),
+            ("Resolución", self.build_fit_tab, self.show_fits),
+            ("Comparación", self.build_comparison_tab, None),
+        ]
+        self.built_tabs = set()
+        
+        for title, _, _ in self.tab_specs:
+            page = QWidget()
+            QVBoxLayout(page)
+            self.tab_widget.addTab(page, title)
         
+        self.tab_widget.currentChanged.connect(self.ensure_tab)
+        self.ensure_tab(0)
+        
+        return self.tab_widget
+    
+    def ensure_tab(self, index):
+        """Construir una pestaña la primera vez que se muestra"""
+        if index < 0 or index in self.built_tabs:
+            return
+        _, builder, show = self.tab_specs[index]
+        builder(self.tab_widget.widget(index).layout())
+        self.built_tabs.add(index)
+        if show is not None and self.last_payload is not None:
+            show(self.last_payload)
+    
+    def refresh_result_tabs(self):
+        """Actualizar las pestañas de resultados ya construidas"""
+        for index, (_, _, show) in enumerate(self.tab_specs):
+            if show is not None and index in self.built_tabs:
+                show(self.last_payload)
+    
+    def build_raw_tab(self, raw_layout):
+        """Tab 1: Datos crudos"""
         raw_title = QLabel("📋 Datos Cargados")
         raw_title.setFont(self.title_font)
         raw_layout.addWidget(raw_title)
@@ -272,13 +605,9 @@ class AdvancedDataProcessorGUI(QMainWindow):
         self.raw_table.setRowCount(0)
         self.raw_table.setMaximumHeight(250)
         raw_layout.addWidget(self.raw_table)
-        
-        tab_widget.addTab(raw_tab, "Datos Crudos")
-        
-        # Tab 2: Datos procesados
-        processed_tab = QWidget()
-        processed_layout = QVBoxLayout(processed_tab)
-        
+    
+    def build_processed_tab(self, processed_layout):
+        """Tab 2: Datos procesados"""
         processed_title = QLabel("✓ Datos Procesados")
         processed_title.setFont(self.title_font)
         processed_layout.addWidget(processed_title)
@@ -287,13 +616,9 @@ class AdvancedDataProcessorGUI(QMainWindow):
         self.processed_table.setColumnCount(0)
         self.processed_table.setRowCount(0)
         processed_layout.addWidget(self.processed_table)
-        
-        tab_widget.addTab(processed_tab, "Datos Procesados")
-        
-        # Tab 3: Estadísticas
-        stats_tab = QWidget()
-        stats_layout = QVBoxLayout(stats_tab)
-        
+    
+    def build_stats_tab(self, stats_layout):
+        """Tab 3: Estadísticas"""
         stats_title = QLabel("📊 Estadísticas Detalladas")
         stats_title.setFont(self.title_font)
         stats_layout.addWidget(stats_title)
@@ -307,13 +632,9 @@ class AdvancedDataProcessorGUI(QMainWindow):
         self.stats_text.setWordWrap(True)
         self.stats_text.setFont(self.small_font)
         stats_layout.addWidget(self.stats_text)
-        
-        tab_widget.addTab(stats_tab, "Estadísticas")
-        
-        # Tab 4: Resumen de procesamiento
-        summary_tab = QWidget()
-        summary_layout = QVBoxLayout(summary_tab)
-        
+    
+    def build_summary_tab(self, summary_layout):
+        """Tab 4: Resumen de procesamiento"""
         summary_title = QLabel("🔍 Resumen de Procesamiento")
         summary_title.setFont(self.title_font)
         summary_layout.addWidget(summary_title)
@@ -327,54 +648,265 @@ class AdvancedDataProcessorGUI(QMainWindow):
         self.summary_text.setWordWrap(True)
         self.summary_text.setFont(QFont("Courier New", 9))
         summary_layout.addWidget(self.summary_text)
+    
+    def build_lotes_tab(self, lotes_layout):
+        """Tab 5: Resumen por lote"""
+        lotes_title = QLabel("🧮 Resumen por Lote")
+        lotes_title.setFont(self.title_font)
+        lotes_layout.addWidget(lotes_title)
+        
+        self.lotes_table = QTableWidget()
+        self.lotes_table.setColumnCount(0)
+        self.lotes_table.setRowCount(0)
+        lotes_layout.addWidget(self.lotes_table)
+    
+    def build_gaps_tab(self, gaps_layout):
+        """Tab 6: Índices faltantes, duplicados y tiempos muertos"""
+        gaps_title = QLabel("🕳 Huecos y Eventos Perdidos")
+        gaps_title.setFont(self.title_font)
+        gaps_layout.addWidget(gaps_title)
+        
+        self.gaps_summary_label = QLabel("Active 'Analizar huecos' y procese los datos")
+        self.gaps_summary_label.setWordWrap(True)
+        gaps_layout.addWidget(self.gaps_summary_label)
+        
+        self.gaps_table = QTableWidget()
+        self.gaps_table.setColumnCount(0)
+        self.gaps_table.setRowCount(0)
+        gaps_layout.addWidget(self.gaps_table)
+    
+    def build_rates_tab(self, rates_layout):
+        """Tab 7: Tasa de hits vs tiempo, intervalos entre hits y tiempo muerto"""
+        from PyQt6.QtSvgWidgets import QSvgWidget
+        from rate_analysis import WINDOW_CHOICES
+        
+        rates_title = QLabel("📈 Tasa de Hits")
+        rates_title.setFont(self.title_font)
+        rates_layout.addWidget(rates_title)
         
-        tab_widget.addTab(summary_tab, "Resumen")
+        window_layout = QHBoxLayout()
+        window_layout.addWidget(QLabel("Ventana:"))
+        self.rate_window_combo = QComboBox()
+        for label, window_ns in WINDOW_CHOICES.items():
+            self.rate_window_combo.addItem(label, window_ns)
+        default_index = self.rate_window_combo.findData(config.RATE_WINDOW_NS)
+        self.rate_window_combo.setCurrentIndex(max(default_index, 0))
+        # Cambiar la ventana reagrupa los conteos en caché (no relee los datos)
+        self.rate_window_combo.currentIndexChanged.connect(self.update_rate_plot)
+        window_layout.addWidget(self.rate_window_combo)
+        window_layout.addStretch()
+        rates_layout.addLayout(window_layout)
         
-        return tab_widget
+        self.rate_plot = QSvgWidget()
+        self.rate_plot.setMinimumHeight(280)
+        rates_layout.addWidget(self.rate_plot)
+        
+        intervals_layout = QHBoxLayout()
+        self.interarrival_plots = []
+        for _ in range(2):
+            plot = QSvgWidget()
+            plot.setMinimumHeight(220)
+            intervals_layout.addWidget(plot)
+            self.interarrival_plots.append(plot)
+        rates_layout.addLayout(intervals_layout)
+        
+        self.rates_table = QTableWidget()
+        self.rates_table.setColumnCount(0)
+        self.rates_table.setRowCount(0)
+        rates_layout.addWidget(self.rates_table)
+    
+    def build_fit_tab(self, fit_layout):
+        """Tab 8: Ajuste gaussiano del pico T2-T1 por lote"""
+        fit_title = QLabel("🎯 Resolución Temporal (pico T2-T1)")
+        fit_title.setFont(self.title_font)
+        fit_layout.addWidget(fit_title)
+        
+        self.fit_summary_label = QLabel("Active 'Ajustar pico T2-T1' y procese los datos")
+        self.fit_summary_label.setWordWrap(True)
+        fit_layout.addWidget(self.fit_summary_label)
+        
+        self.fit_table = QTableWidget()
+        self.fit_table.setColumnCount(0)
+        self.fit_table.setRowCount(0)
+        fit_layout.addWidget(self.fit_table)
+    
+    def build_comparison_tab(self, comparison_layout):
+        """Tab 9: Comparación con otros runs (referencia = primer run)"""
+        from PyQt6.QtSvgWidgets import QSvgWidget
+        
+        comparison_title = QLabel("⚖ Comparación de Runs")
+        comparison_title.setFont(self.title_font)
+        comparison_layout.addWidget(comparison_title)
+        
+        self.comparison_label = QLabel("Use 'Comparar Runs' para elegir los runs a comparar")
+        self.comparison_label.setWordWrap(True)
+        comparison_layout.addWidget(self.comparison_label)
+        
+        field_layout = QHBoxLayout()
+        field_layout.addWidget(QLabel("Distribución:"))
+        self.comparison_field_combo = QComboBox()
+        self.comparison_field_combo.currentIndexChanged.connect(self.update_comparison_plot)
+        field_layout.addWidget(self.comparison_field_combo)
+        field_layout.addStretch()
+        self.save_comparison_btn = QPushButton("💾 Guardar HTML")
+        self.save_comparison_btn.setEnabled(False)
+        self.save_comparison_btn.clicked.connect(self.save_comparison)
+        field_layout.addWidget(self.save_comparison_btn)
+        comparison_layout.addLayout(field_layout)
+        
+        self.comparison_plot = QSvgWidget()
+        self.comparison_plot.setMinimumHeight(240)
+        comparison_layout.addWidget(self.comparison_plot)
+        
+        self.comparison_ks_table = QTableWidget()
+        self.comparison_ks_table.setColumnCount(0)
+        self.comparison_ks_table.setRowCount(0)
+        comparison_layout.addWidget(self.comparison_ks_table)
+        
+        self.comparison_lote_table = QTableWidget()
+        self.comparison_lote_table.setColumnCount(0)
+        self.comparison_lote_table.setRowCount(0)
+        comparison_layout.addWidget(self.comparison_lote_table)
     
     def load_file(self):
-        """Cargar archivo de datos"""
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Seleccionar archivo de datos", "", "CSV Files (*.csv);;All Files (*)"
+        """Cargar archivo(s) de datos en segundo plano"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Seleccionar archivo(s) de datos", "", "Datos (*.csv *.csv.gz *.csv.zst *.xlsx);;CSV Files (*.csv *.csv.gz *.csv.zst);;Excel Files (*.xlsx);;All Files (*)"
         )
         
-        if file_path:
-            try:
-                self.df = pd.read_csv(file_path, sep=';')
-                self.file_label.setText(Path(file_path).name)
-                self.file_label.setStyleSheet("color: green; font-weight: bold;")
-                self.display_raw_data()
-                
-                info_msg = f"✓ {Path(file_path).name}: {len(self.df)} filas × {len(self.df.columns)} columnas"
-                self.info_box.setText(info_msg)
-                self.info_box.setStyleSheet(
-                    "background-color: #e8f5e9; padding: 8px; border-radius: 3px; "
-                    "border-left: 4px solid #4CAF50; color: #2e7d32;"
-                )
-                
-                self.statusBar().showMessage(f"Cargado: {Path(file_path).name}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"No se pudo cargar el archivo:\n{str(e)}")
-                self.statusBar().showMessage("Error al cargar archivo")
+        if not file_paths:
+            return
+        
+        # Varios archivos del mismo run se fusionan ordenados por tiempo
+        if len(file_paths) > 1:
+            self.loading_path = " + ".join(Path(path).name for path in file_paths)
+        else:
+            self.loading_path = file_paths[0]
+        self.loading_paths = file_paths
+        
+        self.file_btn.setEnabled(False)
+        self.process_btn.setEnabled(False)
+        self.process_pending = False
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.info_box.setText(f"⏳ Cargando {Path(self.loading_path).name}...")
+        self.info_box.setStyleSheet(
+            "background-color: #fff3e0; padding: 8px; border-radius: 3px; "
+            "border-left: 4px solid #FF9800; color: #e65100;"
+        )
+        
+        self.load_thread = FileLoadThread(
+            file_paths, max_rows=50, char_width=self.char_width(), client=self.service_client
+        )
+        self.load_thread.first_block.connect(self.show_first_block)
+        self.load_thread.progress.connect(self.update_load_progress)
+        self.load_thread.finished.connect(self.finish_load)
+        self.load_thread.error.connect(self.handle_load_error)
+        self.load_thread.start()
     
-    def display_raw_data(self):
-        """Mostrar datos crudos en tabla"""
-        if self.df is not None:
-            self.raw_table.setColumnCount(len(self.df.columns))
-            self.raw_table.setHorizontalHeaderLabels(self.df.columns)
-            self.raw_table.setRowCount(min(50, len(self.df)))
+    def show_first_block(self, content):
+        """Mostrar las primeras filas mientras continúa la lectura"""
+        self.populate_table(self.raw_table, content)
+        self.file_label.setText(Path(self.loading_path).name)
+        self.file_label.setStyleSheet("color: #e65100; font-weight: bold;")
+        # Se puede pedir el procesamiento; arranca al terminar la carga
+        self.process_btn.setEnabled(True)
+    
+    def update_load_progress(self, percent, rows):
+        """Avance de la carga según bytes leídos y filas ya disponibles"""
+        self.progress_bar.setValue(percent)
+        self.info_box.setText(f"⏳ Cargando {Path(self.loading_path).name}: {rows:,} filas ({percent}%)")
+    
+    def finish_load(self, loaded):
+        """Adoptar los datos leídos por FileLoadThread"""
+        self.release_buffers()
+        self.forget_stage_results()
+        self.raw_buffer = loaded.buffer
+        self.df = loaded.df
+        self.history.reset(base=self.df)
+        self.update_history_controls()
+        self.validation = loaded.validation
+        self.file_path = self.loading_path
+        self.source_paths = self.loading_paths
+        
+        self.file_btn.setEnabled(True)
+        self.process_btn.setEnabled(True)
+        self.progress_bar.setVisible(False)
+        self.file_label.setText(Path(self.file_path).name)
+        self.file_label.setStyleSheet("color: green; font-weight: bold;")
+        self.display_raw_data()
+        
+        info_msg = f"✓ {Path(self.file_path).name}: {len(self.df)} filas × {len(self.df.columns)} columnas"
+        if self.validation is not None and not self.validation.is_clean:
+            info_msg += f"\n⚠ Validación:\n{self.validation.summary()}"
+            if config.REMOVE_INVALID_ROWS and not self.validation.is_valid:
+                info_msg += "\n(filas inválidas eliminadas)"
+            self.info_box.setStyleSheet(
+                "background-color: #fff3e0; padding: 8px; border-radius: 3px; "
+                "border-left: 4px solid #FF9800; color: #e65100;"
+            )
+        else:
+            self.info_box.setStyleSheet(
+                "background-color: #e8f5e9; padding: 8px; border-radius: 3px; "
+                "border-left: 4px solid #4CAF50; color: #2e7d32;"
+            )
+        self.info_box.setText(info_msg)
+        
+        self.statusBar().showMessage(f"Cargado: {Path(self.file_path).name}")
+        
+        if self.process_pending:
+            self.process_pending = False
+            self.process_data()
+    
+    def handle_load_error(self, error_msg):
+        """Manejar errores durante la carga"""
+        self.file_btn.setEnabled(True)
+        self.process_btn.setEnabled(self.df is not None)
+        self.process_pending = False
+        self.progress_bar.setVisible(False)
+        QMessageBox.critical(self, "Error", f"No se pudo cargar el archivo:\n{error_msg}")
+        self.statusBar().showMessage("Error al cargar archivo")
+    
+    def char_width(self):
+        """Ancho medio de carácter de la fuente de las tablas (px)"""
+        return QFontMetrics(self.small_font).averageCharWidth()
+    
+    def populate_table(self, table, content):
+        """Volcar un TableContent en una tabla con un único repintado"""
+        table.setUpdatesEnabled(False)
+        try:
+            table.clearContents()
+            table.setColumnCount(len(content.headers))
+            table.setHorizontalHeaderLabels(content.headers)
+            table.setRowCount(len(content.cells))
             
-            for i in range(min(50, len(self.df))):
-                for j, col in enumerate(self.df.columns):
-                    item = QTableWidgetItem(str(self.df.iloc[i, j]))
+            for i, row in enumerate(content.cells):
+                for j, text in enumerate(row):
+                    item = QTableWidgetItem(text)
                     item.setFont(self.small_font)
-                    self.raw_table.setItem(i, j, item)
+                    table.setItem(i, j, item)
             
-            # Ajustar ancho de columnas
-            self.raw_table.resizeColumnsToContents()
+            # Anchos estimados en el worker (sin resizeColumnsToContents)
+            for j, width in enumerate(content.widths):
+                table.setColumnWidth(j, width)
+        finally:
+            table.setUpdatesEnabled(True)
+    
+    def display_raw_data(self):
+        """Mostrar datos crudos en tabla"""
+        if self.df is not None:
+            from result_rendering import table_content
+            self.populate_table(self.raw_table, table_content(self.df, 50, self.char_width()))
     
     def process_data(self):
         """Procesar datos con parámetros seleccionados"""
+        if self.load_thread is not None and self.load_thread.isRunning():
+            # Carga en curso: procesar en cuanto estén todos los datos
+            self.process_pending = True
+            self.statusBar().showMessage("Se procesará al terminar la carga")
+            return
+        
         if self.df is None:
             QMessageBox.warning(self, "Advertencia", "Por favor, cargue un archivo primero")
             return
@@ -385,9 +917,27 @@ class AdvancedDataProcessorGUI(QMainWindow):
             'min_index': self.min_index_spinbox.value(),
             'max_index': self.max_index_spinbox.value(),
             'remove_nulls': self.remove_nulls_check.isChecked(),
-            'normalize': self.normalize_check.isChecked()
+            'normalize': self.normalize_check.isChecked(),
+            'all_lotes': self.all_lotes_check.isChecked(),
+            'coincidence_window': self.coincidence_spinbox.value(),
+            'calibrate_fine': self.calibrate_check.isChecked(),
+            'calibration_file': config.FINE_CALIBRATION_FILE,
+            'analyze_gaps': self.gaps_check.isChecked(),
+            'analyze_rates': self.rates_check.isChecked(),
+            'rate_window': (
+                self.rate_window_combo.currentData()
+                if hasattr(self, 'rate_window_combo') else config.RATE_WINDOW_NS
+            ),
+            'fit_peaks': self.fit_check.isChecked(),
+            'filter_expression': self.filter_edit.text().strip(),
+            'pc_time_from': self.pc_from_edit.text().strip(),
+            'pc_time_to': self.pc_to_edit.text().strip()
         }
         
+        if not self.validate_filter():
+            QMessageBox.warning(self, "Advertencia", self.filter_edit.toolTip())
+            return
+        
         # Iniciar thread de procesamiento
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
@@ -397,36 +947,64 @@ class AdvancedDataProcessorGUI(QMainWindow):
             "border-left: 4px solid #FF9800; color: #e65100;"
         )
         
-        self.thread = DataProcessingThread(self.df, params)
+        descriptor = self.raw_buffer.descriptor if self.raw_buffer is not None else None
+        if self.stage_graph is None:
+            from pipeline import processing_graph
+            self.stage_graph = processing_graph()
+        # Con el servicio, solo los runs cargados desde archivos (no las sesiones)
+        client = self.service_client if self.source_paths is not None else None
+        self.thread = DataProcessingThread(
+            self.df, params, max_rows=50, char_width=self.char_width(), descriptor=descriptor,
+            graph=self.stage_graph, client=client, source=self.source_paths
+        )
         self.thread.progress.connect(self.update_progress)
         self.thread.finished.connect(self.display_processed_data)
         self.thread.error.connect(self.handle_error)
         self.thread.start()
     
+    def validate_filter(self):
+        """Marcar en rojo el filtro por expresión si no es válido"""
+        from filter_expression import FilterSyntaxError, compile_filter
+        
+        text = self.filter_edit.text().strip()
+        try:
+            if text:
+                compile_filter(text)
+        except FilterSyntaxError as e:
+            self.filter_edit.setStyleSheet("border: 1px solid #f44336;")
+            self.filter_edit.setToolTip(str(e))
+            return False
+        self.filter_edit.setStyleSheet("")
+        self.filter_edit.setToolTip(FILTER_HELP)
+        return True
+    
     def update_progress(self, value):
         """Actualizar barra de progreso"""
         self.progress_bar.setValue(value)
     
-    def display_processed_data(self, df):
-        """Mostrar datos procesados"""
+    def display_processed_data(self, payload):
+        """Mostrar datos procesados a partir del resultado renderizado"""
+        # Nueva instantánea del historial (las columnas repetidas se comparten);
+        # el mismo resultado que el actual no agrega otra
+        previous = self.history.current
+        received = payload
+        payload = self.history.add(payload)
+        df = payload.df
         self.processed_df = df
+        self.last_payload = payload
         
-        # Mostrar tabla
-        self.processed_table.setColumnCount(len(df.columns))
-        self.processed_table.setHorizontalHeaderLabels(df.columns)
-        self.processed_table.setRowCount(min(50, len(df)))
-        
-        for i in range(min(50, len(df))):
-            for j, col in enumerate(df.columns):
-                item = QTableWidgetItem(str(df.iloc[i, j]))
-                item.setFont(self.small_font)
-                self.processed_table.setItem(i, j, item)
+        if previous is not None and self.history.current is previous:
+            if received.buffer is not None and received.buffer is not payload.buffer:
+                received.buffer.release()
+        else:
+            # El bloque del resultado anterior pasa a ser del historial: se libera
+            # el nombre, sus vistas siguen válidas mientras haya instantáneas
+            if self.processed_buffer is not None:
+                self.processed_buffer.release()
+            self.processed_buffer = payload.buffer
         
-        self.processed_table.resizeColumnsToContents()
-        
-        # Mostrar estadísticas
-        self.display_statistics(df)
-        self.display_summary(df)
+        self.refresh_result_tabs()
+        self.update_history_controls()
         
         self.progress_bar.setVisible(False)
         
@@ -439,74 +1017,107 @@ class AdvancedDataProcessorGUI(QMainWindow):
         
         self.statusBar().showMessage(f"✓ Procesados {len(df)} registros")
     
-    def display_statistics(self, df):
-        """Mostrar estadísticas de los datos procesados"""
-        stats_html = "<table style='width:100%; border-collapse:collapse;'>"
-        
-        # Header
-        stats_html += "<tr style='background-color:#f0f0f0; border-bottom:1px solid #ddd;'>"
-        stats_html += "<td style='padding:6px; font-weight:bold;'>Campo</td>"
-        stats_html += "<td style='padding:6px; font-weight:bold;'>Válidos</td>"
-        stats_html += "<td style='padding:6px; font-weight:bold;'>Mínimo</td>"
-        stats_html += "<td style='padding:6px; font-weight:bold;'>Máximo</td>"
-        stats_html += "<td style='padding:6px; font-weight:bold;'>Promedio</td>"
-        stats_html += "</tr>"
-        
-        row_color = True
-        for col in df.columns:
-            try:
-                numeric_df = pd.to_numeric(
-                    df[col].astype(str).str.replace(',', '.'),
-                    errors='coerce'
+    def undo_result(self):
+        """Volver al resultado del procesamiento anterior"""
+        snapshot = self.history.undo()
+        if snapshot is not None:
+            self.show_snapshot(snapshot, "↶")
+    
+    def redo_result(self):
+        """Volver a aplicar el resultado deshecho"""
+        snapshot = self.history.redo()
+        if snapshot is not None:
+            self.show_snapshot(snapshot, "↷")
+    
+    def show_snapshot(self, snapshot, mark):
+        """Mostrar una instantánea del historial con sus parámetros"""
+        payload = snapshot.payload
+        self.processed_df = payload.df
+        self.last_payload = payload
+        self.set_params(payload.params)
+        self.refresh_result_tabs()
+        self.update_history_controls()
+        self.info_box.setText(
+            f"{mark} Resultado de las {snapshot.label}: "
+            f"{len(payload.df)} filas × {len(payload.df.columns)} columnas"
+        )
+        self.statusBar().showMessage(self.history.status())
+    
+    def update_history_controls(self):
+        """Habilitar deshacer/rehacer según el historial"""
+        self.undo_btn.setEnabled(self.history.can_undo)
+        self.redo_btn.setEnabled(self.history.can_redo)
+        self.history_label.setText(self.history.status())
+    
+    def show_processed_table(self, payload):
+        """Volcar la tabla de datos procesados"""
+        self.populate_table(self.processed_table, payload.table)
+    
+    def show_statistics(self, payload):
+        """Mostrar el HTML de estadísticas"""
+        self.stats_text.setText(payload.stats_html)
+    
+    def show_summary(self, payload):
+        """Mostrar el resumen de procesamiento"""
+        self.summary_text.setText(payload.summary_text)
+    
+    def show_lote_summary(self, payload):
+        """Mostrar la tabla lote por lote (si se procesaron todos los lotes)"""
+        if payload.lote_table is not None:
+            self.populate_table(self.lotes_table, payload.lote_table)
+    
+    def show_gaps(self, payload):
+        """Mostrar la tabla de tramos y los totales por canal y tipo"""
+        if payload.gap_table is None:
+            return
+        summary = payload.gap_result['summary']
+        lines = [
+            f"Lote {row.Num_Lote} · {row.Canal} · {row.Tipo}: "
+            f"{row.Tramos} tramos" + (f", {row.Total:.0f} en total" if row.Tipo != 'desfase' else "")
+            for row in summary.itertuples(index=False)
+        ]
+        self.gaps_summary_label.setText("\n".join(lines) or "Sin huecos detectados")
+        self.populate_table(self.gaps_table, payload.gap_table)
+    
+    def show_rates(self, payload):
+        """Mostrar gráficos de tasa e intervalos y el resumen por canal"""
+        if payload.rate_table is None:
+            return
+        rate_plot, *interarrival = payload.rate_svgs
+        if self.rate_window_combo.currentData() == payload.rate_result['window_ns']:
+            self.rate_plot.load(rate_plot.encode('utf-8'))
+        else:
+            self.update_rate_plot()
+        for plot, svg in zip(self.interarrival_plots, interarrival):
+            plot.load(svg.encode('utf-8'))
+        self.populate_table(self.rates_table, payload.rate_table)
+    
+    def show_fits(self, payload):
+        """Mostrar la tabla de ajustes y la σ promedio de cada modelo"""
+        if payload.fit_table is None:
+            return
+        summary = payload.fit_result['summary']
+        lines = []
+        for model, rows in summary.groupby('Modelo', sort=False):
+            valid = rows[rows['Convergió']]
+            if len(valid) > 0:
+                lines.append(
+                    f"{model}: σ promedio {valid['σ (ns)'].mean():.4g} ns · "
+                    f"FWHM {valid['FWHM (ns)'].mean():.4g} ns · "
+                    f"{len(valid)}/{len(rows)} lotes ajustados"
                 )
-                valid_count = numeric_df.notna().sum()
-                
-                if valid_count > 0:
-                    bg_color = "#f9f9f9" if row_color else "#ffffff"
-                    stats_html += f"<tr style='background-color:{bg_color}; border-bottom:1px solid #eee;'>"
-                    stats_html += f"<td style='padding:6px;'><b>{col}</b></td>"
-                    stats_html += f"<td style='padding:6px;'>{valid_count}</td>"
-                    stats_html += f"<td style='padding:6px;'>{numeric_df.min():.2f}</td>"
-                    stats_html += f"<td style='padding:6px;'>{numeric_df.max():.2f}</td>"
-                    stats_html += f"<td style='padding:6px;'>{numeric_df.mean():.2f}</td>"
-                    stats_html += "</tr>"
-                    row_color = not row_color
-            except:
-                pass
-        
-        stats_html += "</table>"
-        
-        # Información general
-        info_html = f"<br><b>Información General:</b><br>"
-        info_html += f"• Total de registros: {len(df)}<br>"
-        info_html += f"• Total de columnas: {len(df.columns)}<br>"
-        
-        if 'Timestamp_PC' in df.columns:
-            info_html += f"• Timestamp (primer): {df['Timestamp_PC'].iloc[0]}<br>"
-        
-        self.stats_text.setText(stats_html + info_html)
-    
-    def display_summary(self, df):
-        """Mostrar resumen de procesamiento"""
-        summary = "RESUMEN DE PROCESAMIENTO\n"
-        summary += "=" * 50 + "\n\n"
-        summary += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        summary += f"Archivos procesados: 1\n"
-        summary += f"Total de filas: {len(df)}\n"
-        summary += f"Total de columnas: {len(df.columns)}\n\n"
-        
-        summary += "Parámetros aplicados:\n"
-        summary += f"  • Número de lote: {self.lote_spinbox.value()}\n"
-        summary += f"  • Índice mínimo: {self.min_index_spinbox.value()}\n"
-        summary += f"  • Índice máximo: {self.max_index_spinbox.value()}\n"
-        summary += f"  • Eliminar nulos: {self.remove_nulls_check.isChecked()}\n"
-        summary += f"  • Normalizar: {self.normalize_check.isChecked()}\n\n"
-        
-        summary += "Campos en resultado:\n"
-        for i, col in enumerate(df.columns, 1):
-            summary += f"  {i:2d}. {col}\n"
-        
-        self.summary_text.setText(summary)
+            else:
+                lines.append(f"{model}: sin lotes con pares suficientes en la ventana")
+        self.fit_summary_label.setText("\n".join(lines))
+        self.populate_table(self.fit_table, payload.fit_table)
+    
+    def update_rate_plot(self):
+        """Redibujar la tasa vs tiempo con la ventana elegida"""
+        if self.last_payload is None or self.last_payload.rate_result is None:
+            return
+        from rate_analysis import rate_svg
+        svg = rate_svg(self.last_payload.rate_result, self.rate_window_combo.currentData())
+        self.rate_plot.load(svg.encode('utf-8'))
     
     def export_data(self, format_type):
         """Exportar datos procesados"""
@@ -515,16 +1126,19 @@ class AdvancedDataProcessorGUI(QMainWindow):
             return
         
         extension = "xlsx" if format_type == "xlsx" else "csv"
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "Guardar archivo", "", f"{extension.upper()} Files (*.{extension})"
-        )
+        file_filter = f"{extension.upper()} Files (*.{extension})"
+        if format_type != 'xlsx':
+            file_filter += ";;CSV comprimido (*.csv.gz *.csv.zst)"
+        file_path, _ = QFileDialog.getSaveFileName(self, "Guardar archivo", "", file_filter)
         
         if file_path:
             try:
                 if format_type == 'xlsx':
-                    self.processed_df.to_excel(file_path, index=False, engine='openpyxl')
+                    from excel_io import write_excel
+                    write_excel(self.processed_df, file_path)
                 else:
-                    self.processed_df.to_csv(file_path, sep=';', index=False, decimal=',')
+                    from compressed_io import write_csv
+                    write_csv(self.processed_df, file_path)
                 
                 QMessageBox.information(
                     self, "Éxito", 
@@ -534,6 +1148,310 @@ class AdvancedDataProcessorGUI(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"No se pudo exportar:\n{str(e)}")
     
+    def archive_data(self):
+        """Agregar el run procesado al archivo Parquet particionado (en segundo plano)"""
+        if self.last_payload is None:
+            QMessageBox.warning(self, "Advertencia", "Procese datos primero antes de archivar")
+            return
+        
+        from parquet_archive import archive_available, archive_run
+        if not archive_available():
+            QMessageBox.warning(
+                self, "Advertencia",
+                "El archivo Parquet requiere pyarrow:\npip install pyarrow"
+            )
+            return
+        
+        root = QFileDialog.getExistingDirectory(self, "Carpeta del archivo Parquet")
+        if not root:
+            return
+        
+        payload = self.last_payload
+        self.archive_btn.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage("Archivando run...")
+        
+        self.archive_thread = SessionThread(
+            lambda: archive_run(payload.df, root, source=self.file_path, params=payload.params)
+        )
+        self.archive_thread.finished.connect(self.finish_archive)
+        self.archive_thread.error.connect(self.handle_archive_error)
+        self.archive_thread.start()
+    
+    def end_archive_task(self):
+        self.archive_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+    
+    def finish_archive(self, path):
+        """Informar la partición escrita"""
+        self.end_archive_task()
+        self.statusBar().showMessage(f"Archivado: {path.parent.name}/{path.name}")
+    
+    def handle_archive_error(self, error_msg):
+        """Manejar errores al archivar"""
+        self.end_archive_task()
+        QMessageBox.critical(self, "Error", f"No se pudo archivar:\n{error_msg}")
+        self.statusBar().showMessage("Error al archivar")
+    
+    def generate_report(self):
+        """Generar reporte HTML/PDF del último procesamiento (en segundo plano)"""
+        if self.last_payload is None:
+            QMessageBox.warning(self, "Advertencia", "Procese datos primero antes de generar un reporte")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar reporte", "", "HTML Files (*.html);;PDF Files (*.pdf)"
+        )
+        if not file_path:
+            return
+        
+        payload = self.last_payload
+        source = self.file_path
+        
+        def task():
+            from report_generator import compute_aggregates, write_report
+            aggregates = compute_aggregates(
+                payload.df, payload.params, source=source, lote_result=payload.lote_result
+            )
+            write_report(aggregates, file_path)
+            return file_path
+        
+        self.report_btn.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage("Generando reporte...")
+        
+        self.report_thread = SessionThread(task)
+        self.report_thread.finished.connect(self.finish_report)
+        self.report_thread.error.connect(self.handle_report_error)
+        self.report_thread.start()
+    
+    def end_report_task(self):
+        self.report_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+    
+    def finish_report(self, path):
+        """Informar el reporte escrito"""
+        self.end_report_task()
+        self.statusBar().showMessage(f"Reporte generado: {Path(path).name}")
+    
+    def handle_report_error(self, error_msg):
+        """Manejar errores al generar el reporte"""
+        self.end_report_task()
+        QMessageBox.critical(self, "Error", f"No se pudo generar el reporte:\n{error_msg}")
+        self.statusBar().showMessage("Error al generar el reporte")
+    
+    def compare_runs(self):
+        """Comparar el run procesado (si hay) con otros runs elegidos"""
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "Seleccionar runs a comparar", "",
+            "Runs (*.csv *.csv.gz *.csv.zst *.xlsx *.npz);;All Files (*)"
+        )
+        if not files:
+            return
+        
+        from pipeline import complete_params
+        
+        if self.last_payload is None and len(files) < 2:
+            QMessageBox.warning(
+                self, "Advertencia",
+                "Procese datos primero o elija al menos dos runs (el primero es la referencia)"
+            )
+            return
+        
+        # El run procesado es la referencia; sus agregados se calculan en el thread
+        payload = self.last_payload
+        source = self.file_path
+        params = payload.params if payload is not None else complete_params({'all_lotes': True})
+        char_width = self.char_width()
+        
+        def task():
+            current = None
+            if payload is not None:
+                from report_generator import compute_aggregates
+                current = compute_aggregates(
+                    payload.df, payload.params, source=source, lote_result=payload.lote_result
+                )
+            return compare_with_runs(current, files, params, 50, char_width)
+        
+        self.compare_btn.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage(f"Comparando {len(files) + (payload is not None)} runs...")
+        
+        self.compare_thread = SessionThread(task)
+        self.compare_thread.finished.connect(self.show_comparison)
+        self.compare_thread.error.connect(self.handle_comparison_error)
+        self.compare_thread.start()
+    
+    def end_comparison_task(self):
+        self.compare_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+    
+    def show_comparison(self, comparison):
+        """Mostrar la comparación en su pestaña"""
+        from run_comparison import comparison_summary
+        
+        self.end_comparison_task()
+        self.comparison = comparison
+        result, svgs, ks_table, lote_table = comparison
+        
+        index = [title for title, _, _ in self.tab_specs].index("Comparación")
+        self.ensure_tab(index)
+        self.comparison_label.setText("\n".join(comparison_summary(result)))
+        self.comparison_field_combo.blockSignals(True)
+        self.comparison_field_combo.clear()
+        self.comparison_field_combo.addItems(list(svgs))
+        self.comparison_field_combo.blockSignals(False)
+        self.update_comparison_plot()
+        self.populate_table(self.comparison_ks_table, ks_table)
+        self.populate_table(self.comparison_lote_table, lote_table)
+        self.save_comparison_btn.setEnabled(True)
+        self.tab_widget.setCurrentIndex(index)
+        self.statusBar().showMessage(f"Comparación: {', '.join(result['labels'])}")
+    
+    def update_comparison_plot(self):
+        """Mostrar las distribuciones superpuestas del campo elegido"""
+        if self.comparison is None:
+            return
+        svg = self.comparison[1].get(self.comparison_field_combo.currentText())
+        if svg is not None:
+            self.comparison_plot.load(svg.encode('utf-8'))
+    
+    def save_comparison(self):
+        """Guardar la comparación como HTML"""
+        if self.comparison is None:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Guardar comparación", "", "HTML Files (*.html)")
+        if not file_path:
+            return
+        try:
+            from run_comparison import comparison_html
+            Path(file_path).write_text(comparison_html(self.comparison[0]), encoding='utf-8')
+            self.statusBar().showMessage(f"Comparación guardada: {Path(file_path).name}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar la comparación:\n{str(e)}")
+    
+    def handle_comparison_error(self, error_msg):
+        """Manejar errores de la comparación"""
+        self.end_comparison_task()
+        QMessageBox.critical(self, "Error", f"Error al comparar runs:\n{error_msg}")
+        self.statusBar().showMessage("Error al comparar runs")
+    
+    def save_session(self):
+        """Guardar parámetros, datos y agregados para restaurarlos más tarde"""
+        if self.last_payload is None:
+            QMessageBox.warning(self, "Advertencia", "Procese datos primero antes de guardar la sesión")
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar sesión", "", f"Sesiones (*{config.SESSION_SUFFIX})"
+        )
+        if not file_path:
+            return
+        
+        from session_store import save_session
+        payload = self.last_payload
+        analyses = {
+            'lote_result': payload.lote_result,
+            'gap_result': payload.gap_result,
+            'rate_result': payload.rate_result,
+            'fit_result': payload.fit_result,
+        }
+        self.start_session_task(
+            "Guardando sesión...", self.finish_save_session,
+            save_session, file_path, payload.params, payload.df, self.df, analyses, None, self.file_path
+        )
+    
+    def open_session(self):
+        """Restaurar una sesión guardada (datos mapeados desde el disco)"""
+        path = QFileDialog.getExistingDirectory(self, "Abrir sesión")
+        if not path:
+            return
+        self.start_session_task(
+            "Abriendo sesión...", self.finish_open_session,
+            restore_session, path, 50, self.char_width()
+        )
+    
+    def start_session_task(self, message, on_finished, task, *args):
+        """Ejecutar un guardado o restauración de sesión en segundo plano"""
+        self.save_session_btn.setEnabled(False)
+        self.open_session_btn.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage(message)
+        
+        self.session_thread = SessionThread(task, *args)
+        self.session_thread.finished.connect(on_finished)
+        self.session_thread.error.connect(self.handle_session_error)
+        self.session_thread.start()
+    
+    def end_session_task(self):
+        self.save_session_btn.setEnabled(True)
+        self.open_session_btn.setEnabled(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+    
+    def finish_save_session(self, path):
+        """Informar la sesión guardada"""
+        self.end_session_task()
+        self.statusBar().showMessage(f"Sesión guardada: {Path(path).name}")
+    
+    def finish_open_session(self, result):
+        """Adoptar los datos, parámetros y resultados de una sesión restaurada"""
+        session, payload = result
+        self.end_session_task()
+        self.release_buffers()
+        self.forget_stage_results()
+        # Sin datos crudos guardados se reprocesa a partir de los procesados
+        self.df = session.raw_df if session.raw_df is not None else session.processed_df
+        self.history.reset(base=self.df)
+        self.update_history_controls()
+        self.validation = None
+        self.source_paths = None
+        self.file_path = session.source or "Sesión"
+        self.set_params(session.params)
+        
+        self.file_label.setText(Path(self.file_path).name)
+        self.file_label.setStyleSheet("color: green; font-weight: bold;")
+        self.display_raw_data()
+        self.display_processed_data(payload)
+        self.info_box.setText(
+            f"✓ Sesión del {session.created}: {len(payload.df)} filas × {len(payload.df.columns)} columnas"
+        )
+        self.statusBar().showMessage("Sesión restaurada")
+    
+    def handle_session_error(self, error_msg):
+        """Manejar errores al guardar o abrir una sesión"""
+        self.end_session_task()
+        QMessageBox.critical(self, "Error", f"Error en la sesión:\n{error_msg}")
+        self.statusBar().showMessage("Error en la sesión")
+    
+    def set_params(self, params):
+        """Volcar un diccionario de parámetros en los controles"""
+        self.lote_spinbox.setValue(int(params['lote_number']))
+        self.all_lotes_check.setChecked(params['all_lotes'])
+        self.coincidence_spinbox.setValue(params['coincidence_window'])
+        self.min_index_spinbox.setValue(int(params['min_index']))
+        self.max_index_spinbox.setValue(int(params['max_index']))
+        self.filter_edit.setText(params['filter_expression'])
+        self.pc_from_edit.setText(params['pc_time_from'])
+        self.pc_to_edit.setText(params['pc_time_to'])
+        self.remove_nulls_check.setChecked(params['remove_nulls'])
+        self.normalize_check.setChecked(params['normalize'])
+        self.calibrate_check.setChecked(params['calibrate_fine'])
+        self.gaps_check.setChecked(params['analyze_gaps'])
+        self.rates_check.setChecked(params['analyze_rates'])
+        self.fit_check.setChecked(params['fit_peaks'])
+        if hasattr(self, 'rate_window_combo'):
+            index = self.rate_window_combo.findData(params['rate_window'])
+            if index >= 0:
+                self.rate_window_combo.setCurrentIndex(index)
+    
     def handle_error(self, error_msg):
         """Manejar errores durante procesamiento"""
         self.progress_bar.setVisible(False)
@@ -544,12 +1462,51 @@ class AdvancedDataProcessorGUI(QMainWindow):
             "border-left: 4px solid #f44336; color: #c62828;"
         )
         self.statusBar().showMessage("Error durante procesamiento")
+    
+    def forget_stage_results(self):
+        """Descartar los resultados recordados de los datos anteriores"""
+        if self.stage_graph is not None:
+            self.stage_graph.clear()
+    
+    def release_buffers(self):
+        """Liberar los bloques compartidos de la ventana (las vistas en uso siguen válidas)"""
+        for buffer in (self.raw_buffer, self.processed_buffer):
+            if buffer is not None:
+                buffer.release()
+        self.raw_buffer = None
+        self.processed_buffer = None
+    
+    def closeEvent(self, event):
+        """Eliminar los bloques compartidos al cerrar la ventana"""
+        self.release_buffers()
+        super().closeEvent(event)
 
 
 def main():
+    profile = profile_requested(sys.argv)
+    monitor_stalls = monitor_requested(sys.argv)
+    profiler = StartupProfiler(_MODULE_START)
+    profiler.mark("Importaciones (Qt)", _IMPORTS_DONE)
+    
     app = QApplication(sys.argv)
+    profiler.mark("QApplication")
     window = AdvancedDataProcessorGUI()
+    profiler.mark("Construcción de ventana")
     window.show()
+    
+    if profile:
+        # Medir hasta que el bucle de eventos procesa la ventana visible
+        def finish_profile():
+            profiler.mark("Primer pintado")
+            print(profiler.report())
+            app.quit()
+        QTimer.singleShot(0, finish_profile)
+    
+    if monitor_stalls:
+        # Instrumentación: bloqueos del bucle de eventos, informe al salir
+        monitor = StallMonitor().start()
+        app.aboutToQuit.connect(lambda: (monitor.stop(), print(monitor.report())))
+    
     sys.exit(app.exec())
 
 
@@ -3,38 +3,47 @@ Data Processor GUI Application
 Interfaz gráfica para procesamiento de datos experimentales con ajuste de parámetros
 """
 
+import time
+_MODULE_START = time.perf_counter()
+
 import sys
 import os
-import pandas as pd
-import numpy as np
-from datetime import datetime
 from pathlib import Path
 
+# pandas y los módulos de análisis se importan en el primer uso
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QGroupBox, QLabel, QLineEdit, QPushButton, QSpinBox, QDoubleSpinBox,
     QComboBox, QTableWidget, QTableWidgetItem, QTabWidget, QFileDialog,
     QMessageBox, QProgressBar, QCheckBox, QSlider
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont, QColor
-from PyQt6.QtCharts import QChart, QChartView, QLineSeries
-from PyQt6.QtCore import QPointF
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QColor, QFontMetrics
+
+import config
+from startup_profile import StartupProfiler, profile_requested
+
+_IMPORTS_DONE = time.perf_counter()
 
 
 class DataProcessingThread(QThread):
     """Thread para procesar datos sin bloquear la interfaz"""
     progress = pyqtSignal(int)
-    finished = pyqtSignal(pd.DataFrame)
+    finished = pyqtSignal(object)
     error = pyqtSignal(str)
     
-    def __init__(self, df, params):
+    def __init__(self, df, params, max_rows=100, char_width=7):
         super().__init__()
         self.df = df
         self.params = params
+        self.max_rows = max_rows
+        self.char_width = char_width
     
     def run(self):
         try:
+            import pandas as pd
+            from result_rendering import build_payload
+            
             # Filtrar por número de lote si está especificado
             filtered_df = self.df.copy()
             
@@ -72,8 +81,13 @@ class DataProcessingThread(QThread):
                         errors='coerce'
                     )
                 
+                # Renderizar resultados fuera del hilo de la interfaz
+                payload = build_payload(
+                    filtered_df, self.params, self.max_rows, self.char_width,
+                    stats_style='list'
+                )
                 self.progress.emit(100)
-                self.finished.emit(filtered_df)
+                self.finished.emit(payload)
             else:
                 self.error.emit("No data found with the specified parameters")
                 
@@ -86,6 +100,7 @@ class DataProcessorGUI(QMainWindow):
         super().__init__()
         self.df = None
         self.processed_df = None
+        self.last_payload = None
         self.initUI()
     
     def initUI(self):
@@ -200,13 +215,39 @@ class DataProcessorGUI(QMainWindow):
         return group
     
     def create_results_panel(self):
-        """Crear panel de resultados y visualización"""
-        tab_widget = QTabWidget()
-        
-        # Tab 1: Datos crudos
-        raw_tab = QWidget()
-        raw_layout = QVBoxLayout(raw_tab)
-        
+        """Crear panel de resultados; cada pestaña se construye al verla por primera vez"""
+        self.tab_widget = QTabWidget()
+        
+        # Título de la pestaña -> (constructor, función que muestra resultados)
+        self.tab_specs = [
+            ("Datos Crudos", self.build_raw_tab, None),
+            ("Datos Procesados", self.build_processed_tab, self.show_processed_table),
+            ("Estadísticas", self.build_stats_tab, self.show_statistics),
+        ]
+        self.built_tabs = set()
+        
+        for title, _, _ in self.tab_specs:
+            page = QWidget()
+            QVBoxLayout(page)
+            self.tab_widget.addTab(page, title)
+        
+        self.tab_widget.currentChanged.connect(self.ensure_tab)
+        self.ensure_tab(0)
+        
+        return self.tab_widget
+    
+    def ensure_tab(self, index):
+        """Construir una pestaña la primera vez que se muestra"""
+        if index < 0 or index in self.built_tabs:
+            return
+        _, builder, show = self.tab_specs[index]
+        builder(self.tab_widget.widget(index).layout())
+        self.built_tabs.add(index)
+        if show is not None and self.last_payload is not None:
+            show(self.last_payload)
+    
+    def build_raw_tab(self, raw_layout):
+        """Tab 1: Datos crudos"""
         raw_title = QLabel("Datos Cargados")
         raw_title.setFont(self.title_font)
         raw_layout.addWidget(raw_title)
@@ -215,13 +256,9 @@ class DataProcessorGUI(QMainWindow):
         self.raw_table.setColumnCount(0)
         self.raw_table.setRowCount(0)
         raw_layout.addWidget(self.raw_table)
-        
-        tab_widget.addTab(raw_tab, "Datos Crudos")
-        
-        # Tab 2: Datos procesados
-        processed_tab = QWidget()
-        processed_layout = QVBoxLayout(processed_tab)
-        
+    
+    def build_processed_tab(self, processed_layout):
+        """Tab 2: Datos procesados"""
         processed_title = QLabel("Datos Procesados")
         processed_title.setFont(self.title_font)
         processed_layout.addWidget(processed_title)
@@ -230,13 +267,9 @@ class DataProcessorGUI(QMainWindow):
         self.processed_table.setColumnCount(0)
         self.processed_table.setRowCount(0)
         processed_layout.addWidget(self.processed_table)
-        
-        tab_widget.addTab(processed_tab, "Datos Procesados")
-        
-        # Tab 3: Estadísticas
-        stats_tab = QWidget()
-        stats_layout = QVBoxLayout(stats_tab)
-        
+    
+    def build_stats_tab(self, stats_layout):
+        """Tab 3: Estadísticas"""
         stats_title = QLabel("Estadísticas")
         stats_title.setFont(self.title_font)
         stats_layout.addWidget(stats_title)
@@ -245,39 +278,62 @@ class DataProcessorGUI(QMainWindow):
         self.stats_text.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.stats_text.setStyleSheet("background-color: #f5f5f5; padding: 10px; border-radius: 5px;")
         stats_layout.addWidget(self.stats_text)
-        
-        tab_widget.addTab(stats_tab, "Estadísticas")
-        
-        return tab_widget
     
     def load_file(self):
         """Cargar archivo de datos"""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Seleccionar archivo de datos", "", "CSV Files (*.csv);;All Files (*)"
+            self, "Seleccionar archivo de datos", "", "Datos (*.csv *.csv.gz *.csv.zst *.xlsx);;CSV Files (*.csv *.csv.gz *.csv.zst);;Excel Files (*.xlsx);;All Files (*)"
         )
         
         if file_path:
             try:
-                self.df = pd.read_csv(file_path, sep=';')
+                from tdc_core import read_data_file
+                self.df = read_data_file(file_path)
+                
+                invalid_rows = 0
+                if config.VALIDATE_ON_LOAD:
+                    from data_validation import apply_validation
+                    self.df, validation = apply_validation(self.df)
+                    invalid_rows = int(validation.invalid_mask.sum())
+                
                 self.file_label.setText(Path(file_path).name)
                 self.file_label.setStyleSheet("color: green; font-weight: bold;")
                 self.display_raw_data()
-                self.statusBar().showMessage(f"Archivo cargado: {Path(file_path).name}")
+                message = f"Archivo cargado: {Path(file_path).name}"
+                if invalid_rows:
+                    message += f" (⚠ {invalid_rows} filas no superan la validación)"
+                self.statusBar().showMessage(message)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"No se pudo cargar el archivo: {str(e)}")
                 self.statusBar().showMessage("Error al cargar archivo")
     
+    def char_width(self):
+        """Ancho medio de carácter de la fuente de las tablas (px)"""
+        return QFontMetrics(self.raw_table.font()).averageCharWidth()
+    
+    def populate_table(self, table, content):
+        """Volcar un TableContent en una tabla con un único repintado"""
+        table.setUpdatesEnabled(False)
+        try:
+            table.clearContents()
+            table.setColumnCount(len(content.headers))
+            table.setHorizontalHeaderLabels(content.headers)
+            table.setRowCount(len(content.cells))
+            
+            for i, row in enumerate(content.cells):
+                for j, text in enumerate(row):
+                    table.setItem(i, j, QTableWidgetItem(text))
+            
+            for j, width in enumerate(content.widths):
+                table.setColumnWidth(j, width)
+        finally:
+            table.setUpdatesEnabled(True)
+    
     def display_raw_data(self):
         """Mostrar datos crudos en tabla"""
         if self.df is not None:
-            self.raw_table.setColumnCount(len(self.df.columns))
-            self.raw_table.setHorizontalHeaderLabels(self.df.columns)
-            self.raw_table.setRowCount(min(100, len(self.df)))
-            
-            for i in range(min(100, len(self.df))):
-                for j, col in enumerate(self.df.columns):
-                    item = QTableWidgetItem(str(self.df.iloc[i, j]))
-                    self.raw_table.setItem(i, j, item)
+            from result_rendering import table_content
+            self.populate_table(self.raw_table, table_content(self.df, 100, self.char_width()))
             
             self.statusBar().showMessage(f"Datos cargados: {len(self.df)} filas, {len(self.df.columns)} columnas")
     
@@ -300,7 +356,7 @@ class DataProcessorGUI(QMainWindow):
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
-        self.thread = DataProcessingThread(self.df, params)
+        self.thread = DataProcessingThread(self.df, params, max_rows=100, char_width=self.char_width())
         self.thread.progress.connect(self.update_progress)
         self.thread.finished.connect(self.display_processed_data)
         self.thread.error.connect(self.handle_error)
@@ -310,53 +366,26 @@ class DataProcessorGUI(QMainWindow):
         """Actualizar barra de progreso"""
         self.progress_bar.setValue(value)
     
-    def display_processed_data(self, df):
-        """Mostrar datos procesados"""
+    def display_processed_data(self, payload):
+        """Mostrar datos procesados a partir del resultado renderizado"""
+        df = payload.df
         self.processed_df = df
+        self.last_payload = payload
         
-        # Mostrar tabla
-        self.processed_table.setColumnCount(len(df.columns))
-        self.processed_table.setHorizontalHeaderLabels(df.columns)
-        self.processed_table.setRowCount(min(100, len(df)))
-        
-        for i in range(min(100, len(df))):
-            for j, col in enumerate(df.columns):
-                item = QTableWidgetItem(str(df.iloc[i, j]))
-                self.processed_table.setItem(i, j, item)
-        
-        # Mostrar estadísticas
-        self.display_statistics(df)
+        for index, (_, _, show) in enumerate(self.tab_specs):
+            if show is not None and index in self.built_tabs:
+                show(payload)
         
         self.progress_bar.setVisible(False)
         self.statusBar().showMessage(f"Datos procesados: {len(df)} filas")
     
-    def display_statistics(self, df):
-        """Mostrar estadísticas de los datos procesados"""
-        stats_text = "<b>Información del Conjunto de Datos</b><br><br>"
-        stats_text += f"<b>Filas:</b> {len(df)}<br>"
-        stats_text += f"<b>Columnas:</b> {len(df.columns)}<br><br>"
-        
-        stats_text += "<b>Campos detectados:</b><br>"
-        for col in df.columns:
-            try:
-                numeric_df = pd.to_numeric(
-                    df[col].astype(str).str.replace(',', '.'),
-                    errors='coerce'
-                )
-                if numeric_df.notna().sum() > 0:
-                    stats_text += f"<br><b>{col}</b><br>"
-                    stats_text += f"&nbsp;&nbsp;Válidos: {numeric_df.notna().sum()}<br>"
-                    stats_text += f"&nbsp;&nbsp;Mínimo: {numeric_df.min():.2f}<br>"
-                    stats_text += f"&nbsp;&nbsp;Máximo: {numeric_df.max():.2f}<br>"
-                    stats_text += f"&nbsp;&nbsp;Promedio: {numeric_df.mean():.2f}<br>"
-            except:
-                pass
-        
-        # Timestamp info
-        if 'Timestamp_PC' in df.columns:
-            stats_text += f"<br><b>Timestamp (primer registro):</b> {df['Timestamp_PC'].iloc[0]}<br>"
-        
-        self.stats_text.setText(stats_text)
+    def show_processed_table(self, payload):
+        """Volcar la tabla de datos procesados"""
+        self.populate_table(self.processed_table, payload.table)
+    
+    def show_statistics(self, payload):
+        """Mostrar el HTML de estadísticas"""
+        self.stats_text.setText(payload.stats_html)
     
     def export_data(self):
         """Exportar datos procesados"""
@@ -365,15 +394,17 @@ class DataProcessorGUI(QMainWindow):
             return
         
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Guardar archivo", "", "CSV Files (*.csv);;Excel Files (*.xlsx)"
+            self, "Guardar archivo", "", "CSV Files (*.csv);;CSV comprimido (*.csv.gz *.csv.zst);;Excel Files (*.xlsx)"
         )
         
         if file_path:
             try:
                 if file_path.endswith('.xlsx'):
-                    self.processed_df.to_excel(file_path, index=False)
+                    from excel_io import write_excel
+                    write_excel(self.processed_df, file_path)
                 else:
-                    self.processed_df.to_csv(file_path, sep=';', index=False, decimal=',')
+                    from compressed_io import write_csv
+                    write_csv(self.processed_df, file_path)
                 
                 QMessageBox.information(self, "Éxito", f"Archivo exportado: {Path(file_path).name}")
                 self.statusBar().showMessage(f"Exportado: {Path(file_path).name}")
@@ -388,9 +419,24 @@ class DataProcessorGUI(QMainWindow):
 
 
 def main():
+    profile = profile_requested(sys.argv)
+    profiler = StartupProfiler(_MODULE_START)
+    profiler.mark("Importaciones (Qt)", _IMPORTS_DONE)
+    
     app = QApplication(sys.argv)
+    profiler.mark("QApplication")
     window = DataProcessorGUI()
+    profiler.mark("Construcción de ventana")
     window.show()
+    
+    if profile:
+        # Medir hasta que el bucle de eventos procesa la ventana visible
+        def finish_profile():
+            profiler.mark("Primer pintado")
+            print(profiler.report())
+            app.quit()
+        QTimer.singleShot(0, finish_profile)
+    
     sys.exit(app.exec())
 
 
@@ -0,0 +1,195 @@
+"""
+Validación de datos cargados
+Reglas vectorizadas que se ejecutan justo después de leer el archivo
+(config.VALIDATE_ON_LOAD): encabezado, índices no monótonos dentro de un lote,
+FineNS fuera del período grueso, t1_nS inconsistente con
+ResetCount * período + FineNS y celdas no numéricas.
+"""
+
+import numpy as np
+import pandas as pd
+
+import config
+from tdc_core import COARSE_PERIOD_NS, to_numeric
+
+
+# Descripción de cada regla (nombre -> texto para la interfaz)
+RULES = {
+    'T1_Index_no_monotono': 'T1_Index no creciente dentro del lote',
+    'T2_Index_no_monotono': 'T2_Index no creciente dentro del lote',
+    'T1_FineNS_fuera_rango': 'T1_FineNS fuera de [0, período)',
+    'T2_FineNS_fuera_rango': 'T2_FineNS fuera de [0, período)',
+    'T1_tiempo_inconsistente': 't1_nS ≠ T1_ResetCount·período + T1_FineNS',
+    'T2_tiempo_inconsistente': 't2 (2ª columna t1_nS) ≠ T2_ResetCount·período + T2_FineNS',
+    'valor_no_numerico': 'Celda no numérica en columna numérica',
+}
+
+# Columnas con el tiempo reconstruido por el adquisidor (la segunda t1_nS
+# del encabezado original es en realidad el tiempo del canal T2)
+TIME_COLUMNS = {'T1': 't1_nS', 'T2': 't1_nS.1'}
+
+
+class ValidationResult:
+    """Resultado de la validación: columnas faltantes y máscaras por regla"""
+
+    def __init__(self, n_rows, missing_columns, unexpected_columns, masks):
+        self.n_rows = n_rows
+        self.missing_columns = missing_columns
+        self.unexpected_columns = unexpected_columns
+        self.masks = masks
+
+    @property
+    def counts(self):
+        """Cantidad de filas que violan cada regla"""
+        return {rule: int(mask.sum()) for rule, mask in self.masks.items()}
+
+    @property
+    def invalid_mask(self):
+        """Filas que violan al menos una regla"""
+        invalid = np.zeros(self.n_rows, dtype=bool)
+        for mask in self.masks.values():
+            invalid |= mask
+        return invalid
+
+    @property
+    def is_valid(self):
+        return not self.missing_columns and not self.invalid_mask.any()
+
+    @property
+    def is_clean(self):
+        """Válido y sin columnas inesperadas (no hay nada que informar)"""
+        return self.is_valid and not self.unexpected_columns
+
+    def summary(self):
+        """Resumen en texto de las reglas violadas y de las columnas inesperadas"""
+        lines = []
+        if self.missing_columns:
+            lines.append(f"Columnas faltantes: {', '.join(self.missing_columns)}")
+        if self.unexpected_columns:
+            lines.append(f"Columnas inesperadas: {', '.join(self.unexpected_columns)}")
+        for rule, count in self.counts.items():
+            if count > 0:
+                lines.append(f"{RULES.get(rule, rule)}: {count} filas")
+        if not lines:
+            lines.append("Sin problemas detectados")
+        return "\n".join(lines)
+
+
+def check_header(columns):
+    """
+    Comparar el encabezado con config.EXPECTED_COLUMNS
+
+    Las columnas duplicadas renombradas por pandas (t1_nS.1), las columnas
+    vacías por el ';' final (Unnamed: N) y la columna de origen que agrega la
+    unión de archivos (config.MERGE_SOURCE_COLUMN) no se consideran inesperadas.
+    Las columnas inesperadas se informan pero no invalidan los datos.
+
+    Returns:
+        tuple: (columnas faltantes, columnas inesperadas)
+    """
+    columns = [str(col) for col in columns]
+    missing = [col for col in config.EXPECTED_COLUMNS if col not in columns]
+    unexpected = [
+        col for col in columns
+        if col not in config.EXPECTED_COLUMNS
+        and col.split('.')[0] not in config.EXPECTED_COLUMNS
+        and not col.startswith('Unnamed:')
+        and col != config.MERGE_SOURCE_COLUMN
+    ]
+    return missing, unexpected
+
+
+def non_monotonic_mask(index, lote):
+    """
+    Filas cuyo índice no supera al anterior válido del mismo lote
+
+    Args:
+        index (np.ndarray): Índices (float, NaN permitido)
+        lote (np.ndarray): Número de lote de cada fila
+
+    Returns:
+        np.ndarray: Máscara booleana por fila
+    """
+    mask = np.zeros(len(index), dtype=bool)
+    positions = np.flatnonzero(np.isfinite(index) & np.isfinite(lote))
+    if len(positions) < 2:
+        return mask
+    idx = index[positions]
+    same_lote = lote[positions][1:] == lote[positions][:-1]
+    mask[positions[1:]] = same_lote & (idx[1:] <= idx[:-1])
+    return mask
+
+
+def validate_dataframe(df, check_numeric=None, tolerance_ns=None):
+    """
+    Ejecutar todas las reglas de validación
+
+    Args:
+        df (pd.DataFrame): Datos recién leídos
+        check_numeric (bool): Revisar celdas no numéricas; por defecto
+            config.VALIDATE_NUMERIC_COLUMNS
+        tolerance_ns (float): Diferencia admitida para la consistencia de t1_nS
+
+    Returns:
+        ValidationResult: Conteos y máscaras por regla
+    """
+    if check_numeric is None:
+        check_numeric = config.VALIDATE_NUMERIC_COLUMNS
+    if tolerance_ns is None:
+        tolerance_ns = config.VALIDATION_TIME_TOLERANCE_NS
+
+    missing, unexpected = check_header(df.columns)
+    n_rows = len(df)
+    masks = {}
+
+    # Conversión única de cada columna utilizada por las reglas
+    numeric = {}
+    for col in ['Num_Lote', 'T1_Index', 'T2_Index'] + config.NUMERIC_COLUMNS + list(TIME_COLUMNS.values()):
+        if col in df.columns:
+            numeric[col] = to_numeric(df[col]).to_numpy()
+
+    if 'Num_Lote' in numeric:
+        for channel in ('T1', 'T2'):
+            column = f'{channel}_Index'
+            if column in numeric:
+                masks[f'{channel}_Index_no_monotono'] = non_monotonic_mask(numeric[column], numeric['Num_Lote'])
+
+    for channel in ('T1', 'T2'):
+        fine = numeric.get(f'{channel}_FineNS')
+        if fine is None:
+            continue
+        with np.errstate(invalid='ignore'):
+            masks[f'{channel}_FineNS_fuera_rango'] = (fine < 0) | (fine >= COARSE_PERIOD_NS)
+
+        reset = numeric.get(f'{channel}_ResetCount')
+        stored = numeric.get(TIME_COLUMNS[channel])
+        if reset is not None and stored is not None:
+            expected = reset * COARSE_PERIOD_NS + fine
+            with np.errstate(invalid='ignore'):
+                masks[f'{channel}_tiempo_inconsistente'] = np.abs(stored - expected) > tolerance_ns
+
+    if check_numeric:
+        bad = np.zeros(n_rows, dtype=bool)
+        for col in numeric:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                # Celda con contenido que no se pudo convertir
+                bad |= np.isnan(numeric[col]) & df[col].notna().to_numpy()
+        masks['valor_no_numerico'] = bad
+
+    return ValidationResult(n_rows, missing, unexpected, masks)
+
+
+def apply_validation(df, result=None, remove_invalid=None):
+    """
+    Validar y, si config.REMOVE_INVALID_ROWS, descartar las filas inválidas
+
+    Returns:
+        tuple: (DataFrame resultante, ValidationResult)
+    """
+    if result is None:
+        result = validate_dataframe(df)
+    if remove_invalid is None:
+        remove_invalid = config.REMOVE_INVALID_ROWS
+    if remove_invalid:
+        df = df[~result.invalid_mask]
+    return df, result
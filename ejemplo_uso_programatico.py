@@ -7,6 +7,27 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+import config
+from analysis_service import ServiceClient, ServiceError
+from compressed_io import write_csv
+from data_validation import apply_validation
+from excel_io import write_excel
+from file_merge import FileMerger
+from filter_expression import filter_mask
+from fine_calibration import FineCalibration, load_calibration
+from gap_analysis import analyze_gaps
+from lote_analysis import analyze_lotes, match_coincidences
+from parquet_archive import archive_run
+from pc_time import index_pc_time, pc_hardware_correlation
+from peak_fit import analyze_peaks
+from pipeline import ANALYSIS_STAGES, complete_params, pc_time_mask, processing_graph
+from rate_analysis import analyze_rates
+from report_generator import compute_aggregates, write_report
+from run_comparison import compare_runs, comparison_html, comparison_summary
+from session_store import load_session, save_session
+from tdc_core import read_data_file
+from time_sort import is_time_sorted, sort_by_time
+
 class DataProcessor:
     """Clase para procesar datos experimentales"""
     
@@ -15,20 +36,36 @@ class DataProcessor:
         Inicializar procesador de datos
         
         Args:
-            csv_file (str): Ruta al archivo CSV
+            csv_file (str | list): Ruta al archivo CSV, o lista de archivos de
+                un mismo run que se fusionan ordenados por tiempo
             separator (str): Separador de columnas
         """
         self.csv_file = csv_file
         self.separator = separator
         self.df = None
         self.processed_df = None
+        self.validation = None
     
     def load_data(self):
         """Cargar datos desde archivo CSV"""
         try:
-            self.df = pd.read_csv(self.csv_file, sep=self.separator)
-            print(f"✓ Archivo cargado: {Path(self.csv_file).name}")
+            if isinstance(self.csv_file, (list, tuple)):
+                merger = FileMerger(self.csv_file, sep=self.separator)
+                self.df = merger.to_dataframe()
+                print(f"✓ {len(self.csv_file)} archivos fusionados por tiempo")
+                if merger.out_of_order:
+                    print(f"⚠ Filas fuera de orden: {merger.out_of_order}")
+            else:
+                self.df = read_data_file(self.csv_file, sep=self.separator)
+                print(f"✓ Archivo cargado: {Path(self.csv_file).name}")
             print(f"  Filas: {len(self.df)}, Columnas: {len(self.df.columns)}")
+            
+            if config.VALIDATE_ON_LOAD:
+                self.df, self.validation = apply_validation(self.df)
+                if not self.validation.is_clean:
+                    print(f"⚠ Validación:\n{self.validation.summary()}")
+            if config.PARSE_PC_TIME_ON_LOAD:
+                index_pc_time(self.df)
             return True
         except Exception as e:
             print(f"❌ Error al cargar archivo: {str(e)}")
@@ -71,6 +108,56 @@ class DataProcessor:
         
         print(f"✓ Filtrado por rango: {len(self.processed_df)} registros")
     
+    def filter_by_expression(self, expression):
+        """
+        Filtrar datos con una expresión libre sobre las columnas
+        
+        Args:
+            expression (str): Expresión, p. ej.
+                "T1_FineNS > 20 and T2_ResetCount - T1_ResetCount < 500"
+        """
+        if self.processed_df is None:
+            self.processed_df = self.df.copy()
+        
+        self.processed_df = self.processed_df[filter_mask(self.processed_df, expression)]
+        print(f"✓ Filtrado por expresión: {len(self.processed_df)} registros")
+    
+    def filter_by_pc_time(self, start='', end=''):
+        """
+        Filtrar datos por hora del PC (Timestamp_PC)
+        
+        Args:
+            start (str): Hora inicial 'HH:MM:SS.mmm' ('' = desde el principio)
+            end (str): Hora final ('' = hasta el final); si es anterior a
+                start se toma como del día siguiente (cruce de medianoche)
+        """
+        if self.processed_df is None:
+            self.processed_df = self.df.copy()
+        
+        self.processed_df = self.processed_df[pc_time_mask(self.processed_df, start, end)]
+        print(f"✓ Filtrado por hora del PC: {len(self.processed_df)} registros")
+    
+    def sort_by_time(self, channel=None):
+        """
+        Ordenar los datos por tiempo reconstruido (archivos reiniciados o de
+        varias placas); para archivos que no entran en memoria ver time_sort.py
+        
+        Args:
+            channel (str): Canal del tiempo ('T1' o 'T2'; el otro si falta)
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        if is_time_sorted(data, channel):
+            print("✓ Los datos ya están ordenados por tiempo")
+            self.processed_df = data
+        else:
+            self.processed_df = sort_by_time(data, channel)
+            print(f"✓ Ordenado por tiempo: {len(self.processed_df)} filas")
+        return self.processed_df
+    
     def remove_empty_rows(self):
         """Eliminar filas vacías"""
         if self.processed_df is None:
@@ -115,6 +202,32 @@ class DataProcessor:
         
         print(f"✓ Formato decimal convertido")
     
+    def calibrate_fine(self, calibration_file=None, save_to=None):
+        """
+        Corregir FineNS con una tabla de densidad de códigos
+        
+        Agrega columnas T1/T2_FineNS_cal y T1/T2_ns_cal.
+        
+        Args:
+            calibration_file (str): Tabla .npz existente; si no se indica se
+                construye con los datos actuales
+            save_to (str): Ruta .npz donde guardar la tabla para otros archivos
+        """
+        if self.processed_df is None:
+            self.processed_df = self.df.copy()
+        
+        if calibration_file:
+            calibration = load_calibration(calibration_file)
+        else:
+            calibration = FineCalibration.from_dataframe(self.processed_df)
+        
+        self.processed_df = calibration.apply(self.processed_df)
+        if save_to:
+            calibration.save(save_to)
+            print(f"✓ Tabla de calibración guardada: {save_to}")
+        print(f"✓ FineNS calibrado: canales {', '.join(calibration.luts)}")
+        return calibration
+    
     def calculate_statistics(self):
         """Calcular estadísticas descriptivas"""
         if self.processed_df is None:
@@ -137,19 +250,246 @@ class DataProcessor:
         
         return stats
     
+    def analyze_all_lotes(self, window_ns=None):
+        """
+        Calcular estadísticas, coincidencias e histogramas de todos los lotes
+        
+        Args:
+            window_ns (float): Ventana |T2 - T1| de coincidencia (ns)
+        
+        Returns:
+            dict: Resultado de lote_analysis.analyze_lotes
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        result = analyze_lotes(data, window_ns=window_ns)
+        print(f"✓ Análisis por lote: {len(result['summary'])} lotes")
+        return result
+    
+    def match_coincidences(self, window_ns=None):
+        """
+        Emparejar hits T1 y T2 por tiempo (también entre filas distintas)
+        
+        Args:
+            window_ns (float): Ventana de coincidencia (ns)
+        
+        Returns:
+            pd.DataFrame: Hits, pares y retardo T2 - T1 por lote
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        result = match_coincidences(data, window_ns=window_ns)
+        print(f"✓ Pares T1/T2: {int(result['Pares'].sum())} "
+              f"({int(result['Pares misma fila'].sum())} en la misma fila)")
+        return result
+    
+    def analyze_gaps(self, threshold_ns=None):
+        """
+        Detectar índices faltantes, duplicados y tiempos muertos por lote
+        
+        Args:
+            threshold_ns (float): Umbral fijo de tiempo muerto (None = relativo a la mediana)
+        
+        Returns:
+            dict: Resultado de gap_analysis.analyze_gaps
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        result = analyze_gaps(data, threshold_ns=threshold_ns)
+        print(f"✓ Huecos: {len(result['events'])} tramos detectados")
+        return result
+    
+    def analyze_rates(self, window_ns=None):
+        """
+        Tasa de hits por ventana, intervalos entre hits y tiempo muerto
+        
+        Args:
+            window_ns (float): Ventana de tiempo en ns (por defecto config.RATE_WINDOW_NS)
+        
+        Returns:
+            dict: Resultado de rate_analysis.analyze_rates; sus RateHistogram
+            permiten consultar otras ventanas sin releer los datos
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        result = analyze_rates(data, window_ns=window_ns)
+        for row in result['summary'].itertuples(index=False):
+            print(f"✓ {row.Canal}: {row.Hits} hits, tasa media {row[4]:.2f} Hz")
+        return result
+    
+    def fit_peaks(self, window_ns=None):
+        """
+        Ajustar el pico T2 - T1 de cada lote (Gauss y Gauss + constante)
+        
+        Args:
+            window_ns (float): Ventana |T2 - T1| de los pares ajustados
+                (por defecto config.COINCIDENCE_WINDOW_NS)
+        
+        Returns:
+            pd.DataFrame: Una fila por lote y modelo con μ, σ, FWHM y errores
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        summary = analyze_peaks(data, window_ns=window_ns)['summary']
+        fitted = summary[summary['Convergió']]
+        for row in fitted.itertuples(index=False):
+            print(f"✓ Lote {row.Num_Lote} · {row.Modelo}: σ = {row[6]:.4g} ns, FWHM = {row[8]:.4g} ns")
+        if len(fitted) == 0:
+            print("⚠️ Ningún lote con pares suficientes dentro de la ventana")
+        return summary
+    
+    def correlate_pc_time(self, channel='T1'):
+        """
+        Relacionar la hora del PC con el tiempo del hardware
+        
+        Args:
+            channel (str): Canal del tiempo de hardware ('T1' o 'T2')
+        
+        Returns:
+            dict: Lotes del PC, offset, deriva (ppm) y residuo del ajuste
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        result = pc_hardware_correlation(data, channel=channel)
+        print(f"✓ Lotes del PC: {len(result['batches'])}")
+        if np.isfinite(result['drift_ppm']):
+            print(f"  Deriva del reloj del PC: {result['drift_ppm']:.1f} ppm")
+            print(f"  Residuo: {result['residual_ms']:.1f} ms")
+        else:
+            print("⚠️ Se necesitan al menos dos horas del PC distintas para estimar la deriva")
+        return result
+    
+    def generate_report(self, output_file, params=None):
+        """
+        Generar reporte HTML o PDF (según la extensión) del procesamiento
+        
+        Args:
+            output_file (str): Ruta del reporte (.html o .pdf)
+            params (dict): Parámetros aplicados, para dejarlos registrados
+        """
+        if self.processed_df is None:
+            print("❌ Primero procesa los datos")
+            return
+        
+        try:
+            aggregates = compute_aggregates(self.processed_df, params, source=self.csv_file)
+            write_report(aggregates, output_file)
+            print(f"✓ Reporte generado: {output_file}")
+        except Exception as e:
+            print(f"❌ Error al generar reporte: {str(e)}")
+    
+    def compare_with(self, other_runs, params=None, output_file=None):
+        """
+        Comparar los datos procesados (referencia) con otros runs
+        
+        Los otros runs se reducen a sus agregados uno por vez (desde el caché
+        si existen), sin mantener sus datos crudos en memoria.
+        
+        Args:
+            other_runs (list): Archivos CSV, agregados .npz o sesiones
+            params (dict): Parámetros con que procesar los archivos CSV
+            output_file (str): Reporte HTML opcional
+        
+        Returns:
+            dict: Resultado de run_comparison.compare_runs
+        """
+        data = self.processed_df if self.processed_df is not None else self.df
+        if data is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        reference = compute_aggregates(data, params, source=self.csv_file)
+        result = compare_runs([reference] + list(other_runs), params)
+        for line in comparison_summary(result):
+            print(f"  {line}")
+        if output_file:
+            Path(output_file).write_text(comparison_html(result), encoding='utf-8')
+            print(f"✓ Comparación: {output_file}")
+        return result
+    
+    def process(self, params=None, export_file=None):
+        """
+        Procesar con el grafo de etapas: filtro, estadísticas, análisis pedidos
+        en params y exportación opcional, las etapas independientes a la vez
+        
+        Args:
+            params (dict): Parámetros (ver pipeline.DEFAULT_PARAMS)
+            export_file (str): Archivo .csv o .xlsx a escribir (opcional)
+        
+        Returns:
+            dict: Resultado de cada etapa ('filter', 'stats', 'histograms',
+                  'gaps', 'rates', 'fits', 'export')
+        """
+        if self.df is None:
+            print("❌ Primero debes cargar datos con load_data()")
+            return None
+        
+        graph = processing_graph()
+        results = graph.run(
+            ['stats', *ANALYSIS_STAGES.values(), 'export'],
+            complete_params(dict(params or {}, export_path=export_file)),
+            values={'validate': self.df}
+        )
+        self.processed_df = results['filter']
+        print(f"✓ Procesado por etapas: {len(self.processed_df)} filas")
+        print(graph.timing_report())
+        if export_file:
+            print(f"✓ Exportado a: {export_file}")
+        return results
+    
+    def query_service(self, kind, params=None, url=None, **options):
+        """
+        Consultar el servicio de análisis sobre el mismo archivo, sin leerlo aquí
+        
+        Args:
+            kind (str): 'load', 'filter', 'stats', 'histogram' o 'export'
+            params (dict): Parámetros (ver pipeline.DEFAULT_PARAMS)
+            url (str): Dirección del servicio (por defecto config.SERVICE_URL)
+            **options: Opciones de la consulta (column, bins, path, ...)
+        
+        Returns:
+            dict: Respuesta del servicio, o None si falló
+        """
+        try:
+            answer = ServiceClient(url).query(kind, self.csv_file, params, **options)
+            print(f"✓ Consulta '{kind}' respondida por el servicio")
+            return answer
+        except ServiceError as e:
+            print(f"❌ {str(e)}")
+            return None
+    
     def export_csv(self, output_file):
         """
         Exportar datos a CSV
         
         Args:
-            output_file (str): Ruta del archivo de salida
+            output_file (str): Ruta del archivo de salida (.csv.gz / .csv.zst
+                se escriben comprimidos)
         """
         if self.processed_df is None:
             print("❌ Primero procesa los datos")
             return
         
         try:
-            self.processed_df.to_csv(output_file, sep=';', index=False, decimal=',')
+            write_csv(self.processed_df, output_file)
             print(f"✓ Exportado a: {output_file}")
         except Exception as e:
             print(f"❌ Error al exportar: {str(e)}")
@@ -166,11 +506,70 @@ class DataProcessor:
             return
         
         try:
-            self.processed_df.to_excel(output_file, index=False, engine='openpyxl')
+            write_excel(self.processed_df, output_file)
             print(f"✓ Exportado a: {output_file}")
         except Exception as e:
             print(f"❌ Error al exportar: {str(e)}")
     
+    def archive_parquet(self, root, run=None, date=None, params=None):
+        """
+        Agregar los datos procesados a un archivo Parquet particionado por
+        fecha / run / lote (no reescribe las particiones existentes)
+        
+        Args:
+            root (str): Carpeta raíz del dataset
+            run (str): Nombre del run (por defecto el del archivo CSV)
+            date (str): Fecha 'YYYY-MM-DD' (por defecto la del archivo CSV)
+            params (dict): Parámetros aplicados, para dejarlos registrados
+        """
+        if self.processed_df is None:
+            print("❌ Primero procesa los datos")
+            return None
+        
+        try:
+            path = archive_run(
+                self.processed_df, root, run=run, date=date, source=self.csv_file, params=params
+            )
+            print(f"✓ Archivado en: {path}")
+            return path
+        except (ImportError, FileExistsError) as e:
+            print(f"❌ {str(e)}")
+            return None
+    
+    def save_session(self, path, params=None):
+        """
+        Guardar datos crudos, procesados y agregados para restaurarlos sin releer el CSV
+        
+        Args:
+            path (str): Carpeta de la sesión (se agrega config.SESSION_SUFFIX)
+            params (dict): Parámetros aplicados, para dejarlos registrados
+        """
+        if self.processed_df is None:
+            print("❌ Primero procesa los datos")
+            return None
+        
+        try:
+            folder = save_session(path, params or {}, self.processed_df, raw_df=self.df, source=self.csv_file)
+            print(f"✓ Sesión guardada en: {folder}")
+            return folder
+        except Exception as e:
+            print(f"❌ Error al guardar la sesión: {str(e)}")
+            return None
+    
+    def load_session(self, path):
+        """
+        Restaurar una sesión guardada (las columnas quedan mapeadas desde el disco)
+        
+        Returns:
+            Session: Parámetros, datos, análisis y agregados de la sesión
+        """
+        session = load_session(path)
+        self.processed_df = session.processed_df
+        if session.raw_df is not None:
+            self.df = session.raw_df
+        print(f"✓ Sesión del {session.created}: {len(self.processed_df)} filas procesadas")
+        return session
+    
     def get_summary(self):
         """Obtener resumen del procesamiento"""
         if self.processed_df is None:
@@ -283,11 +682,27 @@ Métodos disponibles:
     • load_data()
     • filter_by_lote(lote_number)
     • filter_by_index_range(min, max)
+    • filter_by_expression(expression)
+    • filter_by_pc_time(start, end)
+    • sort_by_time(channel)
     • remove_empty_rows()
     • normalize_numeric_columns()
     • convert_decimal_format()
     • calculate_statistics()
+    • calibrate_fine(calibration_file, save_to)
+    • analyze_all_lotes(window_ns)
+    • match_coincidences(window_ns)
+    • analyze_gaps(threshold_ns)
+    • analyze_rates(window_ns)
+    • fit_peaks(window_ns)
+    • correlate_pc_time(channel)
+    • generate_report(file)
+    • compare_with(other_runs, params, output_file)
+    • process(params, export_file)
+    • query_service(kind, params, url, **options)
     • export_csv(file)
     • export_excel(file)
+    • archive_parquet(root, run, date, params)
+    • save_session(path, params) / load_session(path)
     • get_summary()
     """)
@@ -0,0 +1,179 @@
+"""
+Lectura y escritura de libros Excel (.xlsx)
+Reabre los archivos exportados con export_excel / "Exportar Excel" como datos
+de entrada, con el mismo resultado que la lectura de un CSV.
+
+La lectura usa openpyxl en modo de solo lectura (el XML de cada hoja se
+recorre en streaming, sin construir objetos Cell) y convierte las filas por
+bloques de config.READ_CHUNK_ROWS: los valores de un bloque se transponen a
+columnas tipadas (int64 / float64 / texto) y se descartan antes de leer el
+siguiente, de modo que nunca hay más de un bloque de valores por celda en
+memoria. Las columnas de texto con números en coma decimal (t1_nS) se
+convierten como en la lectura del CSV.
+
+Excel admite a lo sumo 1.048.576 filas por hoja: write_excel reparte los
+datos en hojas consecutivas con el mismo encabezado (config.EXCEL_SHEET_ROWS)
+y la lectura las vuelve a unir.
+"""
+
+import os
+from itertools import islice
+
+import pandas as pd
+
+import config
+from tdc_core import to_numeric
+
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def is_excel_file(path):
+    """Indicar si path es un libro Excel (según la extensión)"""
+    return isinstance(path, (str, os.PathLike)) and str(path).lower().endswith(EXCEL_EXTENSIONS)
+
+
+def _trim_header(header):
+    """Encabezado sin las celdas vacías del final (dimensiones de hoja sobrantes)"""
+    header = list(header)
+    while header and header[-1] is None:
+        header.pop()
+    return tuple(header)
+
+
+def _block_frame(rows, header, start):
+    """
+    Convertir un bloque de filas (tuplas de valores) en columnas tipadas
+
+    Args:
+        rows (list): Tuplas de valores de openpyxl
+        header (tuple): Nombres de columna
+        start (int): Número de la primera fila (índice continuo entre bloques)
+
+    Returns:
+        pd.DataFrame: Bloque con índice start..start+n-1
+    """
+    width = len(header)
+    if any(len(row) != width for row in rows):
+        rows = [tuple(row[:width]) + (None,) * (width - len(row)) for row in rows]
+    block = pd.DataFrame.from_records(rows, columns=list(header), coerce_float=True)
+    # Filas totalmente vacías (la lectura del CSV también las omite)
+    block = block.dropna(how='all')
+
+    for col in block.columns:
+        values = block[col]
+        if pd.api.types.is_numeric_dtype(values):
+            continue
+        present = int(values.notna().sum())
+        if present == 0:
+            block[col] = values.astype('float64')
+            continue
+        # Texto que es número (coma decimal o números mezclados con texto)
+        numbers = to_numeric(values)
+        if int(numbers.notna().sum()) == present:
+            block[col] = numbers
+    block.index = pd.RangeIndex(start, start + len(block))
+    return block
+
+
+class ExcelReader:
+    """Lectura por bloques de un libro exportado, hoja tras hoja"""
+
+    def __init__(self, path, chunksize=None):
+        """
+        Args:
+            path (str): Libro .xlsx (o archivo abierto en modo binario)
+            chunksize (int): Filas por bloque (config.READ_CHUNK_ROWS)
+        """
+        self.path = path
+        self.chunksize = chunksize or config.READ_CHUNK_ROWS
+        self.total_rows = 0
+        self.rows_read = 0
+        self.sheets_read = []
+
+    @property
+    def fraction(self):
+        """Fracción leída (0-1) según las filas declaradas en las hojas"""
+        return min(self.rows_read / self.total_rows, 1.0) if self.total_rows else 0.0
+
+    def blocks(self, first_rows=None):
+        """
+        Leer las hojas con el encabezado de la primera como una sola tabla
+
+        Las hojas con otro encabezado (p. ej. un resumen agregado a mano) se
+        ignoran.
+
+        Args:
+            first_rows (int): Filas del primer bloque (por defecto chunksize)
+
+        Yields:
+            pd.DataFrame: Bloques consecutivos
+        """
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            self.total_rows = sum(max((sheet.max_row or 1) - 1, 0) for sheet in workbook.worksheets)
+            self.rows_read = 0
+            self.sheets_read = []
+            header = None
+            size = first_rows or self.chunksize
+            position = 0
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                sheet_header = next(rows, None)
+                if sheet_header is None:
+                    continue
+                sheet_header = _trim_header(sheet_header)
+                if header is None:
+                    header = sheet_header
+                elif sheet_header != header:
+                    continue
+                self.sheets_read.append(sheet.title)
+
+                while True:
+                    values = list(islice(rows, size))
+                    if not values:
+                        break
+                    self.rows_read += len(values)
+                    block = _block_frame(values, header, position)
+                    del values
+                    position += len(block)
+                    size = self.chunksize
+                    yield block
+        finally:
+            workbook.close()
+
+    def read(self):
+        """Libro completo como un DataFrame"""
+        blocks = list(self.blocks())
+        if not blocks:
+            return pd.DataFrame()
+        return pd.concat(blocks) if len(blocks) > 1 else blocks[0]
+
+
+def read_excel_file(path):
+    """Atajo: ExcelReader(path).read()"""
+    return ExcelReader(path).read()
+
+
+def write_excel(df, path, sheet_rows=None):
+    """
+    Exportar a Excel repartiendo las filas en hojas con el mismo encabezado
+
+    Args:
+        df (pd.DataFrame): Datos a exportar
+        path (str): Archivo .xlsx
+        sheet_rows (int): Filas de datos por hoja (config.EXCEL_SHEET_ROWS)
+
+    Returns:
+        int: Hojas escritas
+    """
+    sheet_rows = sheet_rows or config.EXCEL_SHEET_ROWS
+    starts = range(0, len(df), sheet_rows) if len(df) else [0]
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for number, start in enumerate(starts, start=1):
+            df.iloc[start:start + sheet_rows].to_excel(
+                writer, sheet_name=f'Sheet{number}', index=False
+            )
+    return len(starts)
@@ -0,0 +1,215 @@
+"""
+Fusión ordenada en el tiempo de varios archivos de adquisición
+Une N archivos (uno por lote o por reinicio) en un único flujo de hits
+ordenado por el tiempo reconstruido (ResetCount * período + FineNS).
+
+Cada archivo se lee por bloques con tdc_core.read_data_chunks y se abre
+recién cuando hace falta su primer bloque. Un heap guarda, por archivo, el
+último tiempo del bloque en memoria: todas las filas con tiempo menor o igual
+al mínimo de esos valores ya pueden emitirse en orden, de modo que la memoria
+queda acotada a un bloque por archivo.
+
+Se supone que cada archivo está ordenado en el tiempo; las filas que llegan
+más tarde que otras ya emitidas (p. ej. un contador reiniciado) se emiten
+igual y se cuentan en FileMerger.out_of_order.
+"""
+
+import heapq
+import os
+
+import numpy as np
+import pandas as pd
+
+import config
+from compressed_io import input_position, open_input, open_output
+from tdc_core import absolute_time_ns, read_data_chunks
+
+
+def merge_keys(chunk, channel=None):
+    """
+    Tiempo usado para ordenar cada fila
+
+    Args:
+        chunk (pd.DataFrame): Bloque de datos
+        channel (str): Canal principal (por defecto config.MERGE_TIME_CHANNEL);
+            las filas sin ese canal usan el otro
+
+    Returns:
+        np.ndarray: Tiempo en ns (NaN si la fila no tiene ningún tiempo)
+    """
+    channel = channel or config.MERGE_TIME_CHANNEL
+    other = 'T2' if channel == 'T1' else 'T1'
+    keys = absolute_time_ns(chunk, channel)
+    missing = ~np.isfinite(keys)
+    if missing.any():
+        keys[missing] = absolute_time_ns(chunk, other)[missing]
+    return keys
+
+
+class _Source:
+    """Archivo de entrada leído por bloques"""
+
+    def __init__(self, number, path, chunksize, sep):
+        self.number = number
+        self.path = path
+        self.chunksize = chunksize
+        self.sep = sep
+        self._chunks = None
+        self._handle = None
+        self._last_key = -np.inf
+        self.rows = None
+        self.keys = None
+        self.exhausted = False
+
+    @property
+    def empty(self):
+        return self.rows is None or len(self.rows) == 0
+
+    @property
+    def bytes_read(self):
+        """Bytes del archivo ya consumidos por el lector"""
+        if self.exhausted:
+            return os.path.getsize(self.path)
+        return input_position(self._handle) if self._handle is not None else 0
+
+    def fill(self):
+        """Cargar el siguiente bloque con filas si el actual se agotó"""
+        while self.empty and not self.exhausted:
+            if self._chunks is None:
+                self._handle = open_input(self.path)
+                self._chunks = read_data_chunks(self._handle, self.chunksize, self.sep)
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.exhausted = True
+                self.rows = self.keys = None
+                self._handle.close()
+                return
+
+            keys = merge_keys(chunk)
+            # Filas sin tiempo: conservan la posición de la fila anterior
+            keys = pd.Series(keys).ffill().fillna(self._last_key).to_numpy()
+            order = np.argsort(keys, kind='stable')
+            self.rows = chunk.iloc[order]
+            self.keys = keys[order]
+            if len(keys):
+                self._last_key = self.keys[-1]
+
+    def take_until(self, frontier):
+        """Separar las filas con tiempo <= frontier"""
+        cut = int(np.searchsorted(self.keys, frontier, side='right'))
+        rows, keys = self.rows.iloc[:cut], self.keys[:cut]
+        self.rows, self.keys = self.rows.iloc[cut:], self.keys[cut:]
+        return rows, keys
+
+
+class FileMerger:
+    """Fusión k-way de archivos en bloques ordenados por tiempo"""
+
+    def __init__(self, paths, chunksize=None, sep=None, source_column=None):
+        """
+        Args:
+            paths (list): Archivos a fusionar
+            chunksize (int): Filas por bloque de lectura (config.READ_CHUNK_ROWS)
+            sep (str): Separador de columnas
+            source_column (str): Columna con el número de archivo de origen
+                (por defecto config.MERGE_SOURCE_COLUMN; None no la agrega)
+        """
+        self.paths = list(paths)
+        self.chunksize = chunksize or config.READ_CHUNK_ROWS
+        self.sep = sep
+        self.source_column = source_column if source_column is not None else config.MERGE_SOURCE_COLUMN
+        self.rows_out = 0
+        self.out_of_order = 0
+        self._sources = []
+
+    @property
+    def total_bytes(self):
+        return sum(os.path.getsize(path) for path in self.paths)
+
+    @property
+    def bytes_read(self):
+        """Bytes leídos entre todos los archivos (para barras de avance)"""
+        return sum(source.bytes_read for source in self._sources)
+
+    def chunks(self):
+        """
+        Generar la secuencia fusionada
+
+        Yields:
+            pd.DataFrame: Bloques consecutivos ordenados por tiempo
+        """
+        self.rows_out = 0
+        self.out_of_order = 0
+        last_emitted = -np.inf
+
+        sources = [_Source(k, path, self.chunksize, self.sep) for k, path in enumerate(self.paths)]
+        self._sources = sources
+        heap = []
+        for source in sources:
+            source.fill()
+            if not source.empty:
+                heap.append((source.keys[-1], source.number))
+        heapq.heapify(heap)
+
+        while heap:
+            # Ningún archivo puede aportar ya un tiempo menor que el final
+            # del bloque que termina primero
+            frontier = heap[0][0]
+            parts, keys = [], []
+            for source in sources:
+                if source.empty:
+                    continue
+                rows, rows_keys = source.take_until(frontier)
+                if len(rows) == 0:
+                    continue
+                if self.source_column:
+                    rows = rows.assign(**{self.source_column: source.number})
+                parts.append(rows)
+                keys.append(rows_keys)
+
+            if parts:
+                keys = np.concatenate(keys)
+                order = np.argsort(keys, kind='stable')
+                block = pd.concat(parts, ignore_index=True).iloc[order]
+                self.out_of_order += int(np.count_nonzero(keys < last_emitted))
+                last_emitted = max(last_emitted, keys[order[-1]])
+                block.index = pd.RangeIndex(self.rows_out, self.rows_out + len(block))
+                self.rows_out += len(block)
+                yield block
+
+            # Recargar los archivos cuyo bloque se vació
+            while heap and sources[heap[0][1]].empty:
+                _, number = heapq.heappop(heap)
+                source = sources[number]
+                source.fill()
+                if not source.empty:
+                    heapq.heappush(heap, (source.keys[-1], number))
+
+    def to_dataframe(self):
+        """Fusión completa en memoria (para DataProcessor o la interfaz)"""
+        blocks = list(self.chunks())
+        if not blocks:
+            return pd.DataFrame()
+        return pd.concat(blocks, ignore_index=True)
+
+    def to_csv(self, output_file):
+        """
+        Escribir la fusión en un CSV con el formato de entrada, bloque a bloque
+
+        Returns:
+            int: Filas escritas
+        """
+        header = True
+        with open_output(output_file) as handle:
+            for block in self.chunks():
+                block.to_csv(
+                    handle, header=header,
+                    sep=self.sep or config.CSV_SEPARATOR, decimal=config.DECIMAL_SEPARATOR, index=False
+                )
+                header = False
+        return self.rows_out
+
+
+def merge_files(paths, chunksize=None, sep=None):
+    """Atajo: FileMerger(paths).to_dataframe()"""
+    return FileMerger(paths, chunksize=chunksize, sep=sep).to_dataframe()
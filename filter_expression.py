@@ -0,0 +1,335 @@
+"""
+Filtro por expresión
+Expresiones libres sobre las columnas, p. ej.
+
+    T1_FineNS > 20 and T2_ResetCount - T1_ResetCount < 500
+    Num_Lote == 2 and 100 <= T1_Index < 200 and abs(`t1_nS.1` - t1_nS) < 50
+
+La expresión se analiza una sola vez (ast) y se traduce a una única
+expresión NumPy vectorizada: and/or/not pasan a &, |, ~ y las comparaciones
+encadenadas se separan. Los nombres con caracteres especiales van entre
+comillas invertidas, como en DataFrame.query.
+
+Las condiciones de rango sobre columnas indexadas (config.FILTER_RANGE_COLUMNS)
+se resuelven con búsqueda binaria sobre el orden de esa columna, y el resto
+de la expresión se evalúa solo sobre las filas candidatas. Las expresiones
+compiladas y las máscaras de cada condición quedan en caché, de modo que
+volver a aplicar una consulta editada solo evalúa lo que cambió.
+"""
+
+import ast
+import re
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+from tdc_core import to_numeric
+
+
+# Funciones disponibles dentro de las expresiones
+FUNCTIONS = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'log': np.log,
+    'exp': np.exp,
+    'isnan': np.isnan,
+}
+
+# Si las filas candidatas de un rango superan esta fracción se evalúa la
+# expresión completa (con máscaras en caché) en lugar del subconjunto
+_SELECTIVE_FRACTION = 0.5
+
+_COMPARISONS = {ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq}
+_ARITHMETIC = {ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Pow, ast.FloorDiv}
+_BACKTICK = re.compile(r'`([^`]+)`')
+
+
+class FilterSyntaxError(ValueError):
+    """Expresión de filtro inválida"""
+
+
+def _constant(node):
+    """Valor numérico de una constante (o None si no lo es)"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+            and not isinstance(node.value, bool):
+        return float(node.value)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant(node.operand)
+        if value is not None:
+            return -value if isinstance(node.op, ast.USub) else value
+    return None
+
+
+class _Translator(ast.NodeTransformer):
+    """Traducir el árbol de la expresión a operaciones NumPy sobre columnas"""
+
+    def __init__(self, names):
+        self.names = names
+        self.columns = set()
+
+    def generic_visit(self, node):
+        raise FilterSyntaxError(f"Elemento no permitido: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        return ast.Expression(body=self.visit(node.body))
+
+    def visit_BoolOp(self, node):
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        values = [self.visit(value) for value in node.values]
+        result = values[0]
+        for value in values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=operand)
+        if isinstance(node.op, (ast.USub, ast.UAdd)):
+            return ast.UnaryOp(op=node.op, operand=operand)
+        raise FilterSyntaxError("Operador unario no permitido")
+
+    def visit_BinOp(self, node):
+        if type(node.op) not in _ARITHMETIC:
+            raise FilterSyntaxError("Operador no permitido")
+        return ast.BinOp(left=self.visit(node.left), op=node.op, right=self.visit(node.right))
+
+    def visit_Compare(self, node):
+        # a < b < c  ->  (a < b) & (b < c)
+        operands = [self.visit(node.left)] + [self.visit(comp) for comp in node.comparators]
+        result = None
+        for k, op in enumerate(node.ops):
+            if type(op) not in _COMPARISONS:
+                raise FilterSyntaxError("Comparación no permitida")
+            pair = ast.Compare(left=operands[k], ops=[op], comparators=[operands[k + 1]])
+            result = pair if result is None else ast.BinOp(left=result, op=ast.BitAnd(), right=pair)
+        return result
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise FilterSyntaxError(f"Funciones disponibles: {', '.join(FUNCTIONS)}")
+        func = ast.Subscript(value=ast.Name(id='_f', ctx=ast.Load()),
+                             slice=ast.Constant(node.func.id), ctx=ast.Load())
+        return ast.Call(func=func, args=[self.visit(arg) for arg in node.args], keywords=[])
+
+    def visit_Name(self, node):
+        column = self.names.get(node.id, node.id)
+        self.columns.add(column)
+        return ast.Subscript(value=ast.Name(id='_c', ctx=ast.Load()),
+                             slice=ast.Constant(column), ctx=ast.Load())
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, (int, float)):
+            return ast.Constant(node.value)
+        raise FilterSyntaxError("Solo se admiten constantes numéricas")
+
+
+class _Term:
+    """Condición de primer nivel (unida al resto con and)"""
+
+    def __init__(self, node, names):
+        translator = _Translator(names)
+        tree = ast.fix_missing_locations(translator.visit(ast.Expression(body=node)))
+        self.code = compile(tree, '<filtro>', 'eval')
+        self.columns = translator.columns
+        self.source = ast.unparse(node)
+        self.range = self._range(node, names)
+
+    @staticmethod
+    def _range(node, names):
+        """(columna, mínimo, incluye mínimo, máximo, incluye máximo) o None"""
+        if not isinstance(node, ast.Compare):
+            return None
+        operands = [node.left] + list(node.comparators)
+        columns = [names.get(op.id, op.id) for op in operands if isinstance(op, ast.Name)]
+        if len(columns) != 1 or columns[0] not in config.FILTER_RANGE_COLUMNS:
+            return None
+
+        low, low_incl, high, high_incl = -np.inf, True, np.inf, True
+        for k, op in enumerate(node.ops):
+            left, right = operands[k], operands[k + 1]
+            if isinstance(left, ast.Name):
+                value, op_type = _constant(right), type(op)
+            else:
+                # Constante a la izquierda: invertir el sentido
+                value = _constant(left)
+                op_type = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt,
+                           ast.GtE: ast.LtE}.get(type(op), type(op))
+            if value is None or op_type is ast.NotEq:
+                return None
+            if op_type in (ast.Gt, ast.GtE, ast.Eq) and value >= low:
+                low, low_incl = value, op_type is not ast.Gt
+            if op_type in (ast.Lt, ast.LtE, ast.Eq) and value <= high:
+                high, high_incl = value, op_type is not ast.Lt
+        return columns[0], low, low_incl, high, high_incl
+
+    def evaluate(self, columns, n_rows):
+        """Máscara booleana de la condición"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result = eval(self.code, {'__builtins__': {}}, {'_c': columns, '_f': FUNCTIONS})
+        return np.broadcast_to(np.asarray(result, dtype=bool), (n_rows,))
+
+
+class FilterExpression:
+    """Expresión analizada y compilada (una vez) en condiciones vectorizadas"""
+
+    def __init__(self, text):
+        self.text = text.strip()
+        names = {}
+
+        def placeholder(match):
+            name = f'_col{len(names)}'
+            names[name] = match.group(1)
+            return name
+
+        try:
+            tree = ast.parse(_BACKTICK.sub(placeholder, self.text), mode='eval')
+        except SyntaxError as e:
+            raise FilterSyntaxError(f"Expresión inválida: {e.msg}") from e
+
+        nodes = self._conjuncts(tree.body)
+        self.terms = [_Term(node, names) for node in nodes]
+        self.columns = set().union(*(term.columns for term in self.terms))
+        self.ranges = [term.range for term in self.terms if term.range is not None]
+
+    @classmethod
+    def _conjuncts(cls, node):
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            return [part for value in node.values for part in cls._conjuncts(value)]
+        return [node]
+
+
+# Expresiones compiladas (texto -> FilterExpression), las más recientes al final
+_expression_cache = OrderedDict()
+
+
+def compile_filter(text):
+    """
+    Obtener la expresión compilada, desde caché si ya se analizó
+
+    Raises:
+        FilterSyntaxError: Si la expresión no es válida
+    """
+    key = text.strip()
+    if key in _expression_cache:
+        _expression_cache.move_to_end(key)
+        return _expression_cache[key]
+    expression = FilterExpression(key)
+    _expression_cache[key] = expression
+    while len(_expression_cache) > config.FILTER_CACHE_SIZE:
+        _expression_cache.popitem(last=False)
+    return expression
+
+
+class FilterContext:
+    """Columnas convertidas, índices ordenados y máscaras en caché de un DataFrame"""
+
+    def __init__(self, df):
+        # Referencia débil: el contexto no debe mantener vivo al DataFrame
+        self._df = weakref.ref(df)
+        self.n_rows = len(df)
+        self._columns = {}
+        self._sorted = {}
+        self._masks = OrderedDict()
+
+    def column(self, name):
+        if name not in self._columns:
+            df = self._df()
+            if name in df.columns:
+                self._columns[name] = to_numeric(df[name]).to_numpy()
+            elif name == config.PC_TIME_COLUMN and 'Timestamp_PC' in df.columns:
+                # Hora del PC: calculada aquí, no es una columna de los datos
+                from pc_time import pc_time_ms
+                self._columns[name] = pc_time_ms(df['Timestamp_PC'])
+            else:
+                raise FilterSyntaxError(f"Columna desconocida: {name}")
+        return self._columns[name]
+
+    def index(self, column):
+        """(orden, valores ordenados) de la columna, calculado una vez"""
+        if column not in self._sorted:
+            values = self.column(column)
+            order = np.argsort(values, kind='stable')
+            self._sorted[column] = (order, values[order])
+        return self._sorted[column]
+
+    def range_slice(self, column, low, low_incl, high, high_incl):
+        """
+        Filas con low <= columna <= high, por búsqueda binaria
+
+        Returns:
+            np.ndarray: Tramo del orden de la columna con las filas del rango
+            (sin copiar; ordenar antes de indexar)
+        """
+        order, sorted_values = self.index(column)
+        start = np.searchsorted(sorted_values, low, side='left' if low_incl else 'right')
+        stop = np.searchsorted(sorted_values, high, side='right' if high_incl else 'left')
+        return order[start:stop]
+
+    def term_mask(self, term):
+        if term.source in self._masks:
+            self._masks.move_to_end(term.source)
+            return self._masks[term.source]
+        columns = {name: self.column(name) for name in term.columns}
+        mask = term.evaluate(columns, self.n_rows)
+        self._masks[term.source] = mask
+        while len(self._masks) > config.FILTER_MASK_CACHE_SIZE:
+            self._masks.popitem(last=False)
+        return mask
+
+    def evaluate(self, expression):
+        """
+        Máscara de filas que cumplen la expresión
+
+        Args:
+            expression (FilterExpression | str): Expresión a evaluar
+
+        Returns:
+            np.ndarray: Máscara booleana por fila
+        """
+        if isinstance(expression, str):
+            expression = compile_filter(expression)
+
+        candidates = None
+        for bounds in expression.ranges:
+            positions = self.range_slice(*bounds)
+            if candidates is None or len(positions) < len(candidates):
+                candidates = positions
+
+        if candidates is not None and len(candidates) < _SELECTIVE_FRACTION * self.n_rows:
+            # Rango selectivo: evaluar solo sobre las filas candidatas
+            candidates = np.sort(candidates)
+            columns = {name: self.column(name)[candidates] for name in expression.columns}
+            keep = np.ones(len(candidates), dtype=bool)
+            for term in expression.terms:
+                keep &= term.evaluate(columns, len(candidates))
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[candidates[keep]] = True
+            return mask
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        for term in expression.terms:
+            mask &= self.term_mask(term)
+        return mask
+
+
+# Contextos por DataFrame (id -> (referencia débil, FilterContext))
+_contexts = {}
+
+
+def filter_context(df):
+    """Contexto reutilizable mientras el mismo DataFrame siga vivo"""
+    for key in [key for key, (ref, _) in _contexts.items() if ref() is None]:
+        del _contexts[key]
+    entry = _contexts.get(id(df))
+    if entry is None or entry[0]() is not df:
+        entry = (weakref.ref(df), FilterContext(df))
+        _contexts[id(df)] = entry
+    return entry[1]
+
+
+def filter_mask(df, text):
+    """Atajo: máscara de filas de df que cumplen la expresión"""
+    return filter_context(df).evaluate(compile_filter(text))
@@ -0,0 +1,166 @@
+"""
+Calibración del interpolador fino (FineNS)
+Corrige la no linealidad diferencial (DNL) del TDC con el método de densidad
+de códigos: con hits uniformes en el período grueso, la ocupación de cada
+código fino es proporcional a su ancho real. La tabla resultante (LUT) se
+aplica con np.take sobre todos los hits y se puede guardar por canal para
+reutilizarla en otros archivos.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+import config
+import kernels
+from tdc_core import COARSE_PERIOD_NS, reset_counts, to_numeric
+
+
+CHANNELS = ('T1', 'T2')
+
+# Tamaño del código fino (ns) y número de códigos dentro del período grueso
+FINE_LSB_NS = config.FINE_LSB_NS
+N_FINE_CODES = int(np.ceil(COARSE_PERIOD_NS / FINE_LSB_NS))
+
+# Calibraciones cargadas desde disco ((ruta, mtime) -> FineCalibration)
+_calibration_cache = {}
+
+
+def _cache_key(path):
+    """Clave de caché: ruta absoluta y fecha de modificación"""
+    path = Path(path).resolve()
+    return str(path), path.stat().st_mtime_ns
+
+
+def fine_codes(fine_ns):
+    """
+    Convertir valores FineNS en códigos enteros del interpolador
+
+    Args:
+        fine_ns (np.ndarray): Valores FineNS (float, NaN permitido)
+
+    Returns:
+        tuple: (códigos int64, máscara de valores válidos)
+    """
+    return kernels.fine_codes(fine_ns, FINE_LSB_NS, N_FINE_CODES)
+
+
+def code_density(fine_ns):
+    """Ocupación de cada código fino (histograma de densidad de códigos)"""
+    return kernels.code_density(fine_ns, FINE_LSB_NS, N_FINE_CODES)
+
+
+def lut_from_density(counts):
+    """
+    Construir la LUT código -> tiempo fino calibrado (ns)
+
+    El ancho de cada código es período * ocupación / total; el tiempo
+    calibrado es el centro del código en la escala acumulada.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total <= 0:
+        # Sin datos: LUT ideal (código * LSB)
+        return np.arange(N_FINE_CODES, dtype=np.float64) * FINE_LSB_NS
+
+    widths = COARSE_PERIOD_NS * counts / total
+    left_edges = np.concatenate(([0.0], np.cumsum(widths)[:-1]))
+    return left_edges + widths / 2.0
+
+
+class FineCalibration:
+    """Tablas de calibración FineNS por canal"""
+
+    def __init__(self, luts=None, densities=None):
+        """
+        Args:
+            luts (dict): Canal -> LUT (np.ndarray de N_FINE_CODES valores)
+            densities (dict): Canal -> ocupación por código usada para la LUT
+        """
+        self.luts = dict(luts or {})
+        self.densities = dict(densities or {})
+
+    @classmethod
+    def from_dataframe(cls, df, channels=CHANNELS):
+        """Construir la calibración a partir de la densidad de códigos de un run"""
+        calibration = cls()
+        for channel in channels:
+            column = f'{channel}_FineNS'
+            if column in df.columns:
+                calibration.add_density(channel, code_density(to_numeric(df[column]).to_numpy()))
+        return calibration
+
+    def add_density(self, channel, counts):
+        """Acumular ocupación de códigos de otro archivo y recalcular la LUT"""
+        previous = self.densities.get(channel, np.zeros(N_FINE_CODES, dtype=np.int64))
+        self.densities[channel] = previous + np.asarray(counts, dtype=np.int64)
+        self.luts[channel] = lut_from_density(self.densities[channel])
+
+    def dnl(self, channel):
+        """No linealidad diferencial por código (en LSB)"""
+        counts = self.densities[channel].astype(np.float64)
+        return counts / counts.mean() - 1.0
+
+    def correct_fine(self, channel, fine_ns):
+        """
+        Aplicar la LUT a un arreglo de valores FineNS
+
+        Returns:
+            np.ndarray: FineNS calibrado (NaN donde el original era NaN)
+        """
+        return kernels.lut_lookup(fine_ns, self.luts[channel], FINE_LSB_NS)
+
+    def apply(self, df):
+        """
+        Agregar columnas calibradas <canal>_FineNS_cal y <canal>_ns_cal
+
+        Args:
+            df (pd.DataFrame): Datos con <canal>_ResetCount y <canal>_FineNS
+
+        Returns:
+            pd.DataFrame: Nuevo DataFrame con las columnas calibradas
+        """
+        result = df.copy()
+        for channel in self.luts:
+            fine_column = f'{channel}_FineNS'
+            reset_column = f'{channel}_ResetCount'
+            if fine_column not in df.columns or reset_column not in df.columns:
+                continue
+            fine_cal = self.correct_fine(channel, to_numeric(df[fine_column]).to_numpy())
+            result[f'{channel}_FineNS_cal'] = fine_cal
+            result[f'{channel}_ns_cal'] = (
+                reset_counts(df, channel) * COARSE_PERIOD_NS + fine_cal
+            )
+        return result
+
+    def save(self, path):
+        """Guardar las tablas (y ocupaciones) en un archivo .npz"""
+        arrays = {}
+        for channel, lut in self.luts.items():
+            arrays[f'lut_{channel}'] = lut
+            if channel in self.densities:
+                arrays[f'density_{channel}'] = self.densities[channel]
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+        _calibration_cache[_cache_key(path)] = self
+
+    @classmethod
+    def load(cls, path):
+        """Cargar tablas guardadas con save()"""
+        luts, densities = {}, {}
+        with np.load(path, allow_pickle=False) as data:
+            for key in data.files:
+                kind, channel = key.split('_', 1)
+                if kind == 'lut':
+                    luts[channel] = data[key]
+                elif kind == 'density':
+                    densities[channel] = data[key]
+        return cls(luts, densities)
+
+
+def load_calibration(path):
+    """Cargar una calibración reutilizando la copia en memoria si ya se leyó"""
+    key = _cache_key(path)
+    if key not in _calibration_cache:
+        _calibration_cache[key] = FineCalibration.load(path)
+    return _calibration_cache[key]
@@ -0,0 +1,181 @@
+"""
+Detección de eventos perdidos y huecos
+Analiza los flujos T1_Index / T2_Index y los tiempos reconstruidos de cada
+lote con np.diff, y resume los hallazgos como una tabla compacta de tramos
+(run-length) en lugar de marcas por fila:
+
+    faltantes       índices ausentes entre Inicio y Fin (Cantidad = nº de índices)
+    duplicados      índice repetido (Inicio = Fin = índice, Cantidad = repeticiones)
+    retroceso       el índice disminuye (Inicio = anterior, Fin = actual)
+    tiempo_muerto   intervalo sin hits mayor que el umbral (Inicio/Fin en ns)
+    desfase         tramo de filas con T2_Index - T1_Index constante
+                    (Inicio/Fin = T1_Index del tramo, Cantidad = desfase)
+"""
+
+import numpy as np
+import pandas as pd
+
+import config
+from tdc_core import absolute_times, to_numeric
+
+
+EVENT_COLUMNS = ['Num_Lote', 'Canal', 'Tipo', 'Inicio', 'Fin', 'Cantidad', 'Duración_ns']
+
+
+def _runs(mask):
+    """Inicio y fin (inclusive) de cada tramo consecutivo de True"""
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return changes[0::2], changes[1::2] - 1
+
+
+def _events(lote, channel, kind, start, end, count, duration=None):
+    """Construir un bloque de filas de la tabla de eventos"""
+    n = len(start)
+    return pd.DataFrame({
+        'Num_Lote': lote,
+        'Canal': np.full(n, channel, dtype=object),
+        'Tipo': np.full(n, kind, dtype=object),
+        'Inicio': start,
+        'Fin': end,
+        'Cantidad': count,
+        'Duración_ns': duration if duration is not None else np.full(n, np.nan),
+    })
+
+
+def index_events(lote, index, channel):
+    """
+    Faltantes, duplicados y retrocesos de un flujo de índices
+
+    Args:
+        lote (np.ndarray): Número de lote por fila (sin NaN)
+        index (np.ndarray): Índice por fila (sin NaN), en orden de adquisición
+        channel (str): Nombre del canal
+
+    Returns:
+        pd.DataFrame: Eventos con las columnas EVENT_COLUMNS
+    """
+    if len(index) < 2:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    step = np.diff(index)
+    same_lote = lote[1:] == lote[:-1]
+    prev, cur, lote_cur = index[:-1], index[1:], lote[1:]
+    blocks = []
+
+    gap = same_lote & (step > 1)
+    blocks.append(_events(lote_cur[gap], channel, 'faltantes', prev[gap] + 1, cur[gap] - 1, step[gap] - 1))
+
+    back = same_lote & (step < 0)
+    blocks.append(_events(lote_cur[back], channel, 'retroceso', prev[back], cur[back], np.ones(back.sum())))
+
+    # Repeticiones consecutivas del mismo índice agrupadas en un tramo
+    starts, ends = _runs(same_lote & (step == 0))
+    blocks.append(_events(lote_cur[starts], channel, 'duplicados', cur[starts], cur[starts],
+                          ends - starts + 1))
+
+    return pd.concat(blocks, ignore_index=True)
+
+
+def dead_time_events(lote, times, channel, threshold_ns=None, median_factor=None):
+    """
+    Intervalos sin hits más largos que el umbral
+
+    Si threshold_ns es None, el umbral de cada lote es median_factor veces la
+    mediana de los intervalos entre hits de ese lote.
+
+    Returns:
+        pd.DataFrame: Eventos 'tiempo_muerto' con su duración
+    """
+    if threshold_ns is None:
+        threshold_ns = config.DEAD_TIME_THRESHOLD_NS
+    if median_factor is None:
+        median_factor = config.DEAD_TIME_MEDIAN_FACTOR
+    if len(times) < 2:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    interval = np.diff(times)
+    same_lote = lote[1:] == lote[:-1]
+    lote_cur = lote[1:]
+
+    if threshold_ns is None:
+        medians = pd.Series(interval[same_lote]).groupby(lote_cur[same_lote]).median()
+        limit = median_factor * medians.reindex(lote_cur).to_numpy()
+    else:
+        limit = np.full(len(interval), threshold_ns)
+
+    dead = same_lote & (interval > limit)
+    return _events(lote_cur[dead], channel, 'tiempo_muerto', times[:-1][dead], times[1:][dead],
+                   np.ones(dead.sum()), interval[dead])
+
+
+def offset_events(lote, t1_index, t2_index):
+    """Tramos de filas con desfase T2_Index - T1_Index constante"""
+    if len(t1_index) == 0:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    offset = t2_index - t1_index
+    new_run = np.ones(len(offset), dtype=bool)
+    new_run[1:] = (offset[1:] != offset[:-1]) | (lote[1:] != lote[:-1])
+    starts = np.flatnonzero(new_run)
+    ends = np.concatenate((starts[1:], [len(offset)])) - 1
+    return _events(lote[starts], 'T2-T1', 'desfase', t1_index[starts], t1_index[ends], offset[starts])
+
+
+def analyze_gaps(df, threshold_ns=None, times=None):
+    """
+    Detectar índices faltantes, duplicados, retrocesos, tiempos muertos y
+    cambios de desfase entre canales, lote por lote
+
+    Args:
+        df (pd.DataFrame): Datos crudos o procesados
+        threshold_ns (float): Umbral fijo de tiempo muerto (ver dead_time_events)
+        times (dict): Tiempos absolutos ya calculados (ver absolute_times)
+
+    Returns:
+        dict: 'events' (tabla de tramos) y 'summary' (conteos por lote y canal)
+    """
+    lote_all = to_numeric(df['Num_Lote']).to_numpy()
+    # Orden estable por lote conservando el orden de adquisición dentro del lote
+    order = np.argsort(lote_all, kind='stable')
+    lote_all = lote_all[order]
+    times_all = absolute_times(df, times)
+    blocks = []
+
+    indices = {}
+    for channel in ('T1', 'T2'):
+        index = to_numeric(df[f'{channel}_Index']).to_numpy()[order]
+        indices[channel] = index
+        valid = np.isfinite(index) & np.isfinite(lote_all)
+        blocks.append(index_events(lote_all[valid], index[valid], channel))
+
+        times = times_all[channel][order]
+        valid = np.isfinite(times) & np.isfinite(lote_all)
+        blocks.append(dead_time_events(lote_all[valid], times[valid], channel, threshold_ns))
+
+    both = np.isfinite(indices['T1']) & np.isfinite(indices['T2']) & np.isfinite(lote_all)
+    blocks.append(offset_events(lote_all[both], indices['T1'][both], indices['T2'][both]))
+
+    blocks = [block for block in blocks if len(block) > 0]
+    if blocks:
+        events = pd.concat(blocks, ignore_index=True)
+        events['Num_Lote'] = events['Num_Lote'].astype(np.int64)
+    else:
+        events = pd.DataFrame(columns=EVENT_COLUMNS)
+
+    return {'events': events, 'summary': gap_summary(events)}
+
+
+def gap_summary(events):
+    """Totales por lote, canal y tipo (índices perdidos, duplicados, tiempo muerto)"""
+    if len(events) == 0:
+        return pd.DataFrame(columns=['Num_Lote', 'Canal', 'Tipo', 'Tramos', 'Total', 'Duración_ns'])
+    # El desfase no es acumulable: solo se cuentan sus tramos
+    events = events.assign(
+        Cantidad=events['Cantidad'].where(events['Tipo'] != 'desfase')
+    )
+    summary = events.groupby(['Num_Lote', 'Canal', 'Tipo'], sort=True).agg(
+        Tramos=('Cantidad', 'size'),
+        Total=('Cantidad', 'sum'),
+        Duración_ns=('Duración_ns', 'sum'),
+    )
+    return summary.reset_index()
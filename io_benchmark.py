@@ -0,0 +1,116 @@
+"""
+Benchmark de lectura y escritura de CSV comprimidos (compressed_io)
+Escribe datos sintéticos del TDC (ui_benchmark.synthetic_frame) como CSV
+sin comprimir, .csv.gz y .csv.zst (si zstandard está instalado), y mide para
+cada formato la exportación (compressed_io.write_csv), la lectura completa
+(tdc_core.read_data_file) y la lectura por bloques (read_data_chunks). Se
+informa el caudal en MB/s de CSV sin comprimir, la relación de compresión y
+si los datos leídos coinciden con los del CSV sin comprimir.
+
+Uso:
+    python io_benchmark.py --rows 1000000 5000000
+    python io_benchmark.py --rows 200000 --repeat 5 --keep carpeta
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from compressed_io import write_csv, zstd_available
+from tdc_core import read_data_chunks, read_data_file
+from ui_benchmark import synthetic_frame
+
+
+def formats():
+    """Extensiones a medir (sin comprimir, gzip y, si está instalado, zstd)"""
+    return ['.csv', '.csv.gz'] + (['.csv.zst'] if zstd_available() else [])
+
+
+def _best(function, repeat):
+    """Mejor tiempo de repeat llamadas (s) y el último resultado"""
+    best, result = np.inf, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _same(df, reference):
+    """Mismas columnas y valores (NaN iguales)"""
+    if list(df.columns) != list(reference.columns) or len(df) != len(reference):
+        return False
+    return all(df[col].equals(reference[col]) for col in reference.columns)
+
+
+def run_benchmark(rows_list, repeat=3, folder=None):
+    """
+    Medir escritura y lectura de cada formato
+
+    Args:
+        rows_list (list): Filas de cada conjunto sintético
+        repeat (int): Repeticiones (se informa la mejor)
+        folder (str): Carpeta de los archivos (por defecto una temporal)
+
+    Returns:
+        list: dict por (filas, formato) con tiempos, caudal y verificación
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='io_bench_') as temp:
+        folder = Path(folder or temp)
+        folder.mkdir(parents=True, exist_ok=True)
+        for rows in rows_list:
+            df = synthetic_frame(rows)
+            plain = folder / f'sintetico_{rows}.csv'
+            write_csv(df, plain)
+            reference = read_data_file(plain)
+            plain_bytes = os.path.getsize(plain)
+
+            for suffix in formats():
+                path = folder / f'sintetico_{rows}{suffix}'
+                write_s, _ = _best(lambda: write_csv(df, path), repeat)
+                read_s, data = _best(lambda: read_data_file(path), repeat)
+                chunk_s, rows_read = _best(lambda: sum(len(c) for c in read_data_chunks(path)), repeat)
+                size = os.path.getsize(path)
+                results.append({
+                    'filas': rows,
+                    'formato': suffix,
+                    'MB en disco': size / 1e6,
+                    'relación': plain_bytes / size if size else np.inf,
+                    'escritura (s)': write_s,
+                    'lectura (s)': read_s,
+                    'por bloques (s)': chunk_s,
+                    'escritura MB/s': plain_bytes / write_s / 1e6,
+                    'lectura MB/s': plain_bytes / read_s / 1e6,
+                    'idéntico': _same(data, reference) and rows_read == len(reference),
+                })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de CSV comprimidos (gzip / zstd)")
+    parser.add_argument('--rows', nargs='+', type=int, default=[1_000_000],
+                        help="Filas de cada conjunto sintético")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument('--keep', default=None, help="Carpeta donde dejar los archivos generados")
+    args = parser.parse_args(argv)
+
+    if not zstd_available():
+        print("zstandard no está instalado: no se mide .csv.zst")
+
+    results = run_benchmark(args.rows, args.repeat, args.keep)
+    print(f"{'Filas':>10s} {'Formato':<9s} {'MB':>8s} {'Relación':>9s} {'Escritura':>10s} "
+          f"{'Lectura':>9s} {'Bloques':>9s} {'Esc. MB/s':>10s} {'Lect. MB/s':>11s} {'Idéntico':>9s}")
+    for row in results:
+        print(f"{row['filas']:10d} {row['formato']:<9s} {row['MB en disco']:8.1f} "
+              f"{row['relación']:8.1f}x {row['escritura (s)']:9.3f}s {row['lectura (s)']:8.3f}s "
+              f"{row['por bloques (s)']:8.3f}s {row['escritura MB/s']:10.1f} "
+              f"{row['lectura MB/s']:11.1f} {'sí' if row['idéntico'] else 'NO':>9s}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark de los núcleos de cálculo (kernels.py)
+Mide cada núcleo con los backends disponibles sobre datos sintéticos del TDC
+(ui_benchmark.synthetic_frame) y verifica que los resultados sean idénticos
+a los de NumPy. La primera llamada de Numba incluye la compilación y se
+informa aparte.
+
+Sin Numba instalado, --check-loops ejecuta los bucles que Numba compilaría
+(en Python, sobre una muestra) para verificar que coinciden con NumPy.
+
+Uso:
+    python kernel_benchmark.py --rows 1000000 5000000
+    python kernel_benchmark.py --rows 200000 --check-loops
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import config
+import kernels
+from fine_calibration import FINE_LSB_NS, N_FINE_CODES, lut_from_density
+from tdc_core import absolute_time_ns
+from ui_benchmark import synthetic_frame
+
+
+# Ancho del contador simulado para la reconstrucción de desbordes
+ROLLOVER_BITS = 16
+
+
+def kernel_cases(df):
+    """
+    Núcleos a medir con sus argumentos
+
+    Returns:
+        dict: nombre -> (función, argumentos)
+    """
+    fine = df['T1_FineNS'].to_numpy(dtype=np.float64)
+    lut = lut_from_density(kernels.code_density(fine, FINE_LSB_NS, N_FINE_CODES))
+    period = float(2 ** ROLLOVER_BITS)
+    wrapped = df['T1_ResetCount'].to_numpy(dtype=np.float64) % period
+    t1 = np.sort(absolute_time_ns(df, 'T1'))
+    t2 = np.sort(absolute_time_ns(df, 'T2'))
+    return {
+        'densidad de códigos': (kernels.code_density, (fine, FINE_LSB_NS, N_FINE_CODES)),
+        'LUT FineNS': (kernels.lut_lookup, (fine, lut, FINE_LSB_NS)),
+        'desborde ResetCount': (kernels.unwrap, (wrapped, period)),
+        'emparejamiento T1/T2': (kernels.match_windows, (t1, t2, config.COINCIDENCE_WINDOW_NS)),
+    }
+
+
+def _time(function, args, repeat):
+    """Mejor tiempo de repeat llamadas (s) y el último resultado"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(rows_list, repeat=5, backends=None):
+    """
+    Medir cada núcleo con cada backend
+
+    Args:
+        rows_list (list): Filas de cada conjunto sintético
+        repeat (int): Repeticiones (se informa la mejor)
+        backends (list): Backends a medir (por defecto, los disponibles)
+
+    Returns:
+        list: dict por (filas, núcleo, backend) con tiempos y verificación
+    """
+    if backends is None:
+        backends = ['numpy'] + (['numba'] if kernels.numba_available() else [])
+
+    results = []
+    try:
+        for rows in rows_list:
+            cases = kernel_cases(synthetic_frame(rows))
+            for name, (function, args) in cases.items():
+                reference = None
+                for backend in backends:
+                    kernels.set_backend(backend)
+                    start = time.perf_counter()
+                    first = function(*args)
+                    first_call = time.perf_counter() - start
+                    best, result = _time(function, args, repeat)
+                    if reference is None:
+                        reference = result
+                    results.append({
+                        'filas': rows,
+                        'núcleo': name,
+                        'backend': backend,
+                        'primera llamada (s)': first_call,
+                        'mejor (s)': best,
+                        'Mfilas/s': rows / best / 1e6 if best > 0 else np.inf,
+                        'idéntico': bool(
+                            np.array_equal(first, reference, equal_nan=True)
+                            and np.array_equal(result, reference, equal_nan=True)
+                        ),
+                    })
+    finally:
+        kernels.set_backend(None)
+    return results
+
+
+def check_loops(rows=20_000):
+    """
+    Comparar los bucles de Numba ejecutados en Python con NumPy
+
+    Returns:
+        dict: núcleo -> True si los resultados son idénticos
+    """
+    df = synthetic_frame(rows, seed=1)
+    fine = df['T1_FineNS'].to_numpy(dtype=np.float64).copy()
+    fine[::97] = np.nan
+    cases = kernel_cases(df.assign(T1_FineNS=fine))
+    loops = {
+        'densidad de códigos': kernels._code_density_loop,
+        'LUT FineNS': kernels._lut_lookup_loop,
+        'desborde ResetCount': kernels._unwrap_loop,
+    }
+
+    checks = {}
+    kernels.set_backend('numpy')
+    try:
+        for name, loop in loops.items():
+            function, args = cases[name]
+            checks[name] = bool(np.array_equal(function(*args), loop(*args), equal_nan=True))
+        t1, t2, _ = cases['emparejamiento T1/T2'][1]
+        checks['emparejamiento T1/T2'] = bool(
+            np.array_equal(kernels._nearest_numpy(t1, t2), kernels._nearest_loop(t1, t2))
+            and np.array_equal(kernels._nearest_numpy(t2, t1), kernels._nearest_loop(t2, t1))
+        )
+    finally:
+        kernels.set_backend(None)
+    return checks
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los núcleos NumPy / Numba")
+    parser.add_argument('--rows', nargs='+', type=int, default=[1_000_000],
+                        help="Filas de cada conjunto sintético")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por medición")
+    parser.add_argument('--check-loops', action='store_true',
+                        help="Verificar los bucles de Numba ejecutándolos en Python")
+    args = parser.parse_args(argv)
+
+    if not kernels.numba_available():
+        print("Numba no está instalado: solo se mide el backend NumPy")
+    print(f"Backend configurado: {config.KERNEL_BACKEND} → {kernels.active_backend()}\n")
+
+    results = run_benchmark(args.rows, args.repeat)
+    print(f"{'Filas':>10s} {'Núcleo':<22s} {'Backend':<8s} {'1ª llamada':>11s} {'Mejor':>9s} "
+          f"{'Mfilas/s':>9s} {'Idéntico':>9s}")
+    for row in results:
+        print(f"{row['filas']:10d} {row['núcleo']:<22s} {row['backend']:<8s} "
+              f"{row['primera llamada (s)']:10.4f}s {row['mejor (s)']:8.4f}s "
+              f"{row['Mfilas/s']:9.1f} {'sí' if row['idéntico'] else 'NO':>9s}")
+
+    if args.check_loops:
+        print("\nBucles de Numba (en Python) frente a NumPy:")
+        for name, same in check_loops().items():
+            print(f"  {name:<22s} {'idéntico' if same else 'DISTINTO'}")
+
+
+if __name__ == '__main__':
+    main()
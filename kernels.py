@@ -0,0 +1,266 @@
+"""
+Núcleos de cálculo intensivo
+Recorridos fila a fila que en NumPy puro necesitan arreglos temporales
+grandes: emparejamiento de hits T1/T2 por ventana, reconstrucción de
+contadores que desbordan (ResetCount, hora del PC) y densidad de códigos /
+aplicación de la LUT de la calibración FineNS.
+
+Cada núcleo tiene dos implementaciones con resultados idénticos:
+
+    numpy   vectorizada, siempre disponible
+    numba   bucles compilados con numba.njit (si numba está instalado)
+
+config.KERNEL_BACKEND elige entre 'auto' (numba si está instalado), 'numba'
+y 'numpy'. Las funciones de Numba se compilan en el primer uso y se guardan
+en el caché de Numba (config.NUMBA_CACHE). kernel_benchmark.py compara ambas.
+"""
+
+import importlib.util
+
+import numpy as np
+
+import config
+
+
+BACKENDS = ('numpy', 'numba')
+
+# Backend forzado con set_backend (None = config.KERNEL_BACKEND)
+_forced_backend = None
+
+# Funciones compiladas (se crean en el primer uso)
+_numba_kernels = None
+
+
+def numba_available():
+    """Indicar si numba está instalado (sin importarlo)"""
+    return importlib.util.find_spec('numba') is not None
+
+
+def active_backend():
+    """
+    Backend en uso según config.KERNEL_BACKEND (o set_backend)
+
+    Raises:
+        ValueError: Si se pidió 'numba' y no está instalado, o el nombre no existe
+    """
+    name = _forced_backend or config.KERNEL_BACKEND
+    if name == 'auto':
+        return 'numba' if numba_available() else 'numpy'
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de núcleos desconocido: {name} (use auto, numba o numpy)")
+    if name == 'numba' and not numba_available():
+        raise ValueError("KERNEL_BACKEND = 'numba' pero numba no está instalado")
+    return name
+
+
+def set_backend(name):
+    """Forzar un backend ('numpy', 'numba', 'auto') o volver a config con None"""
+    global _forced_backend
+    if name is not None and name != 'auto' and name not in BACKENDS:
+        raise ValueError(f"Backend de núcleos desconocido: {name}")
+    _forced_backend = name
+
+
+def _numba():
+    """Compilar (una vez) los núcleos de Numba"""
+    global _numba_kernels
+    if _numba_kernels is None:
+        from numba import njit
+
+        jit = njit(cache=config.NUMBA_CACHE, nogil=True)
+        _numba_kernels = {
+            'unwrap': jit(_unwrap_loop),
+            'nearest': jit(_nearest_loop),
+            'code_density': jit(_code_density_loop),
+            'lut_lookup': jit(_lut_lookup_loop),
+        }
+    return _numba_kernels
+
+
+# ============================================================================
+# RECONSTRUCCIÓN DE CONTADORES (DESBORDE)
+# ============================================================================
+
+def _unwrap_numpy(values, period):
+    result = values.copy()
+    if len(values) < 2:
+        return result
+    wraps = np.diff(values) < -period / 2
+    if wraps.any():
+        result[1:] += np.cumsum(wraps) * period
+    return result
+
+
+def _unwrap_loop(values, period):
+    result = values.copy()
+    wraps = 0
+    for i in range(1, len(values)):
+        if values[i] - values[i - 1] < -period / 2:
+            wraps += 1
+        result[i] = values[i] + wraps * period
+    return result
+
+
+def unwrap(values, period):
+    """
+    Reconstruir un contador que vuelve a cero cada period unidades
+
+    Un retroceso de más de medio período entre filas consecutivas se toma
+    como un desborde y suma un período a todas las filas siguientes.
+
+    Args:
+        values (np.ndarray): Valores en orden de adquisición, sin faltantes
+            (int64 o float64)
+        period (int | float): Período del contador (mismo tipo que values)
+
+    Returns:
+        np.ndarray: Valores crecientes salvo retrocesos menores a medio período
+    """
+    values = np.ascontiguousarray(values)
+    period = values.dtype.type(period)
+    if active_backend() == 'numba':
+        return _numba()['unwrap'](values, period)
+    return _unwrap_numpy(values, period)
+
+
+def unwrap_valid(values, period, valid):
+    """unwrap aplicado solo a las filas válidas (las demás quedan igual)"""
+    result = values.copy()
+    result[valid] = unwrap(values[valid], period)
+    return result
+
+
+# ============================================================================
+# EMPAREJAMIENTO POR VENTANA
+# ============================================================================
+
+def _nearest_numpy(a, b):
+    """Índice del elemento de b (ordenado) más cercano a cada a (empate: el anterior)"""
+    m = len(b)
+    if m == 0:
+        return np.full(len(a), -1, dtype=np.int64)
+    right = np.searchsorted(b, a, side='left')
+    left = right - 1
+    right_clipped = np.minimum(right, m - 1)
+    left_clipped = np.maximum(left, 0)
+    use_left = (right >= m) | ((left >= 0) & (a - b[left_clipped] <= b[right_clipped] - a))
+    return np.where(use_left, left_clipped, right_clipped).astype(np.int64)
+
+
+def _nearest_loop(a, b):
+    n, m = len(a), len(b)
+    result = np.empty(n, dtype=np.int64)
+    j = 0
+    for i in range(n):
+        if m == 0:
+            result[i] = -1
+            continue
+        while j < m and b[j] < a[i]:
+            j += 1
+        if j >= m:
+            result[i] = m - 1
+        elif j > 0 and a[i] - b[j - 1] <= b[j] - a[i]:
+            result[i] = j - 1
+        else:
+            result[i] = j
+    return result
+
+
+def _nearest(a, b):
+    if active_backend() == 'numba':
+        return _numba()['nearest'](a, b)
+    return _nearest_numpy(a, b)
+
+
+def match_windows(t1, t2, window_ns):
+    """
+    Emparejar hits de dos canales por cercanía en el tiempo
+
+    Un hit T1 y un hit T2 forman un par si cada uno es el más cercano del
+    otro (vecinos mutuos) y |t2 - t1| <= window_ns. Cada hit pertenece a lo
+    sumo a un par; los empates se resuelven por el hit anterior.
+
+    Args:
+        t1 (np.ndarray): Tiempos T1 ordenados (float64, sin NaN)
+        t2 (np.ndarray): Tiempos T2 ordenados (float64, sin NaN)
+        window_ns (float): Ventana de coincidencia
+
+    Returns:
+        np.ndarray: Para cada hit T1, índice del T2 emparejado o -1
+    """
+    t1 = np.ascontiguousarray(t1, dtype=np.float64)
+    t2 = np.ascontiguousarray(t2, dtype=np.float64)
+    if len(t1) == 0 or len(t2) == 0:
+        return np.full(len(t1), -1, dtype=np.int64)
+    forward = _nearest(t1, t2)
+    backward = _nearest(t2, t1)
+    mutual = backward[forward] == np.arange(len(t1))
+    close = np.abs(t2[forward] - t1) <= window_ns
+    return np.where(mutual & close, forward, -1)
+
+
+# ============================================================================
+# DENSIDAD DE CÓDIGOS Y LUT (CALIBRACIÓN FINENS)
+# ============================================================================
+
+def _codes_numpy(fine_ns, lsb, n_codes):
+    valid = np.isfinite(fine_ns)
+    codes = np.zeros(len(fine_ns), dtype=np.int64)
+    codes[valid] = np.rint(fine_ns[valid] / lsb).astype(np.int64)
+    np.clip(codes, 0, n_codes - 1, out=codes)
+    return codes, valid
+
+
+def _code_density_loop(fine_ns, lsb, n_codes):
+    counts = np.zeros(n_codes, dtype=np.int64)
+    for i in range(len(fine_ns)):
+        value = fine_ns[i]
+        if np.isfinite(value):
+            code = int(np.rint(value / lsb))
+            code = min(max(code, 0), n_codes - 1)
+            counts[code] += 1
+    return counts
+
+
+def _lut_lookup_loop(fine_ns, lut, lsb):
+    n_codes = len(lut)
+    result = np.empty(len(fine_ns), dtype=np.float64)
+    for i in range(len(fine_ns)):
+        value = fine_ns[i]
+        if np.isfinite(value):
+            code = int(np.rint(value / lsb))
+            result[i] = lut[min(max(code, 0), n_codes - 1)]
+        else:
+            result[i] = np.nan
+    return result
+
+
+def fine_codes(fine_ns, lsb, n_codes):
+    """
+    Códigos enteros del interpolador fino
+
+    Returns:
+        tuple: (códigos int64 en [0, n_codes), máscara de valores válidos)
+    """
+    return _codes_numpy(np.asarray(fine_ns, dtype=np.float64), lsb, n_codes)
+
+
+def code_density(fine_ns, lsb, n_codes):
+    """Ocupación de cada código fino (NaN ignorados)"""
+    fine_ns = np.ascontiguousarray(fine_ns, dtype=np.float64)
+    if active_backend() == 'numba':
+        return _numba()['code_density'](fine_ns, float(lsb), int(n_codes))
+    codes, valid = _codes_numpy(fine_ns, lsb, n_codes)
+    return np.bincount(codes[valid], minlength=n_codes)
+
+
+def lut_lookup(fine_ns, lut, lsb):
+    """Valor de la LUT para el código de cada FineNS (NaN donde el original es NaN)"""
+    fine_ns = np.ascontiguousarray(fine_ns, dtype=np.float64)
+    lut = np.ascontiguousarray(lut, dtype=np.float64)
+    if active_backend() == 'numba':
+        return _numba()['lut_lookup'](fine_ns, lut, float(lsb))
+    codes, valid = _codes_numpy(fine_ns, lsb, len(lut))
+    result = np.take(lut, codes)
+    result[~valid] = np.nan
+    return result
@@ -0,0 +1,274 @@
+"""
+Análisis por lote
+Calcula estadísticas, tasas de coincidencia e histogramas de todos los lotes
+(Num_Lote) en una sola pasada vectorizada, opcionalmente repartida en procesos
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import config
+from tdc_core import COARSE_PERIOD_NS, absolute_time_ns, absolute_times, to_numeric
+
+
+# Campos analizados por lote (nombre -> clave del arreglo)
+FIELDS = ['T1_FineNS', 'T2_FineNS', 'T2_T1_ns']
+
+
+def prepare_arrays(df, times=None):
+    """
+    Extraer los arreglos numéricos necesarios para el análisis por lote
+
+    Las filas sin número de lote se descartan.
+
+    Args:
+        df (pd.DataFrame): Datos crudos o procesados
+        times (dict): Tiempos absolutos ya calculados (ver absolute_times)
+
+    Returns:
+        dict: Arreglos float64 'Num_Lote', 'T1_FineNS', 'T2_FineNS' y 'T2_T1_ns'
+    """
+    lotes = to_numeric(df['Num_Lote']).to_numpy()
+    valid = ~np.isnan(lotes)
+    times = absolute_times(df, times)
+    t1, t2 = times['T1'], times['T2']
+    return {
+        'Num_Lote': lotes[valid],
+        'T1_FineNS': to_numeric(df['T1_FineNS']).to_numpy()[valid],
+        'T2_FineNS': to_numeric(df['T2_FineNS']).to_numpy()[valid],
+        'T2_T1_ns': (t2 - t1)[valid],
+    }
+
+
+def histogram_edges(arrays, fine_bins=None, diff_bins=None):
+    """
+    Calcular bordes de histograma comunes a todos los lotes
+
+    FineNS usa el intervalo fijo [0, período]; T2-T1 usa el rango global.
+    """
+    fine_bins = fine_bins or config.FINE_HISTOGRAM_BINS
+    diff_bins = diff_bins or config.TIME_DIFF_HISTOGRAM_BINS
+
+    fine_edges = np.linspace(0.0, COARSE_PERIOD_NS, fine_bins + 1)
+    diff = arrays['T2_T1_ns']
+    finite = diff[np.isfinite(diff)]
+    if len(finite) > 0 and finite.min() < finite.max():
+        diff_edges = np.linspace(finite.min(), finite.max(), diff_bins + 1)
+    else:
+        center = finite[0] if len(finite) > 0 else 0.0
+        diff_edges = np.linspace(center - 0.5, center + 0.5, diff_bins + 1)
+
+    return {
+        'T1_FineNS': fine_edges,
+        'T2_FineNS': fine_edges,
+        'T2_T1_ns': diff_edges,
+    }
+
+
+def _grouped_histogram(codes, n_groups, values, edges):
+    """Histograma de cada grupo en una única llamada a bincount"""
+    n_bins = len(edges) - 1
+    inside = (values >= edges[0]) & (values <= edges[-1])
+    width = (edges[-1] - edges[0]) / n_bins
+    bins = ((values[inside] - edges[0]) / width).astype(np.int64)
+    np.minimum(bins, n_bins - 1, out=bins)
+    flat = codes[inside] * n_bins + bins
+    return np.bincount(flat, minlength=n_groups * n_bins).reshape(n_groups, n_bins)
+
+
+def _lote_kernel(codes, n_groups, arrays, edges, window_ns):
+    """
+    Agregados de cada grupo para códigos ordenados 0..n_groups-1
+
+    Returns:
+        dict: Arreglos por grupo (conteos, sumas, extremos e histogramas)
+    """
+    starts = np.searchsorted(codes, np.arange(n_groups))
+    result = {'Eventos': np.bincount(codes, minlength=n_groups)}
+
+    for field in FIELDS:
+        values = arrays[field]
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        n = np.bincount(codes, weights=valid, minlength=n_groups)
+        total = np.bincount(codes, weights=filled, minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+        # Suma de cuadrados centrada (dos pasadas) para no perder precisión
+        centered = np.where(valid, values - mean[codes], 0.0)
+        result[f'{field}_n'] = n
+        result[f'{field}_mean'] = mean
+        result[f'{field}_m2'] = np.bincount(codes, weights=centered * centered, minlength=n_groups)
+        if len(values) > 0:
+            result[f'{field}_min'] = np.fmin.reduceat(values, starts)
+            result[f'{field}_max'] = np.fmax.reduceat(values, starts)
+        else:
+            result[f'{field}_min'] = np.full(n_groups, np.nan)
+            result[f'{field}_max'] = np.full(n_groups, np.nan)
+        result[f'{field}_hist'] = _grouped_histogram(codes, n_groups, values, edges[field])
+
+    coincident = np.abs(arrays['T2_T1_ns']) <= window_ns
+    result['Coincidencias'] = np.bincount(codes, weights=coincident, minlength=n_groups)
+    return result
+
+
+def _shard_worker(args):
+    """Ejecutar el kernel sobre un subconjunto contiguo de lotes (proceso hijo)"""
+    codes, n_groups, arrays, edges, window_ns = args
+    return _lote_kernel(codes, n_groups, arrays, edges, window_ns)
+
+
+def _run_sharded(codes, n_groups, arrays, edges, window_ns, max_workers):
+    """Repartir los lotes en bloques contiguos y combinar los resultados"""
+    n_shards = max_workers or config.LOTE_MAX_WORKERS or 4
+    n_shards = max(1, min(n_shards, n_groups))
+    group_bounds = np.linspace(0, n_groups, n_shards + 1).astype(np.int64)
+    row_bounds = np.searchsorted(codes, group_bounds)
+
+    tasks = []
+    for k in range(n_shards):
+        lo, hi = row_bounds[k], row_bounds[k + 1]
+        shard_arrays = {field: arrays[field][lo:hi] for field in FIELDS}
+        tasks.append((
+            codes[lo:hi] - group_bounds[k],
+            int(group_bounds[k + 1] - group_bounds[k]),
+            shard_arrays, edges, window_ns
+        ))
+
+    with ProcessPoolExecutor(max_workers=max_workers or config.LOTE_MAX_WORKERS) as pool:
+        parts = list(pool.map(_shard_worker, tasks))
+
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def analyze_lotes(df, window_ns=None, fine_bins=None, diff_bins=None,
+                  parallel=None, max_workers=None, times=None):
+    """
+    Analizar todos los lotes del archivo en una sola pasada
+
+    Args:
+        df (pd.DataFrame): Datos crudos o procesados (con Num_Lote, T1_*, T2_*)
+        window_ns (float): Ventana |T2 - T1| para contar coincidencias
+        fine_bins (int): Bins del histograma FineNS
+        diff_bins (int): Bins del histograma T2 - T1
+        parallel (bool): Forzar (True) o desactivar (False) el reparto en
+            procesos; None decide según config.LOTE_PARALLEL_MIN_ROWS
+        max_workers (int): Número de procesos
+        times (dict): Tiempos absolutos ya calculados (ver absolute_times)
+
+    Returns:
+        dict: 'summary' (DataFrame, una fila por lote), 'histograms'
+              (campo -> matriz lotes × bins), 'edges' (campo -> bordes)
+              y 'lotes' (números de lote en el orden de las filas)
+    """
+    if window_ns is None:
+        window_ns = config.COINCIDENCE_WINDOW_NS
+
+    arrays = prepare_arrays(df, times)
+    edges = histogram_edges(arrays, fine_bins, diff_bins)
+
+    lote_values, codes = np.unique(arrays['Num_Lote'], return_inverse=True)
+    n_groups = len(lote_values)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    arrays = {field: arrays[field][order] for field in FIELDS}
+
+    if parallel is None:
+        parallel = len(codes) >= config.LOTE_PARALLEL_MIN_ROWS
+    if parallel and n_groups > 1:
+        agg = _run_sharded(codes, n_groups, arrays, edges, window_ns, max_workers)
+    else:
+        agg = _lote_kernel(codes, n_groups, arrays, edges, window_ns)
+
+    summary = build_summary(lote_values, agg)
+    return {
+        'summary': summary,
+        'histograms': {field: agg[f'{field}_hist'] for field in FIELDS},
+        'edges': edges,
+        'lotes': lote_values,
+    }
+
+
+def build_summary(lote_values, agg):
+    """Construir la tabla lote por lote a partir de los agregados"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pairs = agg['T2_T1_ns_n']
+        summary = {
+            'Num_Lote': lote_values.astype(np.int64),
+            'Eventos': agg['Eventos'],
+            'Pares válidos': pairs.astype(np.int64),
+            'Coincidencias': agg['Coincidencias'].astype(np.int64),
+            'Tasa coincidencia (%)': np.where(pairs > 0, 100.0 * agg['Coincidencias'] / pairs, np.nan),
+        }
+        for field in FIELDS:
+            n = agg[f'{field}_n']
+            mean = agg[f'{field}_mean']
+            std = np.sqrt(agg[f'{field}_m2'] / (n - 1))
+            summary[f'{field} mínimo'] = agg[f'{field}_min']
+            summary[f'{field} máximo'] = agg[f'{field}_max']
+            summary[f'{field} promedio'] = mean
+            summary[f'{field} std'] = np.where(n > 1, std, np.nan)
+
+    return pd.DataFrame(summary)
+
+
+def _sorted_hits(times, rows):
+    """Tiempos válidos de un canal ordenados, con la fila de origen de cada uno"""
+    valid = np.isfinite(times)
+    times, rows = times[valid], rows[valid]
+    order = np.argsort(times, kind='stable')
+    return times[order], rows[order]
+
+
+def match_coincidences(df, window_ns=None):
+    """
+    Emparejar hits T1 y T2 de cada lote por cercanía en el tiempo
+
+    A diferencia de 'Coincidencias' (|T2 - T1| de una misma fila), los hits de
+    cada canal se ordenan por tiempo y se emparejan como vecinos mutuos dentro
+    de la ventana (kernels.match_windows), de modo que un T2 registrado en otra
+    fila también encuentra su T1.
+
+    Args:
+        df (pd.DataFrame): Datos con Num_Lote, T1_* y T2_*
+        window_ns (float): Ventana de coincidencia (config.COINCIDENCE_WINDOW_NS)
+
+    Returns:
+        pd.DataFrame: Una fila por lote con hits, pares, pares de una misma
+            fila y retardo T2 - T1 de los pares
+    """
+    from kernels import match_windows
+
+    if window_ns is None:
+        window_ns = config.COINCIDENCE_WINDOW_NS
+
+    lotes = to_numeric(df['Num_Lote']).to_numpy()
+    t1 = absolute_time_ns(df, 'T1')
+    t2 = absolute_time_ns(df, 'T2')
+    valid = np.flatnonzero(~np.isnan(lotes))
+    lote_values, codes = np.unique(lotes[valid], return_inverse=True)
+    order = valid[np.argsort(codes, kind='stable')]
+    bounds = np.searchsorted(np.sort(codes), np.arange(len(lote_values) + 1))
+
+    rows = []
+    for k, lote in enumerate(lote_values):
+        group = order[bounds[k]:bounds[k + 1]]
+        t1_sorted, t1_rows = _sorted_hits(t1[group], group)
+        t2_sorted, t2_rows = _sorted_hits(t2[group], group)
+        match = match_windows(t1_sorted, t2_sorted, window_ns)
+        paired = match >= 0
+        delay = t2_sorted[match[paired]] - t1_sorted[paired]
+        rows.append({
+            'Num_Lote': int(lote),
+            'Hits T1': len(t1_sorted),
+            'Hits T2': len(t2_sorted),
+            'Pares': int(paired.sum()),
+            'Pares misma fila': int((t1_rows[paired] == t2_rows[match[paired]]).sum()),
+            'Retardo promedio (ns)': delay.mean() if len(delay) else np.nan,
+            'Retardo std (ns)': delay.std(ddof=1) if len(delay) > 1 else np.nan,
+        })
+    columns = ['Num_Lote', 'Hits T1', 'Hits T2', 'Pares', 'Pares misma fila',
+               'Retardo promedio (ns)', 'Retardo std (ns)']
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,274 @@
+"""
+Archivo Parquet particionado de runs procesados
+Guarda cada run procesado en un dataset Parquet con particiones estilo Hive:
+
+    <raíz>/date=2026-02-14/run=<run>/lote=<n>/part-0.parquet
+                                    /_run.json      origen, parámetros y filas
+
+Dentro de cada lote las filas se ordenan por tiempo reconstruido y se agrega
+la columna config.ARCHIVE_TIME_COLUMN (ns). Cada archivo se escribe en grupos
+de config.ARCHIVE_ROW_GROUP_ROWS filas con estadísticas mínimo/máximo por
+columna, de modo que read_archive lee solo las particiones de los lotes,
+runs y fechas pedidos y, dentro de ellas, solo los grupos cuyo rango de
+tiempo se cruza con el pedido.
+
+Agregar un run escribe únicamente su carpeta run=<run> (primero con un nombre
+temporal y luego renombrada), sin tocar las particiones existentes.
+
+Requiere pyarrow (opcional: pip install pyarrow).
+"""
+
+import importlib.util
+import json
+import os
+import re
+import shutil
+from datetime import date as Date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from tdc_core import to_numeric
+from time_sort import sort_keys
+
+
+# Valor de partición de las filas sin número de lote (convención de Hive)
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+RUN_INFO_FILE = '_run.json'
+
+
+def archive_available():
+    """Indicar si pyarrow está instalado (sin importarlo)"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _pyarrow():
+    """
+    Importar pyarrow
+
+    Raises:
+        ImportError: Si pyarrow no está instalado
+    """
+    if not archive_available():
+        raise ImportError("El archivo Parquet requiere pyarrow (pip install pyarrow)")
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    return pa, ds, pq
+
+
+def run_name(source=None):
+    """
+    Nombre de run válido como valor de partición
+
+    Args:
+        source (str | list): Archivo de origen (se usa su nombre sin extensión)
+
+    Returns:
+        str: Solo letras, dígitos, '.', '_' y '-'
+    """
+    if isinstance(source, (list, tuple)):
+        source = source[0] if source else None
+    name = Path(source).stem if source else datetime.now().strftime('%Y%m%d-%H%M%S')
+    return re.sub(r'[^A-Za-z0-9._-]', '_', name) or 'run'
+
+
+def run_date(source=None, date=None):
+    """
+    Fecha de la partición: la indicada, la del archivo de origen o la de hoy
+
+    Returns:
+        str: 'YYYY-MM-DD'
+    """
+    if date is not None:
+        return date.isoformat() if isinstance(date, Date) else Date.fromisoformat(str(date)).isoformat()
+    if isinstance(source, (list, tuple)):
+        source = source[0] if source else None
+    if source and os.path.exists(source):
+        return datetime.fromtimestamp(os.path.getmtime(source)).date().isoformat()
+    return Date.today().isoformat()
+
+
+def _lote_partitions(df):
+    """
+    Filas de cada lote ordenadas por tiempo
+
+    Yields:
+        tuple: (valor de partición, DataFrame con la columna de tiempo)
+    """
+    keys = sort_keys(df)
+    lotes = to_numeric(df['Num_Lote']).to_numpy() if 'Num_Lote' in df.columns else np.full(len(df), np.nan)
+    # Orden por lote (sin lote al final) y, dentro del lote, por tiempo
+    lote_key = np.nan_to_num(lotes, nan=np.inf)
+    order = np.lexsort((keys, lote_key))
+    lotes, lote_key = lotes[order], lote_key[order]
+    data = df.iloc[order].assign(**{config.ARCHIVE_TIME_COLUMN: keys[order]})
+
+    starts = np.flatnonzero(np.r_[True, lote_key[1:] != lote_key[:-1]])
+    ends = np.r_[starts[1:], len(lotes)]
+    for start, end in zip(starts, ends):
+        value = lotes[start]
+        partition = NULL_PARTITION if np.isnan(value) else str(int(value))
+        yield partition, data.iloc[start:end].reset_index(drop=True)
+
+
+def archive_run(df, root, run=None, date=None, source=None, params=None, replace=False):
+    """
+    Agregar un run procesado al archivo
+
+    Args:
+        df (pd.DataFrame): Datos procesados
+        root (str): Carpeta raíz del dataset
+        run (str): Nombre del run (por defecto el del archivo de origen)
+        date (str | date): Fecha de la partición (por defecto la del archivo de origen)
+        source (str): Archivo de origen (queda registrado en _run.json)
+        params (dict): Parámetros del procesamiento (quedan registrados)
+        replace (bool): Reemplazar el run si ya existe con la misma fecha
+
+    Raises:
+        FileExistsError: Si el run ya existe y replace es False
+        ImportError: Si pyarrow no está instalado
+
+    Returns:
+        Path: Carpeta del run escrito
+    """
+    pa, _, pq = _pyarrow()
+    run = run_name(run or source)
+    date = run_date(source, date)
+    target = Path(root) / f'date={date}' / f'run={run}'
+    if target.exists() and not replace:
+        raise FileExistsError(f"El run ya está archivado: {target}")
+
+    # Se escribe aparte y se renombra al final: un run queda completo o no aparece
+    # (el prefijo '.' hace que los lectores ignoren la carpeta temporal)
+    temporary = target.with_name(f'.{target.name}.{os.getpid()}.tmp')
+    if temporary.exists():
+        shutil.rmtree(temporary)
+    lotes = []
+    try:
+        for partition, part in _lote_partitions(df):
+            folder = temporary / f'lote={partition}'
+            folder.mkdir(parents=True)
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            pq.write_table(
+                table, folder / 'part-0.parquet',
+                row_group_size=config.ARCHIVE_ROW_GROUP_ROWS,
+                compression=config.ARCHIVE_COMPRESSION,
+                write_statistics=True,
+            )
+            lotes.append(partition)
+
+        info = {
+            'run': run,
+            'date': date,
+            'source': str(source) if source is not None else None,
+            'params': params,
+            'rows': len(df),
+            'lotes': lotes,
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+        temporary.mkdir(parents=True, exist_ok=True)
+        (temporary / RUN_INFO_FILE).write_text(
+            json.dumps(info, indent=2, ensure_ascii=False, default=str), encoding='utf-8'
+        )
+
+        if target.exists():
+            previous = target.with_name(f'.{target.name}.{os.getpid()}.old')
+            os.replace(target, previous)
+            os.replace(temporary, target)
+            shutil.rmtree(previous)
+        else:
+            os.replace(temporary, target)
+    finally:
+        if temporary.exists():
+            shutil.rmtree(temporary)
+    return target
+
+
+def archive_index(root):
+    """
+    Particiones del archivo (sin leer los datos)
+
+    Returns:
+        pd.DataFrame: Una fila por (fecha, run, lote) con archivos y bytes
+    """
+    rows = []
+    for folder in sorted(Path(root).glob('date=*/run=*/lote=*')):
+        files = list(folder.glob('*.parquet'))
+        rows.append({
+            'date': folder.parent.parent.name.split('=', 1)[1],
+            'run': folder.parent.name.split('=', 1)[1],
+            'lote': folder.name.split('=', 1)[1],
+            'archivos': len(files),
+            'bytes': sum(path.stat().st_size for path in files),
+        })
+    return pd.DataFrame(rows, columns=['date', 'run', 'lote', 'archivos', 'bytes'])
+
+
+def run_info(root):
+    """
+    Registro _run.json de cada run archivado
+
+    Returns:
+        list: dict por run (origen, parámetros, filas, lotes, fecha de escritura)
+    """
+    return [
+        json.loads(path.read_text(encoding='utf-8'))
+        for path in sorted(Path(root).glob(f'date=*/run=*/{RUN_INFO_FILE}'))
+    ]
+
+
+def archive_dataset(root):
+    """Dataset de pyarrow con las particiones date (texto), run (texto) y lote (entero)"""
+    pa, ds, _ = _pyarrow()
+    partitioning = ds.partitioning(
+        pa.schema([('date', pa.string()), ('run', pa.string()), ('lote', pa.int64())]),
+        flavor='hive'
+    )
+    return ds.dataset(str(root), format='parquet', partitioning=partitioning)
+
+
+def read_archive(root, lotes=None, runs=None, dates=None, time_range=None, columns=None):
+    """
+    Leer del archivo solo las particiones y grupos de filas necesarios
+
+    Args:
+        root (str): Carpeta raíz del dataset
+        lotes (list): Números de lote (None = todos)
+        runs (list): Nombres de run (None = todos)
+        dates (tuple): (desde, hasta) 'YYYY-MM-DD' inclusive; None en un
+            extremo lo deja abierto
+        time_range (tuple): (desde, hasta) en ns sobre config.ARCHIVE_TIME_COLUMN
+        columns (list): Columnas a leer (None = todas, con date, run y lote)
+
+    Returns:
+        pd.DataFrame: Filas seleccionadas
+    """
+    _, ds, _ = _pyarrow()
+    conditions = []
+    if lotes is not None:
+        conditions.append(ds.field('lote').isin([int(lote) for lote in lotes]))
+    if runs is not None:
+        conditions.append(ds.field('run').isin([str(run) for run in runs]))
+    if dates is not None:
+        start, end = dates
+        if start is not None:
+            conditions.append(ds.field('date') >= run_date(date=start))
+        if end is not None:
+            conditions.append(ds.field('date') <= run_date(date=end))
+    if time_range is not None:
+        start, end = time_range
+        time = ds.field(config.ARCHIVE_TIME_COLUMN)
+        if start is not None:
+            conditions.append(time >= float(start))
+        if end is not None:
+            conditions.append(time <= float(end))
+
+    condition = None
+    for item in conditions:
+        condition = item if condition is None else condition & item
+    table = archive_dataset(root).to_table(columns=columns, filter=condition)
+    return table.to_pandas()
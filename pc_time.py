@@ -0,0 +1,281 @@
+"""
+Hora del PC (Timestamp_PC)
+Convierte la columna de texto Timestamp_PC ('17:19:38.494') en milisegundos
+int64 desde la medianoche del primer día del run, con un parser de formato
+fijo: cada valor distinto se convierte una sola vez mirando sus bytes como
+una matriz de dígitos (sin inferencia de formatos de to_datetime). Los
+valores con otro formato se convierten con pd.to_timedelta.
+
+Los cruces de medianoche se detectan en el orden del archivo: un retroceso de
+más de medio día suma un día a todas las filas siguientes.
+
+La hora resultante es numérica y ordenable, de modo que los filtros por hora
+usan el índice ordenado de filter_expression (búsqueda binaria) y se pueden
+relacionar los lotes del PC con el tiempo del hardware. No se agrega a las
+columnas de los datos (no se exporta ni se normaliza): queda en el contexto de
+filtro de cada DataFrame, donde las expresiones la nombran config.PC_TIME_COLUMN.
+"""
+
+import numpy as np
+import pandas as pd
+
+import config
+from filter_expression import filter_context
+from kernels import unwrap_valid
+from tdc_core import absolute_time_ns
+
+
+DAY_MS = 24 * 3600 * 1000
+
+# Valor de las filas sin hora válida
+MISSING_TIME = -1
+
+# Formato fijo HH:MM:SS.mmm (posiciones de los separadores y de los dígitos)
+_FIXED_LENGTH = 12
+_SEPARATORS = {2: ord(':'), 5: ord(':'), 8: ord('.')}
+_DIGIT_WEIGHTS = {
+    0: 10 * 3600_000, 1: 3600_000,
+    3: 10 * 60_000, 4: 60_000,
+    6: 10_000, 7: 1000,
+    9: 100, 10: 10, 11: 1,
+}
+
+
+def parse_clock(values):
+    """
+    Convertir textos 'HH:MM:SS.mmm' a milisegundos desde la medianoche
+
+    Args:
+        values (array-like): Textos (sin repetir, normalmente los valores distintos)
+
+    Returns:
+        np.ndarray: int64; MISSING_TIME donde el texto no es una hora válida
+    """
+    strings = [str(value).strip() for value in values]
+    result = np.full(len(strings), MISSING_TIME, dtype=np.int64)
+    if len(strings) == 0:
+        return result
+
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+    text = np.array(strings, dtype=f'S{_FIXED_LENGTH}')
+    chars = text.view(np.uint8).reshape(len(text), _FIXED_LENGTH)
+    fixed = lengths == _FIXED_LENGTH
+    for position, separator in _SEPARATORS.items():
+        fixed &= chars[:, position] == separator
+    digits = chars.astype(np.int64) - ord('0')
+    total = np.zeros(len(text), dtype=np.int64)
+    for position, weight in _DIGIT_WEIGHTS.items():
+        fixed &= (digits[:, position] >= 0) & (digits[:, position] <= 9)
+        total += digits[:, position] * weight
+    fixed &= total < DAY_MS
+    result[fixed] = total[fixed]
+
+    # Otros formatos ('7:05:01', '17:19:38.4'): conversión general, solo para esos valores
+    others = np.flatnonzero(~fixed & (lengths > 0))
+    if len(others):
+        parsed = pd.to_timedelta(
+            pd.Series([strings[k] for k in others], dtype=object), errors='coerce'
+        ).to_numpy(dtype='timedelta64[ms]')
+        valid = ~np.isnat(parsed)
+        milliseconds = parsed[valid].astype(np.int64)
+        in_day = (milliseconds >= 0) & (milliseconds < DAY_MS)
+        result[others[valid][in_day]] = milliseconds[in_day]
+    return result
+
+
+def unroll_days(clock_ms):
+    """
+    Sumar un día en cada cruce de medianoche (en el orden de las filas)
+
+    Args:
+        clock_ms (np.ndarray): Hora del día en ms (MISSING_TIME = sin dato)
+
+    Returns:
+        np.ndarray: ms desde la medianoche del primer día
+    """
+    return unwrap_valid(clock_ms, DAY_MS, clock_ms != MISSING_TIME)
+
+
+def pc_time_ms(series):
+    """
+    Hora del PC de cada fila en ms desde la medianoche del primer día
+
+    Cada valor distinto se convierte una sola vez (las filas de un mismo
+    lote del PC comparten el texto).
+
+    Args:
+        series (pd.Series): Columna Timestamp_PC (texto o categórica)
+
+    Returns:
+        np.ndarray: int64; MISSING_TIME en las filas sin hora válida
+    """
+    codes, uniques = pd.factorize(series)
+    clock = np.append(parse_clock(uniques), MISSING_TIME)
+    # Código -1 (vacío) -> último elemento (MISSING_TIME)
+    return unroll_days(clock.take(codes))
+
+
+def pc_time_values(df):
+    """
+    Hora del PC de cada fila de df, calculada una vez por DataFrame
+
+    Returns:
+        np.ndarray: int64 en ms del run (None si df no tiene Timestamp_PC)
+    """
+    if 'Timestamp_PC' not in df.columns and config.PC_TIME_COLUMN not in df.columns:
+        return None
+    return filter_context(df).column(config.PC_TIME_COLUMN)
+
+
+def index_pc_time(df):
+    """Convertir e indexar la hora del PC de df (al cargar, ver config.PARSE_PC_TIME_ON_LOAD)"""
+    if pc_time_values(df) is not None:
+        filter_context(df).index(config.PC_TIME_COLUMN)
+    return df
+
+
+def format_clock(ms):
+    """Texto 'HH:MM:SS.mmm' (con '+Nd' si es de un día posterior)"""
+    if ms is None or ms == MISSING_TIME:
+        return '-'
+    ms = int(ms)
+    days, ms = divmod(ms, DAY_MS)
+    hours, ms = divmod(ms, 3600_000)
+    minutes, ms = divmod(ms, 60_000)
+    seconds, ms = divmod(ms, 1000)
+    text = f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+    return f"{text} +{days}d" if days else text
+
+
+def clock_to_run_ms(text, first_ms):
+    """
+    Convertir una hora escrita por el usuario a ms del run (día de inicio del run)
+
+    Args:
+        text (str): 'HH:MM', 'HH:MM:SS' o 'HH:MM:SS.mmm'
+        first_ms (int): Primer valor de la columna de hora del PC
+
+    Raises:
+        ValueError: Si el texto no es una hora válida
+    """
+    text = text.strip()
+    if text.count(':') == 1:
+        text += ':00'
+    value = int(parse_clock([text])[0])
+    if value == MISSING_TIME:
+        raise ValueError(f"Hora inválida: {text} (use HH:MM:SS.mmm)")
+    if first_ms is not None and first_ms != MISSING_TIME:
+        value += (int(first_ms) // DAY_MS) * DAY_MS
+    return value
+
+
+def pc_time_bounds(start, end, first_ms, last_ms=None):
+    """
+    Límites en ms del run de un rango de horas del PC
+
+    Un "desde" anterior a la hora de inicio del run se toma como del día
+    siguiente si el run cruza la medianoche (su última hora es del día
+    siguiente); si no, se lleva al inicio del run. "Hasta" se ubica en el
+    día de "desde" (o del inicio del run, sin "desde") y pasa al día
+    siguiente solo si queda antes que él.
+
+    Args:
+        start (str): Hora inicial ('' = desde el inicio del run)
+        end (str): Hora final ('' = hasta el final)
+        first_ms (int): Primer valor de la hora del PC (None si no hay)
+        last_ms (int): Último valor de la hora del PC (None si no hay)
+
+    Raises:
+        ValueError: Si una hora no es válida
+
+    Returns:
+        tuple: (mínimo, máximo) inclusive
+    """
+    run_start = first_ms if first_ms is not None and first_ms != MISSING_TIME else 0
+    low = run_start
+    if start:
+        low = clock_to_run_ms(start, first_ms)
+        if low < run_start:
+            crosses = last_ms is not None and last_ms >= (run_start // DAY_MS + 1) * DAY_MS
+            low = low + DAY_MS if crosses else run_start
+
+    high = np.iinfo(np.int64).max
+    if end:
+        high = clock_to_run_ms(end, None) + (low // DAY_MS) * DAY_MS
+        if high < low:
+            high += DAY_MS
+    return low, high
+
+
+def pc_time_range(df):
+    """(primera, última) hora del PC válida en ms, o (None, None)"""
+    values = pc_time_values(df)
+    if values is None:
+        return None, None
+    values = values[values != MISSING_TIME]
+    if len(values) == 0:
+        return None, None
+    return int(values.min()), int(values.max())
+
+
+def pc_hardware_correlation(df, channel='T1'):
+    """
+    Relacionar cada lote del PC (filas con la misma hora) con el tiempo del hardware
+
+    Ajusta por mínimos cuadrados hora_PC = offset + pendiente · t_hardware sobre
+    el tiempo medio de cada lote; la pendiente expresa la deriva del reloj del
+    PC respecto del TDC.
+
+    Args:
+        df (pd.DataFrame): Datos con Timestamp_PC
+        channel (str): Canal del tiempo de hardware ('T1' o 'T2')
+
+    Raises:
+        ValueError: Si df no tiene Timestamp_PC
+
+    Returns:
+        dict: 'batches' (DataFrame, una fila por hora del PC), 'offset_ms',
+              'drift_ppm' y 'residual_ms' (desvío estándar del ajuste)
+    """
+    pc = pc_time_values(df)
+    if pc is None:
+        raise ValueError("Los datos no tienen Timestamp_PC")
+    hardware = absolute_time_ns(df, channel)
+    valid = (pc != MISSING_TIME) & np.isfinite(hardware)
+    batch_ms, codes = np.unique(pc[valid], return_inverse=True)
+    hardware = hardware[valid]
+    n = len(batch_ms)
+
+    counts = np.bincount(codes, minlength=n)
+    mean_ns = np.bincount(codes, weights=hardware, minlength=n) / np.maximum(counts, 1)
+    order = np.argsort(codes, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    if len(order):
+        first_ns = np.minimum.reduceat(hardware[order], starts)
+        last_ns = np.maximum.reduceat(hardware[order], starts)
+    else:
+        first_ns = last_ns = np.empty(0)
+
+    batches = pd.DataFrame({
+        'Hora PC': [format_clock(ms) for ms in batch_ms],
+        'PC (ms)': batch_ms,
+        'Filas': counts,
+        f'{channel} primero (ns)': first_ns,
+        f'{channel} último (ns)': last_ns,
+        f'{channel} medio (ns)': mean_ns,
+    })
+
+    offset_ms = drift_ppm = residual_ms = np.nan
+    if n >= 2 and np.ptp(mean_ns) > 0:
+        slope, offset_ms = np.polyfit(mean_ns, batch_ms.astype(np.float64), 1)
+        # ms por ns -> partes por millón respecto de 1e-6 ms/ns
+        drift_ppm = (slope / 1e-6 - 1.0) * 1e6
+        residual_ms = float(np.std(batch_ms - (offset_ms + slope * mean_ns)))
+        batches['Residuo (ms)'] = batch_ms - (offset_ms + slope * mean_ns)
+
+    return {
+        'batches': batches,
+        'offset_ms': float(offset_ms),
+        'drift_ppm': float(drift_ppm),
+        'residual_ms': float(residual_ms),
+    }
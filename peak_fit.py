@@ -0,0 +1,321 @@
+"""
+Ajuste del pico T2 - T1 (resolución temporal)
+Histograma las diferencias T2 - T1 de cada lote y ajusta dos modelos:
+
+    Gauss       A · exp(-(x - μ)² / 2σ²)
+    Gauss+cte   A · exp(-(x - μ)² / 2σ²) + B
+
+Los ajustes se hacen sobre los conteos por bin (no sobre los pares), de modo
+que su costo no depende del número de hits, y todos los lotes se ajustan a la
+vez: cada iteración de Levenberg-Marquardt resuelve un sistema pequeño por
+lote con una sola llamada vectorizada (np.linalg.solve sobre lotes × P × P).
+
+Se maximiza la verosimilitud de Poisson de los conteos (pasos de Fisher con
+pesos 1/modelo), que no se sesga con bins de pocas entradas; la bondad del
+ajuste se informa como desviación de Poisson / grados de libertad.
+
+El rango de cada lote se centra en la mediana de los pares dentro de la
+ventana de coincidencia, con un semiancho de config.PEAK_FIT_RANGE_SIGMAS
+sigmas robustas (IQR / 1,349), sin salir de la ventana.
+"""
+
+import numpy as np
+import pandas as pd
+
+import config
+from lote_analysis import prepare_arrays
+
+
+MODELS = ('Gauss', 'Gauss+cte')
+
+# FWHM de una gaussiana en unidades de σ
+FWHM_FACTOR = 2.0 * np.sqrt(2.0 * np.log(2.0))
+
+# Piso del modelo (evita dividir por cero en las colas)
+_MODEL_FLOOR = 1e-9
+
+
+def _group_quantiles(codes, values, n_groups, quantiles):
+    """
+    Cuantiles de cada grupo con un único ordenamiento
+
+    Returns:
+        tuple: (matriz grupos × cuantiles, entradas por grupo)
+    """
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    has_data = counts > 0
+    for k, q in enumerate(quantiles):
+        position = starts + np.floor(q * (counts - 1)).astype(np.int64)
+        result[has_data, k] = sorted_values[position[has_data]]
+    return result, counts
+
+
+def peak_histograms(df, window_ns=None, bins=None, range_sigmas=None, times=None):
+    """
+    Histograma T2 - T1 de cada lote en su propio rango
+
+    Args:
+        df (pd.DataFrame): Datos crudos o procesados
+        window_ns (float): Ventana |T2 - T1| de los pares considerados
+            (por defecto config.COINCIDENCE_WINDOW_NS)
+        bins (int): Bins por lote (config.PEAK_FIT_BINS)
+        range_sigmas (float): Semiancho del rango en sigmas robustas
+        times (dict): Tiempos absolutos ya calculados (ver absolute_times)
+
+    Returns:
+        dict: 'lotes', 'centers' y 'counts' (lotes × bins), 'width' (ancho de
+              bin por lote) y 'pairs' (pares dentro de la ventana por lote)
+    """
+    if window_ns is None:
+        window_ns = config.COINCIDENCE_WINDOW_NS
+    bins = bins or config.PEAK_FIT_BINS
+    if range_sigmas is None:
+        range_sigmas = config.PEAK_FIT_RANGE_SIGMAS
+
+    arrays = prepare_arrays(df, times)
+    lote_values = np.unique(arrays['Num_Lote'])
+    diff = arrays['T2_T1_ns']
+    inside = np.abs(diff) <= window_ns
+    codes = np.searchsorted(lote_values, arrays['Num_Lote'][inside])
+    diff = diff[inside]
+    n_groups = len(lote_values)
+
+    quantiles, pairs = _group_quantiles(codes, diff, n_groups, (0.25, 0.5, 0.75))
+    q25, median, q75 = quantiles.T
+    sigma = (q75 - q25) / 1.349
+    half = np.where(sigma > 0, range_sigmas * sigma, window_ns)
+    low = np.maximum(median - half, -window_ns)
+    high = np.minimum(median + half, window_ns)
+    # Lotes sin pares o con un único valor: rango mínimo para no dividir por cero
+    degenerate = ~(high > low)
+    low = np.where(degenerate, np.nan_to_num(median) - 0.5, low)
+    high = np.where(degenerate, np.nan_to_num(median) + 0.5, high)
+    width = (high - low) / bins
+
+    # Un solo bincount para los histogramas de todos los lotes
+    position = (diff - low[codes]) / width[codes]
+    in_range = (position >= 0) & (position <= bins)
+    bin_index = np.minimum(position[in_range].astype(np.int64), bins - 1)
+    counts = np.bincount(
+        codes[in_range] * bins + bin_index, minlength=n_groups * bins
+    ).reshape(n_groups, bins).astype(np.float64)
+    centers = low[:, None] + (np.arange(bins) + 0.5) * width[:, None]
+
+    return {
+        'lotes': lote_values,
+        'centers': centers,
+        'counts': counts,
+        'width': width,
+        'pairs': pairs,
+    }
+
+
+def _model(params, x, background):
+    """Modelo y jacobiano (lotes × bins × parámetros)"""
+    amplitude, mu, sigma = params[:, 0:1], params[:, 1:2], params[:, 2:3]
+    z = (x - mu) / sigma
+    gauss = np.exp(-0.5 * z * z)
+    value = amplitude * gauss
+    columns = [gauss, value * z / sigma, value * z * z / sigma]
+    if background:
+        value = value + params[:, 3:4]
+        columns.append(np.ones_like(x))
+    return value, np.stack(columns, axis=-1)
+
+
+def _deviance(counts, value):
+    """Desviación de Poisson por lote (2 · log del cociente de verosimilitudes)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_term = np.where(counts > 0, counts * np.log(counts / value), 0.0)
+    return 2.0 * np.sum(value - counts + log_term, axis=1)
+
+
+def _initial_params(x, counts, background):
+    """Estimación inicial por momentos (sobre los conteos menos el fondo)"""
+    edge = max(1, counts.shape[1] // 10)
+    if background:
+        floor = np.minimum(counts[:, :edge].mean(axis=1), counts[:, -edge:].mean(axis=1))
+    else:
+        floor = np.zeros(len(counts))
+    signal = np.clip(counts - floor[:, None], 0.0, None)
+    total = signal.sum(axis=1)
+    safe_total = np.where(total > 0, total, 1.0)
+    mu = (signal * x).sum(axis=1) / safe_total
+    sigma = np.sqrt((signal * (x - mu[:, None]) ** 2).sum(axis=1) / safe_total)
+    width = x[:, 1] - x[:, 0] if x.shape[1] > 1 else np.ones(len(x))
+    sigma = np.maximum(sigma, 0.5 * np.abs(width))
+    amplitude = np.maximum(signal.max(axis=1), 1.0)
+    columns = [amplitude, mu, sigma]
+    if background:
+        columns.append(floor)
+    return np.column_stack(columns)
+
+
+def fit_histograms(centers, counts, background=False, max_iter=None, tolerance=1e-8):
+    """
+    Ajustar una gaussiana (con o sin fondo constante) a cada fila de counts
+
+    Levenberg-Marquardt vectorizado: en cada iteración todos los lotes aún
+    activos dan un paso de Fisher amortiguado, que se acepta solo si reduce
+    su desviación.
+
+    Args:
+        centers (np.ndarray): Centros de bin (lotes × bins)
+        counts (np.ndarray): Conteos (lotes × bins)
+        background (bool): Incluir el fondo constante B
+        max_iter (int): Iteraciones máximas (config.PEAK_FIT_MAX_ITER)
+        tolerance (float): Cambio relativo de la desviación para converger
+
+    Returns:
+        dict: 'params' y 'errors' (lotes × P: A, μ, σ[, B]), 'deviance',
+              'ndf', 'iterations' y 'converged' por lote
+    """
+    max_iter = max_iter or config.PEAK_FIT_MAX_ITER
+    x = np.asarray(centers, dtype=np.float64)
+    y = np.asarray(counts, dtype=np.float64)
+    n_groups, n_params = len(y), 4 if background else 3
+
+    params = _initial_params(x, y, background)
+    value, jacobian = _model(params, x, background)
+    value = np.maximum(value, _MODEL_FLOOR)
+    deviance = _deviance(y, value)
+    damping = np.full(n_groups, 1e-3)
+    iterations = np.zeros(n_groups, dtype=np.int64)
+    converged = np.zeros(n_groups, dtype=bool)
+    active = y.sum(axis=1) > 0
+    eye = np.eye(n_params)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        weights = 1.0 / value[idx]
+        # Información de Fisher y gradiente de la log-verosimilitud de Poisson
+        fisher = np.einsum('gbi,gb,gbj->gij', jacobian[idx], weights, jacobian[idx])
+        gradient = np.einsum('gbi,gb->gi', jacobian[idx], (y[idx] - value[idx]) * weights)
+        diagonal = np.einsum('gii->gi', fisher)
+        system = fisher + (damping[idx, None] * diagonal + 1e-12)[:, :, None] * eye
+        try:
+            step = np.linalg.solve(system, gradient[:, :, None])[:, :, 0]
+        except np.linalg.LinAlgError:
+            step = np.einsum('gij,gj->gi', np.linalg.pinv(system), gradient)
+
+        trial = params[idx] + step
+        trial[:, 2] = np.abs(trial[:, 2])
+        if background:
+            trial[:, 3] = np.maximum(trial[:, 3], 0.0)
+        trial_value, trial_jacobian = _model(trial, x[idx], background)
+        trial_value = np.maximum(trial_value, _MODEL_FLOOR)
+        trial_deviance = _deviance(y[idx], trial_value)
+
+        accept = np.isfinite(trial_deviance) & (trial_deviance <= deviance[idx])
+        accepted = idx[accept]
+        change = np.abs(deviance[accepted] - trial_deviance[accept])
+        params[accepted] = trial[accept]
+        value[accepted] = trial_value[accept]
+        jacobian[accepted] = trial_jacobian[accept]
+        deviance[accepted] = trial_deviance[accept]
+        damping[idx] = np.where(accept, damping[idx] * 0.1, damping[idx] * 10.0)
+        iterations[idx] += 1
+
+        done = accepted[change <= tolerance * np.maximum(deviance[accepted], 1.0)]
+        converged[done] = True
+        active[done] = False
+        # Amortiguación excesiva: el paso ya no mejora (mínimo alcanzado)
+        stalled = idx[damping[idx] > 1e10]
+        converged[stalled] = True
+        active[stalled] = False
+
+    # Errores: raíz de la diagonal de la inversa de la información de Fisher
+    fisher = np.einsum('gbi,gb,gbj->gij', jacobian, 1.0 / value, jacobian)
+    errors = np.full((n_groups, n_params), np.nan)
+    fitted = y.sum(axis=1) > 0
+    if fitted.any():
+        covariance = np.linalg.pinv(fisher[fitted])
+        errors[fitted] = np.sqrt(np.abs(np.einsum('gii->gi', covariance)))
+    params[~fitted] = np.nan
+    deviance[~fitted] = np.nan
+
+    return {
+        'params': params,
+        'errors': errors,
+        'deviance': deviance,
+        'ndf': y.shape[1] - n_params,
+        'iterations': iterations,
+        'converged': converged & fitted,
+    }
+
+
+def fit_summary(histograms, fits, min_entries=None):
+    """
+    Tabla con una fila por lote y modelo
+
+    Args:
+        histograms (dict): Resultado de peak_histograms
+        fits (dict): Modelo -> resultado de fit_histograms
+        min_entries (int): Lotes con menos pares quedan sin ajuste (NaN)
+    """
+    if min_entries is None:
+        min_entries = config.PEAK_FIT_MIN_ENTRIES
+    entries = histograms['counts'].sum(axis=1)
+    enough = entries >= min_entries
+    width = histograms['width']
+
+    frames = []
+    for model, fit in fits.items():
+        params = np.where(enough[:, None], fit['params'], np.nan)
+        errors = np.where(enough[:, None], fit['errors'], np.nan)
+        amplitude, mu, sigma = params[:, 0], params[:, 1], params[:, 2]
+        background = params[:, 3] if params.shape[1] > 3 else np.zeros(len(params))
+        frames.append(pd.DataFrame({
+            'Num_Lote': histograms['lotes'].astype(np.int64),
+            'Modelo': model,
+            'Pares': histograms['pairs'].astype(np.int64),
+            'En rango': entries.astype(np.int64),
+            'μ (ns)': mu,
+            'Error μ (ns)': errors[:, 1],
+            'σ (ns)': sigma,
+            'Error σ (ns)': errors[:, 2],
+            'FWHM (ns)': FWHM_FACTOR * sigma,
+            # Área de la gaussiana en eventos
+            'Señal': amplitude * sigma * np.sqrt(2.0 * np.pi) / width,
+            'Fondo (por bin)': np.where(enough, background, np.nan),
+            'Desviación/ndf': fit['deviance'] / fit['ndf'],
+            'Iteraciones': fit['iterations'],
+            'Convergió': fit['converged'] & enough,
+        }))
+
+    summary = pd.concat(frames, ignore_index=True)
+    # Ordenar por lote manteniendo el orden de los modelos
+    return summary.sort_values('Num_Lote', kind='stable').reset_index(drop=True)
+
+
+def analyze_peaks(df, window_ns=None, bins=None, range_sigmas=None, times=None):
+    """
+    Histogramar y ajustar el pico T2 - T1 de todos los lotes
+
+    Args:
+        df (pd.DataFrame): Datos crudos o procesados
+        window_ns (float): Ventana |T2 - T1| de los pares considerados
+        bins (int): Bins por lote
+        range_sigmas (float): Semiancho del rango en sigmas robustas
+        times (dict): Tiempos absolutos ya calculados (ver absolute_times)
+
+    Returns:
+        dict: 'summary' (DataFrame, una fila por lote y modelo),
+              'histograms' (ver peak_histograms) y 'fits' (modelo -> parámetros)
+    """
+    histograms = peak_histograms(df, window_ns, bins, range_sigmas, times)
+    fits = {
+        model: fit_histograms(histograms['centers'], histograms['counts'], background=background)
+        for model, background in zip(MODELS, (False, True))
+    }
+    return {
+        'summary': fit_summary(histograms, fits),
+        'histograms': histograms,
+        'fits': fits,
+    }
@@ -0,0 +1,370 @@
+"""
+Pipeline de procesamiento
+Filtros, conversión decimal y normalización compartidos por la interfaz
+avanzada, el procesamiento por lotes y los reportes, y el grafo de etapas
+(processing_graph) con que la interfaz ejecuta el procesamiento completo
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import config
+from filter_expression import filter_context, filter_mask
+from fine_calibration import FineCalibration, load_calibration
+from tdc_core import to_numeric
+
+
+# pandas >= 3 aplica copy-on-write: las copias no duplican memoria hasta escribir
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+# Parámetros por defecto (mismas claves que DataProcessingThread.params)
+DEFAULT_PARAMS = {
+    'lote_number': config.DEFAULT_LOTE_NUMBER,
+    'min_index': config.DEFAULT_MIN_INDEX,
+    'max_index': config.DEFAULT_MAX_INDEX,
+    'remove_nulls': config.DEFAULT_REMOVE_NULLS,
+    'normalize': config.DEFAULT_NORMALIZE,
+    'all_lotes': False,
+    'coincidence_window': config.COINCIDENCE_WINDOW_NS,
+    'calibrate_fine': False,
+    'calibration_file': config.FINE_CALIBRATION_FILE,
+    'analyze_gaps': False,
+    'analyze_rates': False,
+    'rate_window': config.RATE_WINDOW_NS,
+    'fit_peaks': False,
+    'filter_expression': '',
+    'pc_time_from': '',
+    'pc_time_to': '',
+}
+
+
+def complete_params(params=None):
+    """Completar un diccionario de parámetros con los valores por defecto"""
+    full = dict(DEFAULT_PARAMS)
+    if params:
+        full.update(params)
+    return full
+
+
+def pc_time_mask(df, start='', end=''):
+    """
+    Máscara de las filas con hora del PC entre start y end (inclusive)
+
+    Args:
+        df (pd.DataFrame): Datos cargados
+        start (str): Hora inicial 'HH:MM:SS.mmm' ('' = desde el principio)
+        end (str): Hora final ('' = hasta el final)
+
+    Raises:
+        ValueError: Si una hora no es válida
+
+    Returns:
+        np.ndarray: Máscara booleana
+    """
+    from pc_time import pc_time_bounds, pc_time_range
+
+    first_ms, last_ms = pc_time_range(df)
+    low, high = pc_time_bounds(start, end, first_ms, last_ms)
+
+    mask = np.zeros(len(df), dtype=bool)
+    mask[filter_context(df).range_slice(config.PC_TIME_COLUMN, low, True, high, True)] = True
+    return mask
+
+
+def process_dataframe(df, params):
+    """
+    Aplicar filtros, conversión decimal y normalización
+
+    Args:
+        df (pd.DataFrame): Datos cargados
+        params (dict): Parámetros (ver DEFAULT_PARAMS)
+
+    Returns:
+        pd.DataFrame: Datos procesados (nuevo DataFrame)
+    """
+    params = complete_params(params)
+
+    # Filtros de lote, rango de índices y expresión combinados en una sola máscara,
+    # de modo que solo se copian las filas seleccionadas (una vez)
+    keep = np.ones(len(df), dtype=bool)
+
+    if params['lote_number'] > 0 and not params['all_lotes']:
+        keep &= (df['Num_Lote'] == params['lote_number']).to_numpy()
+
+    if params['min_index'] > 0:
+        keep &= (df['T1_Index'] >= params['min_index']).to_numpy()
+
+    if params['max_index'] > 0:
+        keep &= (df['T1_Index'] <= params['max_index']).to_numpy()
+
+    # Filtro libre por expresión (ver filter_expression)
+    if params['filter_expression']:
+        keep &= filter_mask(df, params['filter_expression'])
+
+    # Rango de hora del PC (búsqueda binaria sobre la columna config.PC_TIME_COLUMN)
+    if params['pc_time_from'] or params['pc_time_to']:
+        keep &= pc_time_mask(df, params['pc_time_from'], params['pc_time_to'])
+
+    if keep.all():
+        # Sin filtros de filas: con copy-on-write (pandas >= 3) la copia es
+        # diferida y las columnas no modificadas se comparten con df
+        filtered_df = df.copy(deep=not _COPY_ON_WRITE)
+    else:
+        filtered_df = df[keep]
+
+    # Eliminar filas vacías si se indica
+    if params['remove_nulls']:
+        filtered_df = filtered_df.dropna(how='all')
+
+    # Procesar datos numéricos
+    for col in config.NUMERIC_COLUMNS:
+        if col in filtered_df.columns:
+            filtered_df[col] = to_numeric(filtered_df[col])
+
+    # Calibración FineNS (tabla guardada o densidad de códigos del propio run)
+    if params['calibrate_fine']:
+        if params['calibration_file']:
+            calibration = load_calibration(params['calibration_file'])
+        else:
+            calibration = FineCalibration.from_dataframe(filtered_df)
+        filtered_df = calibration.apply(filtered_df)
+
+    # Normalizar si se indica
+    if params['normalize']:
+        for col in filtered_df.select_dtypes(include=[np.number]).columns:
+            min_val = filtered_df[col].min()
+            max_val = filtered_df[col].max()
+            if max_val - min_val != 0:
+                filtered_df[f'{col}_normalized'] = (filtered_df[col] - min_val) / (max_val - min_val)
+
+    return filtered_df
+
+
+def analyze_processed(df, params, graph=None):
+    """
+    Análisis opcionales sobre los datos procesados (según params)
+
+    Los análisis pedidos corren a la vez (ver processing_graph) y comparten
+    la reconstrucción de los tiempos absolutos.
+
+    Args:
+        df (pd.DataFrame): Datos procesados
+        params (dict): Parámetros (ver DEFAULT_PARAMS)
+        graph (StageGraph): Grafo a reutilizar (recuerda resultados previos)
+
+    Returns:
+        dict: 'lote_result', 'gap_result', 'rate_result' y 'fit_result'
+              (None si no se pidió)
+    """
+    graph = graph or processing_graph()
+    results = graph.run(
+        list(ANALYSIS_STAGES.values()), complete_params(params), values={'filter': df}
+    )
+    return {key: results[stage] for key, stage in ANALYSIS_STAGES.items()}
+
+
+# ============================================================================
+# GRAFO DE ETAPAS
+# ============================================================================
+
+# Parámetros que cambian los datos procesados (etapa 'filter')
+FILTER_PARAMS = (
+    'lote_number', 'min_index', 'max_index', 'remove_nulls', 'normalize', 'all_lotes',
+    'calibrate_fine', 'calibration_file', 'filter_expression', 'pc_time_from', 'pc_time_to',
+)
+
+# Etapa que produce cada resultado de analyze_processed
+ANALYSIS_STAGES = {
+    'lote_result': 'histograms',
+    'gap_result': 'gaps',
+    'rate_result': 'rates',
+    'fit_result': 'fits',
+}
+
+
+def export_frame(df, path):
+    """
+    Exportar datos procesados según la extensión de path
+
+    Args:
+        df (pd.DataFrame): Datos a exportar
+        path (str): Archivo .xlsx o CSV (separador ';' y coma decimal;
+            .csv.gz / .csv.zst comprimido)
+    """
+    if str(path).lower().endswith('.xlsx'):
+        from excel_io import write_excel
+        write_excel(df, path)
+    else:
+        from compressed_io import write_csv
+        write_csv(df, path)
+    return str(path)
+
+
+def _parse_stage(params):
+    from progressive_loader import ProgressiveLoader
+
+    source = params['source']
+    paths = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+    return ProgressiveLoader(paths).load()
+
+
+def _validate_stage(params, df):
+    if config.VALIDATE_ON_LOAD:
+        from data_validation import apply_validation
+        df, _ = apply_validation(df)
+    if config.PARSE_PC_TIME_ON_LOAD:
+        from pc_time import index_pc_time
+        index_pc_time(df)
+    return df
+
+
+def _filter_stage(params, df):
+    return process_dataframe(df, params)
+
+
+def _timestamps_stage(params, df):
+    from tdc_core import AbsoluteTimes
+    return AbsoluteTimes(df)
+
+
+def _stats_stage(params, df):
+    from result_rendering import column_statistics
+    return column_statistics(df)
+
+
+def _histograms_stage(params, df, times):
+    if not params['all_lotes'] or len(df) == 0:
+        return None
+    from lote_analysis import analyze_lotes
+    return analyze_lotes(df, window_ns=params['coincidence_window'], times=times)
+
+
+def _gaps_stage(params, df, times):
+    if not params['analyze_gaps'] or len(df) == 0:
+        return None
+    from gap_analysis import analyze_gaps
+    return analyze_gaps(df, times=times)
+
+
+def _rates_stage(params, df, times):
+    if not params['analyze_rates'] or len(df) == 0:
+        return None
+    from rate_analysis import analyze_rates
+    return analyze_rates(df, window_ns=params['rate_window'], times=times)
+
+
+def _fits_stage(params, df, times):
+    if not params['fit_peaks'] or len(df) == 0:
+        return None
+    from peak_fit import analyze_peaks
+    return analyze_peaks(df, window_ns=params['coincidence_window'], times=times)
+
+
+def _export_stage(params, df):
+    if not params.get('export_path'):
+        return None
+    return export_frame(df, params['export_path'])
+
+
+def _render_stage(params, df, stats, lote_result, gap_result, rate_result, fit_result):
+    if len(df) == 0:
+        return None
+    from result_rendering import build_payload
+    return build_payload(
+        df, params, params.get('max_rows', config.MAX_ROWS_DISPLAY), params.get('char_width', 7),
+        stats_style=params.get('stats_style', 'table'), stats=stats,
+        lote_result=lote_result, gap_result=gap_result,
+        rate_result=rate_result, fit_result=fit_result,
+    )
+
+
+def processing_graph(max_workers=None):
+    """
+    Grafo de etapas del procesamiento (ver stage_graph)
+
+        parse → validate → filter ─┬→ stats ───────────────────────┬→ render
+                                   ├→ timestamps → histograms, gaps, │
+                                   │               rates, fits ──────┘
+                                   └→ export
+
+    'parse' lee params['source'] (archivo o lista de archivos); la interfaz
+    entrega directamente los datos ya cargados como resultado de 'validate'.
+    'export' escribe params['export_path'] si está definido y 'render' arma el
+    RenderPayload (params 'max_rows', 'char_width', 'stats_style').
+
+    'filter', 'timestamps' (guarda una referencia a los datos filtrados) y
+    'render' (incluye esos datos) no se recuerdan: quedarían como una copia
+    más de los datos procesados además de la que muestra la interfaz. Se
+    recuerdan los datos cargados y los resultados de estadísticas y análisis,
+    de modo que cambiar un análisis vuelve a filtrar pero no recalcula los demás.
+
+    Returns:
+        StageGraph: Grafo nuevo (sin resultados recordados)
+    """
+    from stage_graph import StageGraph
+
+    graph = StageGraph(max_workers)
+    graph.add('parse', _parse_stage, params=('source',), weight=20)
+    graph.add('validate', _validate_stage, ('parse',), weight=3)
+    graph.add('filter', _filter_stage, ('validate',), FILTER_PARAMS, weight=4, retain=False)
+    graph.add('timestamps', _timestamps_stage, ('filter',), weight=0.1, retain=False)
+    graph.add('stats', _stats_stage, ('filter',), weight=2)
+    graph.add('histograms', _histograms_stage, ('filter', 'timestamps'),
+              ('all_lotes', 'coincidence_window'), weight=3)
+    graph.add('gaps', _gaps_stage, ('filter', 'timestamps'), ('analyze_gaps',), weight=3)
+    graph.add('rates', _rates_stage, ('filter', 'timestamps'),
+              ('analyze_rates', 'rate_window'), weight=2)
+    graph.add('fits', _fits_stage, ('filter', 'timestamps'),
+              ('fit_peaks', 'coincidence_window'), weight=3)
+    graph.add('export', _export_stage, ('filter',), ('export_path',), weight=10)
+    graph.add('render', _render_stage,
+              ('filter', 'stats', 'histograms', 'gaps', 'rates', 'fits'),
+              ('max_rows', 'char_width', 'stats_style'), weight=1, retain=False)
+    return graph
+
+
+def process_shared(descriptor, params):
+    """
+    Procesar en un proceso de trabajo datos publicados con ColumnBuffer
+
+    Los datos crudos se leen como vistas del bloque compartido (sin copia ni
+    serialización) y el resultado se escribe en un bloque nuevo cuya
+    propiedad se cede al llamador.
+
+    Args:
+        descriptor (dict): Descriptor del bloque con los datos crudos
+        params (dict): Parámetros (ver DEFAULT_PARAMS)
+
+    Returns:
+        tuple: (descriptor del resultado para ColumnBuffer.attach(..., owner=True),
+                análisis de analyze_processed)
+    """
+    from shared_columns import ColumnBuffer
+
+    raw = ColumnBuffer.attach(descriptor)
+    try:
+        processed = process_dataframe(raw.frame(), params)
+        analyses = analyze_processed(processed, params)
+        result = ColumnBuffer.from_dataframe(processed)
+        del processed
+        return result.disown(), analyses
+    finally:
+        raw.release()
+
+
+# Proceso de trabajo reutilizado entre procesamientos (se crea al primer uso)
+_worker_pool = None
+
+
+def worker_pool():
+    """Ejecutor de un solo proceso (spawn) para process_shared"""
+    global _worker_pool
+    if _worker_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        _worker_pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _worker_pool
@@ -0,0 +1,114 @@
+"""
+Carga progresiva de archivos de datos
+Lee un archivo CSV (comprimido o no) o .xlsx, o la fusión de varios, por
+bloques: el primer bloque es pequeño para poder mostrarlo enseguida, y el
+avance se informa en bytes leídos del archivo en disco, de modo que la interfaz puede mostrar una barra determinada y el
+conteo de filas mientras la lectura continúa en segundo plano.
+"""
+
+import os
+from collections import namedtuple
+from functools import partial
+
+import pandas as pd
+
+import config
+from compressed_io import input_position, open_input
+from excel_io import ExcelReader, is_excel_file
+from file_merge import FileMerger
+
+
+# Resultado de una carga completa: datos, validación y bloque compartido (o None)
+LoadedData = namedtuple('LoadedData', ['df', 'validation', 'buffer'])
+
+
+class ProgressiveLoader:
+    """Lectura por bloques con avance en bytes y filas"""
+
+    def __init__(self, paths, first_rows=None, chunksize=None, sep=None):
+        """
+        Args:
+            paths (str | list): Archivo o lista de archivos (se fusionan por tiempo)
+            first_rows (int): Filas del primer bloque (config.MAX_ROWS_DISPLAY)
+            chunksize (int): Filas de los bloques siguientes (config.READ_CHUNK_ROWS)
+            sep (str): Separador de columnas
+        """
+        self.paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        self.first_rows = first_rows or config.MAX_ROWS_DISPLAY
+        self.chunksize = chunksize or config.READ_CHUNK_ROWS
+        self.sep = sep
+        self.total_bytes = sum(os.path.getsize(path) for path in self.paths)
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.merger = None
+
+    @property
+    def fraction(self):
+        """Fracción leída (0-1) según bytes"""
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    def _excel_blocks(self):
+        # El libro está comprimido: el avance se estima por filas leídas
+        reader = ExcelReader(self.paths[0], self.chunksize)
+        for block in reader.blocks(self.first_rows):
+            yield block, lambda: int(reader.fraction * self.total_bytes)
+
+    def _single_file_blocks(self):
+        if is_excel_file(self.paths[0]):
+            yield from self._excel_blocks()
+            return
+        with open_input(self.paths[0]) as handle:
+            position = partial(input_position, handle)
+            with pd.read_csv(
+                handle,
+                sep=self.sep or config.CSV_SEPARATOR,
+                decimal=config.DECIMAL_SEPARATOR,
+                chunksize=self.chunksize
+            ) as reader:
+                try:
+                    yield reader.get_chunk(self.first_rows), position
+                except StopIteration:
+                    return
+                for chunk in reader:
+                    yield chunk, position
+
+    def _merged_blocks(self):
+        self.merger = FileMerger(self.paths, chunksize=self.chunksize, sep=self.sep)
+        for block in self.merger.chunks():
+            yield block, lambda: self.merger.bytes_read
+
+    def blocks(self):
+        """
+        Leer bloque a bloque actualizando bytes_read y rows_read
+
+        Yields:
+            pd.DataFrame: Bloques consecutivos (el primero con first_rows filas
+            si es un solo archivo)
+        """
+        source = self._single_file_blocks() if len(self.paths) == 1 else self._merged_blocks()
+        for block, position in source:
+            self.rows_read += len(block)
+            self.bytes_read = min(position(), self.total_bytes)
+            yield block
+        self.bytes_read = self.total_bytes
+
+    def load(self, on_block=None):
+        """
+        Leer todo el archivo
+
+        Args:
+            on_block (callable): Función opcional llamada con cada bloque leído
+
+        Returns:
+            pd.DataFrame: Datos completos
+        """
+        blocks = []
+        for block in self.blocks():
+            blocks.append(block)
+            if on_block is not None:
+                on_block(block)
+        if not blocks:
+            return pd.DataFrame()
+        if len(blocks) == 1:
+            return blocks[0]
+        return pd.concat(blocks, ignore_index=True)
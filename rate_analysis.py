@@ -0,0 +1,320 @@
+"""
+Tasa de hits por ventana de tiempo
+Agrupa los tiempos reconstruidos de T1/T2 en ventanas configurables (µs a s),
+calcula la distribución de intervalos entre hits y estima el tiempo muerto.
+
+Los conteos se calculan una sola vez sobre una ventana base con np.bincount;
+cualquier ventana múltiplo de la base se obtiene sumando ventanas base, sin
+volver a recorrer los hits. Solo las ventanas que no son múltiplo usan
+np.searchsorted sobre los tiempos ordenados.
+"""
+
+from html import escape
+
+import numpy as np
+import pandas as pd
+
+import config
+from tdc_core import AbsoluteTimes
+
+
+CHANNELS = ('T1', 'T2')
+
+# Ventanas ofrecidas en la interfaz (etiqueta -> ns)
+WINDOW_CHOICES = {
+    '1 µs': 1e3,
+    '10 µs': 1e4,
+    '100 µs': 1e5,
+    '1 ms': 1e6,
+    '10 ms': 1e7,
+    '100 ms': 1e8,
+    '1 s': 1e9,
+}
+
+
+class RateHistogram:
+    """Conteos de hits de un canal por ventana base, con ventanas derivadas en caché"""
+
+    def __init__(self, times_ns, base_bin_ns=None, max_base_bins=None):
+        """
+        Args:
+            times_ns (np.ndarray): Tiempos de los hits (ns, NaN permitido)
+            base_bin_ns (float): Ventana base (por defecto config.RATE_BASE_BIN_NS)
+            max_base_bins (int): Máximo de ventanas base; si el run es más largo
+                la base se agranda a un múltiplo de base_bin_ns
+        """
+        if base_bin_ns is None:
+            base_bin_ns = config.RATE_BASE_BIN_NS
+        if max_base_bins is None:
+            max_base_bins = config.RATE_MAX_BASE_BINS
+
+        times = np.asarray(times_ns, dtype=np.float64)
+        self.times = np.sort(times[np.isfinite(times)])
+        self.start = float(self.times[0]) if len(self.times) else 0.0
+        self.span = float(self.times[-1] - self.start) if len(self.times) else 0.0
+
+        factor = max(1, int(np.ceil(self.span / (base_bin_ns * max_base_bins))))
+        self.base_bin_ns = base_bin_ns * factor
+        self.max_bins = max_base_bins
+        bins = ((self.times - self.start) // self.base_bin_ns).astype(np.int64)
+        self.base_counts = np.bincount(bins, minlength=1)
+        self._cache = {}
+
+    @classmethod
+    def from_counts(cls, times, base_counts, base_bin_ns, max_bins):
+        """
+        Histograma guardado (sesiones): tiempos ordenados y conteos por ventana base
+
+        Args:
+            times (np.ndarray): Tiempos finitos ordenados (ns)
+            base_counts (np.ndarray): Hits por ventana base
+            base_bin_ns (float): Ventana base efectiva
+            max_bins (int): Máximo de ventanas (ver resolve_window)
+        """
+        histogram = cls.__new__(cls)
+        histogram.times = times
+        histogram.start = float(times[0]) if len(times) else 0.0
+        histogram.span = float(times[-1] - histogram.start) if len(times) else 0.0
+        histogram.base_bin_ns = base_bin_ns
+        histogram.max_bins = max_bins
+        histogram.base_counts = base_counts
+        histogram._cache = {}
+        return histogram
+
+    def resolve_window(self, window_ns):
+        """
+        Ventana efectiva: la pedida, salvo que no sea múltiplo de la base y
+        requiera más de max_bins ventanas; entonces el múltiplo de la base
+        inmediatamente superior
+        """
+        ratio = window_ns / self.base_bin_ns
+        if abs(ratio - round(ratio)) < 1e-9 and round(ratio) >= 1:
+            return window_ns
+        if self.span / window_ns < self.max_bins:
+            return window_ns
+        return self.base_bin_ns * max(1, int(np.ceil(ratio)))
+
+    def counts(self, window_ns):
+        """
+        Hits por ventana
+
+        Args:
+            window_ns (float): Ancho de ventana en ns (ver resolve_window)
+
+        Returns:
+            np.ndarray: Conteo de cada ventana desde el primer hit
+        """
+        window_ns = self.resolve_window(window_ns)
+        if window_ns not in self._cache:
+            ratio = window_ns / self.base_bin_ns
+            factor = int(round(ratio))
+            if factor >= 1 and abs(ratio - factor) < 1e-9:
+                # Múltiplo de la base: sumar grupos de ventanas base
+                n_windows = -(-len(self.base_counts) // factor)
+                padded = np.zeros(n_windows * factor, dtype=np.int64)
+                padded[:len(self.base_counts)] = self.base_counts
+                counts = padded.reshape(n_windows, factor).sum(axis=1)
+            else:
+                n_windows = int(self.span // window_ns) + 1
+                edges = self.start + window_ns * np.arange(n_windows + 1)
+                counts = np.diff(np.searchsorted(self.times, edges, side='left'))
+            self._cache[window_ns] = counts
+        return self._cache[window_ns]
+
+    def rate(self, window_ns):
+        """
+        Tasa por ventana
+
+        Returns:
+            tuple: (inicio de cada ventana en s desde el primer hit, tasa en Hz)
+        """
+        window_ns = self.resolve_window(window_ns)
+        counts = self.counts(window_ns)
+        starts = np.arange(len(counts)) * window_ns * 1e-9
+        return starts, counts / (window_ns * 1e-9)
+
+
+def interarrival_histogram(times, bins=None):
+    """
+    Distribución de intervalos entre hits consecutivos (bins logarítmicos)
+
+    Args:
+        times (np.ndarray): Tiempos ordenados (ns)
+        bins (int): Número de bins (por defecto config.RATE_INTERARRIVAL_BINS)
+
+    Returns:
+        tuple: (conteos, bordes en ns); los intervalos nulos no se incluyen
+    """
+    if bins is None:
+        bins = config.RATE_INTERARRIVAL_BINS
+    intervals = np.diff(times)
+    positive = intervals[intervals > 0]
+    if len(positive) == 0:
+        return np.zeros(bins, dtype=np.int64), np.linspace(0.0, 1.0, bins + 1)
+    low, high = positive.min(), positive.max()
+    if high <= low:
+        high = low * 10.0
+    edges = np.logspace(np.log10(low), np.log10(high), bins + 1)
+    counts, _ = np.histogram(positive, bins=edges)
+    return counts, edges
+
+
+def dead_time_estimate(times, percentile=None):
+    """
+    Estimar el tiempo muerto (modelo no paralizable)
+
+    El tiempo muerto se toma como un percentil bajo de los intervalos entre
+    hits; la fracción muerta es tasa · τ y la tasa corregida m / (1 - m·τ).
+
+    Returns:
+        dict: Tasa media (Hz), intervalo mínimo, τ estimado (ns), fracción
+        muerta y tasa corregida (Hz)
+    """
+    if percentile is None:
+        percentile = config.RATE_DEAD_TIME_PERCENTILE
+    intervals = np.diff(times)
+    intervals = intervals[intervals > 0]
+    span_s = (times[-1] - times[0]) * 1e-9 if len(times) > 1 else 0.0
+    mean_rate = (len(times) - 1) / span_s if span_s > 0 else np.nan
+    if len(intervals) == 0:
+        return {'mean_rate': mean_rate, 'min_interval': np.nan, 'tau': np.nan,
+                'dead_fraction': np.nan, 'corrected_rate': np.nan}
+
+    tau = float(np.percentile(intervals, percentile))
+    dead_fraction = mean_rate * tau * 1e-9
+    corrected = mean_rate / (1.0 - dead_fraction) if dead_fraction < 1 else np.nan
+    return {
+        'mean_rate': mean_rate,
+        'min_interval': float(intervals.min()),
+        'tau': tau,
+        'dead_fraction': dead_fraction,
+        'corrected_rate': corrected,
+    }
+
+
+def analyze_rates(df, window_ns=None, times=None):
+    """
+    Tasa por ventana, intervalos entre hits y tiempo muerto de T1 y T2
+
+    Args:
+        df (pd.DataFrame): Datos con <canal>_ResetCount y <canal>_FineNS
+        window_ns (float): Ventana para la tasa máxima del resumen
+            (por defecto config.RATE_WINDOW_NS)
+        times (dict): Tiempos absolutos ya calculados (canal -> arreglo)
+
+    Returns:
+        dict: 'histograms' (canal -> RateHistogram), 'interarrival'
+        (canal -> (conteos, bordes)), 'summary' (tabla por canal) y 'window_ns'
+    """
+    if window_ns is None:
+        window_ns = config.RATE_WINDOW_NS
+
+    histograms, interarrival, rows = {}, {}, []
+    channel_times = times if times is not None else AbsoluteTimes(df)
+    for channel in CHANNELS:
+        if f'{channel}_ResetCount' not in df.columns or f'{channel}_FineNS' not in df.columns:
+            continue
+        histogram = RateHistogram(channel_times[channel])
+        times = histogram.times
+        histograms[channel] = histogram
+        interarrival[channel] = interarrival_histogram(times)
+
+        dead = dead_time_estimate(times)
+        _, rates = histogram.rate(window_ns)
+        rows.append({
+            'Canal': channel,
+            'Ventana (ns)': histogram.resolve_window(window_ns),
+            'Hits': len(times),
+            'Duración (s)': histogram.span * 1e-9,
+            'Tasa media (Hz)': dead['mean_rate'],
+            'Tasa máx. ventana (Hz)': rates.max() if len(rates) else np.nan,
+            'Intervalo mín. (ns)': dead['min_interval'],
+            'Tiempo muerto est. (ns)': dead['tau'],
+            'Fracción muerta (%)': 100.0 * dead['dead_fraction'],
+            'Tasa corregida (Hz)': dead['corrected_rate'],
+        })
+
+    return {
+        'histograms': histograms,
+        'interarrival': interarrival,
+        'summary': pd.DataFrame(rows),
+        'window_ns': window_ns,
+    }
+
+
+def window_label(window_ns):
+    """Texto legible de un ancho de ventana"""
+    for label, value in WINDOW_CHOICES.items():
+        if value == window_ns:
+            return label
+    return f"{window_ns:g} ns"
+
+
+def rate_svg(rate_result, window_ns, width=760, height=280, max_points=800):
+    """
+    Gráfico SVG de tasa vs tiempo (una línea por canal)
+
+    Si hay más ventanas que max_points, cada punto muestra la tasa promedio de
+    un grupo de ventanas consecutivas.
+    """
+    colors = {'T1': '#2196F3', 'T2': '#FF5722'}
+    margin_left, margin_bottom, margin_top, margin_right = 70, 30, 24, 10
+    plot_w = width - margin_left - margin_right
+    plot_h = height - margin_bottom - margin_top
+
+    series = {}
+    for channel, histogram in rate_result['histograms'].items():
+        starts, rates = histogram.rate(window_ns)
+        if len(rates) > max_points:
+            group = -(-len(rates) // max_points)
+            n = len(rates) // group * group
+            starts = starts[:n:group]
+            rates = rates[:n].reshape(-1, group).mean(axis=1)
+        series[channel] = (starts, rates)
+
+    x_max = max((s[-1] for s, _ in series.values() if len(s)), default=0.0) or 1.0
+    y_max = max((r.max() for _, r in series.values() if len(r)), default=0.0) or 1.0
+
+    if rate_result['histograms']:
+        window_ns = max(h.resolve_window(window_ns) for h in rate_result['histograms'].values())
+    title = f"Tasa vs tiempo (ventana {window_label(window_ns)})"
+    parts = [
+        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' "
+        f"viewBox='0 0 {width} {height}'>",
+        "<rect width='100%' height='100%' fill='#ffffff'/>",
+        f"<text x='{width / 2:.0f}' y='16' font-family='Arial' font-size='12' "
+        f"text-anchor='middle' font-weight='bold'>{escape(title)}</text>",
+    ]
+    base_y = margin_top + plot_h
+    for k, (channel, (starts, rates)) in enumerate(series.items()):
+        x = margin_left + plot_w * starts / x_max
+        y = base_y - plot_h * rates / y_max
+        points = " ".join(f"{a:.1f},{b:.1f}" for a, b in zip(x, y))
+        color = colors.get(channel, '#555')
+        parts.append(f"<polyline fill='none' stroke='{color}' stroke-width='1' points='{points}'/>")
+        parts.append(
+            f"<text x='{margin_left + plot_w - 4}' y='{margin_top + 12 + 12 * k}' font-family='Arial' "
+            f"font-size='10' text-anchor='end' fill='{color}'>{channel}</text>"
+        )
+    parts.extend([
+        f"<line x1='{margin_left}' y1='{base_y}' x2='{margin_left + plot_w}' y2='{base_y}' stroke='#555'/>",
+        f"<line x1='{margin_left}' y1='{margin_top}' x2='{margin_left}' y2='{base_y}' stroke='#555'/>",
+        f"<text x='{margin_left - 4}' y='{margin_top + 10}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>{y_max:.3g} Hz</text>",
+        f"<text x='{margin_left - 4}' y='{base_y}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>0</text>",
+        f"<text x='{margin_left}' y='{height - 10}' font-family='Arial' font-size='10'>0 s</text>",
+        f"<text x='{margin_left + plot_w}' y='{height - 10}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>{x_max:.3g} s</text>",
+        "</svg>",
+    ])
+    return "".join(parts)
+
+
+def interarrival_svgs(rate_result, width=380, height=220):
+    """Gráficos SVG de la distribución de intervalos entre hits, uno por canal"""
+    from report_generator import histogram_svg
+    return tuple(
+        histogram_svg(counts, edges, f"Intervalos {channel} (ns, bins log)", width=width, height=height)
+        for channel, (counts, edges) in rate_result['interarrival'].items()
+    )
@@ -0,0 +1,417 @@
+"""
+Generador de reportes de procesamiento
+Crea reportes autocontenidos (HTML con gráficos SVG embebidos, o PDF) con
+estadísticas por columna, tablas por lote, histogramas FineNS y T2-T1 y los
+parámetros aplicados. Los agregados se guardan en caché para que regenerar un
+reporte no vuelva a leer las filas originales.
+
+Uso por lotes (sin interfaz):
+    python report_generator.py datos/*.csv --output-dir reportes --format html
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from html import escape
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from lote_analysis import analyze_lotes
+from pipeline import complete_params, process_dataframe
+from result_rendering import column_statistics
+from tdc_core import read_data_file
+
+
+# Histogramas incluidos en el reporte (campo -> título)
+REPORT_HISTOGRAMS = {
+    'T1_FineNS': 'Histograma T1_FineNS (ns)',
+    'T2_FineNS': 'Histograma T2_FineNS (ns)',
+    'T2_T1_ns': 'Histograma T2 - T1 (ns)',
+}
+
+PARAM_LABELS = {
+    'lote_number': 'Número de lote',
+    'all_lotes': 'Todos los lotes',
+    'min_index': 'Índice mínimo',
+    'max_index': 'Índice máximo',
+    'remove_nulls': 'Eliminar nulos',
+    'normalize': 'Normalizar',
+    'coincidence_window': 'Ventana coincidencia (ns)',
+    'calibrate_fine': 'Calibrar FineNS',
+    'calibration_file': 'Tabla de calibración',
+}
+
+
+# ============================================================================
+# AGREGADOS Y CACHÉ
+# ============================================================================
+
+def compute_aggregates(df, params, source=None, lote_result=None):
+    """
+    Calcular los agregados que necesita un reporte
+
+    Args:
+        df (pd.DataFrame): Datos procesados
+        params (dict): Parámetros aplicados
+        source (str): Archivo de origen (solo informativo)
+        lote_result (dict): Resultado de analyze_lotes ya calculado (opcional)
+
+    Returns:
+        dict: Agregados del run (sin filas originales)
+    """
+    params = complete_params(params)
+    if lote_result is None:
+        lote_result = analyze_lotes(df, window_ns=params['coincidence_window'])
+
+    first_timestamp = None
+    if 'Timestamp_PC' in df.columns and len(df) > 0:
+        first_timestamp = str(df['Timestamp_PC'].iloc[0])
+
+    return {
+        'source': str(source) if source else '',
+        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'params': params,
+        'rows': len(df),
+        'columns': [str(col) for col in df.columns],
+        'first_timestamp': first_timestamp,
+        'column_stats': column_statistics(df),
+        'lote_summary': lote_result['summary'],
+        'histograms': lote_result['histograms'],
+        'edges': lote_result['edges'],
+    }
+
+
+def save_aggregates(aggregates, path):
+    """Guardar agregados en formato binario .npz (metadatos en JSON)"""
+    column_stats = aggregates['column_stats']
+    lote_summary = aggregates['lote_summary']
+    meta = {
+        key: aggregates[key]
+        for key in ('source', 'created', 'params', 'rows', 'columns', 'first_timestamp')
+    }
+    meta['column_stats_index'] = [str(col) for col in column_stats.index]
+    meta['column_stats_columns'] = list(column_stats.columns)
+    meta['lote_columns'] = list(lote_summary.columns)
+    meta['fields'] = list(aggregates['histograms'])
+
+    arrays = {'meta': np.array(json.dumps(meta)), 'column_stats': column_stats.to_numpy(dtype=np.float64)}
+    for i, col in enumerate(lote_summary.columns):
+        arrays[f'lote_{i}'] = lote_summary[col].to_numpy()
+    for field in meta['fields']:
+        arrays[f'hist_{field}'] = aggregates['histograms'][field]
+        arrays[f'edges_{field}'] = aggregates['edges'][field]
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def load_aggregates(path):
+    """Cargar agregados guardados con save_aggregates"""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data['meta']))
+        column_stats = pd.DataFrame(
+            data['column_stats'],
+            index=meta['column_stats_index'],
+            columns=meta['column_stats_columns']
+        )
+        lote_summary = pd.DataFrame(
+            {col: data[f'lote_{i}'] for i, col in enumerate(meta['lote_columns'])}
+        )
+        histograms = {field: data[f'hist_{field}'] for field in meta['fields']}
+        edges = {field: data[f'edges_{field}'] for field in meta['fields']}
+
+    aggregates = {
+        key: meta[key]
+        for key in ('source', 'created', 'params', 'rows', 'columns', 'first_timestamp')
+    }
+    aggregates.update({
+        'column_stats': column_stats,
+        'lote_summary': lote_summary,
+        'histograms': histograms,
+        'edges': edges,
+    })
+    return aggregates
+
+
+def aggregate_cache_path(file_path, params):
+    """Ruta del caché de agregados para un archivo y un juego de parámetros"""
+    file_path = Path(file_path).resolve()
+    stat = file_path.stat()
+    key = json.dumps(
+        [str(file_path), stat.st_size, stat.st_mtime_ns, complete_params(params)],
+        sort_keys=True
+    )
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return Path(config.AGGREGATE_CACHE_DIR) / f"{file_path.stem}-{digest}.npz"
+
+
+def aggregates_for_file(file_path, params=None, use_cache=None):
+    """
+    Obtener los agregados de un archivo, desde caché si existe
+
+    Args:
+        file_path (str): Archivo CSV
+        params (dict): Parámetros de procesamiento
+        use_cache (bool): None usa config.ENABLE_CACHE
+
+    Returns:
+        dict: Agregados del run
+    """
+    params = complete_params(params)
+    if use_cache is None:
+        use_cache = config.ENABLE_CACHE
+
+    cache_path = aggregate_cache_path(file_path, params) if use_cache else None
+    if cache_path is not None and cache_path.exists():
+        return load_aggregates(cache_path)
+
+    df = read_data_file(file_path)
+    processed = process_dataframe(df, params)
+    aggregates = compute_aggregates(processed, params, source=file_path)
+
+    if cache_path is not None:
+        save_aggregates(aggregates, cache_path)
+    return aggregates
+
+
+# ============================================================================
+# RENDERIZADO
+# ============================================================================
+
+def histogram_svg(counts, edges, title, width=640, height=240):
+    """Gráfico de barras SVG de un histograma"""
+    margin_left, margin_bottom, margin_top = 50, 30, 24
+    plot_w = width - margin_left - 10
+    plot_h = height - margin_bottom - margin_top
+    peak = max(int(counts.max()) if len(counts) else 0, 1)
+    bar_w = plot_w / max(len(counts), 1)
+
+    parts = [
+        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' "
+        f"viewBox='0 0 {width} {height}'>",
+        "<rect width='100%' height='100%' fill='#ffffff'/>",
+        f"<text x='{width / 2:.0f}' y='16' font-family='Arial' font-size='12' "
+        f"text-anchor='middle' font-weight='bold'>{escape(title)}</text>",
+    ]
+    base_y = margin_top + plot_h
+    for k, value in enumerate(counts):
+        bar_h = plot_h * value / peak
+        parts.append(
+            f"<rect x='{margin_left + k * bar_w:.2f}' y='{base_y - bar_h:.2f}' "
+            f"width='{max(bar_w - 1, 0.5):.2f}' height='{bar_h:.2f}' fill='#2196F3'/>"
+        )
+    parts.extend([
+        f"<line x1='{margin_left}' y1='{base_y}' x2='{margin_left + plot_w}' y2='{base_y}' stroke='#555'/>",
+        f"<line x1='{margin_left}' y1='{margin_top}' x2='{margin_left}' y2='{base_y}' stroke='#555'/>",
+        f"<text x='{margin_left - 4}' y='{margin_top + 10}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>{peak}</text>",
+        f"<text x='{margin_left - 4}' y='{base_y}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>0</text>",
+        f"<text x='{margin_left}' y='{height - 10}' font-family='Arial' font-size='10'>{edges[0]:.2f}</text>",
+        f"<text x='{margin_left + plot_w}' y='{height - 10}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>{edges[-1]:.2f}</text>",
+        "</svg>",
+    ])
+    return "".join(parts)
+
+
+def _html_table(df, index_label=None, float_format='{:.2f}'):
+    """Tabla HTML simple a partir de un DataFrame"""
+    parts = ["<table border='1' cellspacing='0' cellpadding='4' style='border-collapse:collapse;'>", "<tr>"]
+    if index_label is not None:
+        parts.append(f"<th style='background-color:#f0f0f0;'>{escape(index_label)}</th>")
+    parts.extend(f"<th style='background-color:#f0f0f0;'>{escape(str(col))}</th>" for col in df.columns)
+    parts.append("</tr>")
+
+    for index, row in zip(df.index, df.itertuples(index=False)):
+        parts.append("<tr>")
+        if index_label is not None:
+            parts.append(f"<td><b>{escape(str(index))}</b></td>")
+        for value in row:
+            text = float_format.format(value) if isinstance(value, float) else str(value)
+            parts.append(f"<td>{escape(text)}</td>")
+        parts.append("</tr>")
+
+    parts.append("</table>")
+    return "".join(parts)
+
+
+def render_html(aggregates, plot_html=None):
+    """
+    Construir el HTML del reporte a partir de los agregados
+
+    Args:
+        aggregates (dict): Resultado de compute_aggregates / load_aggregates
+        plot_html (callable): plot_html(campo, counts, edges, título) -> HTML;
+            por defecto se embebe el SVG directamente
+
+    Returns:
+        str: Documento HTML completo
+    """
+    if plot_html is None:
+        def plot_html(field, counts, edges, title):
+            return histogram_svg(counts, edges, title)
+
+    source = aggregates['source'] or 'Datos en memoria'
+    params = aggregates['params']
+    stats = aggregates['column_stats'].rename(
+        columns={'count': 'Válidos', 'min': 'Mínimo', 'max': 'Máximo', 'mean': 'Promedio'}
+    )
+    stats['Válidos'] = stats['Válidos'].astype(np.int64)
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>Reporte - {escape(Path(source).name)}</title>",
+        "<style>body { font-family: Arial; font-size: 10pt; } "
+        "h1 { color: #2196F3; } h2 { border-bottom: 1px solid #ddd; }</style>",
+        "</head><body>",
+        f"<h1>Reporte de Procesamiento - {escape(Path(source).name)}</h1>",
+        f"<p>Generado: {escape(aggregates['created'])} · "
+        f"{escape(config.WINDOW_TITLE)} v{escape(config.APP_VERSION)}</p>",
+        "<h2>Parámetros de procesamiento</h2><ul>",
+    ]
+    for key, value in params.items():
+        parts.append(f"<li><b>{escape(PARAM_LABELS.get(key, key))}:</b> {escape(str(value))}</li>")
+    parts.append("</ul>")
+
+    parts.append("<h2>Información general</h2><ul>")
+    parts.append(f"<li>Archivo: {escape(source)}</li>")
+    parts.append(f"<li>Total de registros: {aggregates['rows']}</li>")
+    parts.append(f"<li>Total de columnas: {len(aggregates['columns'])}</li>")
+    if aggregates['first_timestamp']:
+        parts.append(f"<li>Timestamp (primer): {escape(aggregates['first_timestamp'])}</li>")
+    parts.append("</ul>")
+
+    parts.append("<h2>Estadísticas por columna</h2>")
+    parts.append(_html_table(stats, index_label='Campo'))
+
+    parts.append("<h2>Resumen por lote</h2>")
+    parts.append(_html_table(aggregates['lote_summary']))
+
+    parts.append("<h2>Histogramas</h2>")
+    for field, title in REPORT_HISTOGRAMS.items():
+        if field in aggregates['histograms']:
+            # Histograma global = suma de los histogramas por lote
+            counts = np.asarray(aggregates['histograms'][field]).sum(axis=0)
+            parts.append(f"<p>{plot_html(field, counts, aggregates['edges'][field], title)}</p>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+_qt_app = None
+
+
+def _ensure_qt_app():
+    """Crear una QGuiApplication (offscreen si no hay pantalla) para imprimir PDF"""
+    global _qt_app
+    from PyQt6.QtGui import QGuiApplication
+
+    if QGuiApplication.instance() is None:
+        if 'QT_QPA_PLATFORM' not in os.environ and not os.environ.get('DISPLAY'):
+            os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+        _qt_app = QGuiApplication([sys.argv[0]])
+    return QGuiApplication.instance()
+
+
+def write_pdf(aggregates, output_file):
+    """Escribir el reporte en PDF usando QTextDocument (histogramas como imágenes)"""
+    _ensure_qt_app()
+    from PyQt6.QtCore import QByteArray, QMarginsF, QUrl
+    from PyQt6.QtGui import QImage, QPageLayout, QPageSize, QPainter, QPdfWriter, QTextDocument
+    from PyQt6.QtSvg import QSvgRenderer
+
+    images = {}
+
+    def plot_html(field, counts, edges, title):
+        renderer = QSvgRenderer(QByteArray(histogram_svg(counts, edges, title).encode('utf-8')))
+        image = QImage(renderer.defaultSize(), QImage.Format.Format_ARGB32)
+        image.fill(0xffffffff)
+        painter = QPainter(image)
+        renderer.render(painter)
+        painter.end()
+        name = f"hist_{field}.png"
+        images[name] = image
+        return f"<img src='{name}'>"
+
+    document = QTextDocument()
+    html = render_html(aggregates, plot_html=plot_html)
+    for name, image in images.items():
+        document.addResource(QTextDocument.ResourceType.ImageResource.value, QUrl(name), image)
+    document.setHtml(html)
+
+    writer = QPdfWriter(str(output_file))
+    writer.setPageLayout(QPageLayout(
+        QPageSize(QPageSize.PageSizeId.A4), QPageLayout.Orientation.Portrait, QMarginsF(15, 15, 15, 15)
+    ))
+    document.print(writer)
+
+
+def write_report(aggregates, output_file, fmt=None):
+    """
+    Escribir el reporte de un run
+
+    Args:
+        aggregates (dict): Agregados del run
+        output_file (str): Archivo de salida (.html o .pdf)
+        fmt (str): 'html' o 'pdf'; por defecto según la extensión
+    """
+    fmt = fmt or Path(output_file).suffix.lstrip('.').lower() or 'html'
+    if fmt == 'pdf':
+        write_pdf(aggregates, output_file)
+    else:
+        Path(output_file).write_text(render_html(aggregates), encoding='utf-8')
+
+
+def generate_reports(files, output_dir, params=None, fmt='html', use_cache=None):
+    """
+    Generar reportes para muchos archivos sin interfaz gráfica
+
+    Returns:
+        list: Rutas de los reportes generados
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = []
+    for file_path in files:
+        aggregates = aggregates_for_file(file_path, params, use_cache=use_cache)
+        output_file = output_dir / f"{Path(file_path).stem}.{fmt}"
+        write_report(aggregates, output_file, fmt)
+        outputs.append(output_file)
+        print(f"✓ Reporte: {output_file}")
+    return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generar reportes de procesamiento")
+    parser.add_argument('files', nargs='+', help="Archivos CSV a reportar")
+    parser.add_argument('--output-dir', default='reportes', help="Carpeta de salida")
+    parser.add_argument('--format', choices=['html', 'pdf'], default='html')
+    parser.add_argument('--lote', type=int, default=0, help="Número de lote (0 = todos)")
+    parser.add_argument('--min-index', type=int, default=0)
+    parser.add_argument('--max-index', type=int, default=0)
+    parser.add_argument('--window', type=float, default=config.COINCIDENCE_WINDOW_NS,
+                        help="Ventana de coincidencia (ns)")
+    parser.add_argument('--no-cache', action='store_true', help="No usar el caché de agregados")
+    args = parser.parse_args(argv)
+
+    params = {
+        'lote_number': args.lote,
+        'all_lotes': args.lote == 0,
+        'min_index': args.min_index,
+        'max_index': args.max_index,
+        'coincidence_window': args.window,
+    }
+    generate_reports(args.files, args.output_dir, params, fmt=args.format,
+                     use_cache=False if args.no_cache else None)
+
+
+if __name__ == '__main__':
+    main()
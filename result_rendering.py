@@ -0,0 +1,287 @@
+"""
+Renderizado de resultados
+Genera fuera del hilo de la interfaz el HTML de estadísticas, el texto de
+resumen y el contenido de las tablas (celdas y anchos de columna), entregando
+todo en un único paquete inmutable
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from tdc_core import to_numeric
+
+
+# Contenido listo para volcar en un QTableWidget
+TableContent = namedtuple('TableContent', ['headers', 'cells', 'widths'])
+
+# Resultado completo de un procesamiento, listo para mostrar
+RenderPayload = namedtuple(
+    'RenderPayload',
+    ['df', 'params', 'table', 'stats_html', 'summary_text', 'lote_result', 'lote_table',
+     'gap_result', 'gap_table', 'buffer', 'rate_result', 'rate_table', 'rate_svgs',
+     'fit_result', 'fit_table'],
+    defaults=(None,) * 8
+)
+
+# Margen horizontal de cada columna (px) y ancho máximo estimado
+COLUMN_PADDING_PX = 16
+MAX_COLUMN_WIDTH_PX = 400
+
+
+def table_content(df, max_rows, char_width, float_format=None):
+    """
+    Preparar las celdas visibles y estimar el ancho de cada columna
+
+    Los anchos se calculan a partir de las longitudes de texto (vector por
+    columna), evitando resizeColumnsToContents en el hilo de la interfaz.
+
+    Args:
+        df (pd.DataFrame): Datos a mostrar
+        max_rows (int): Filas visibles
+        char_width (int): Ancho medio de un carácter en píxeles
+        float_format (str): Formato opcional para columnas float (ej. '{:.2f}')
+
+    Returns:
+        TableContent: Encabezados, celdas (tuplas de str) y anchos en píxeles
+    """
+    head = df.head(max_rows)
+    columns = []
+    for col in head.columns:
+        values = head[col]
+        if float_format and pd.api.types.is_float_dtype(values):
+            columns.append(np.array([float_format.format(v) for v in values], dtype=str))
+        else:
+            columns.append(values.astype(str).to_numpy(dtype=str))
+
+    headers = tuple(str(col) for col in head.columns)
+    if columns and len(head) > 0:
+        text = np.column_stack(columns)
+        lengths = np.char.str_len(text).max(axis=0)
+    else:
+        text = np.empty((0, len(headers)), dtype=str)
+        lengths = np.zeros(len(headers), dtype=np.int64)
+
+    header_lengths = np.array([len(h) for h in headers], dtype=np.int64)
+    widths = np.maximum(lengths, header_lengths) * char_width + COLUMN_PADDING_PX
+    widths = np.minimum(widths, MAX_COLUMN_WIDTH_PX)
+
+    return TableContent(
+        headers=headers,
+        cells=tuple(tuple(row) for row in text.tolist()),
+        widths=tuple(int(w) for w in widths)
+    )
+
+
+def column_statistics(df):
+    """
+    Calcular válidos, mínimo, máximo y promedio de cada columna convertible
+
+    Returns:
+        pd.DataFrame: Una fila por columna con al menos un valor numérico
+    """
+    numeric = pd.DataFrame({col: to_numeric(df[col]) for col in df.columns}, index=df.index)
+    stats = numeric.agg(['count', 'min', 'max', 'mean']).T
+    return stats[stats['count'] > 0]
+
+
+def pc_time_text(df):
+    """Rango 'primera – última' de la hora del PC, o '' si no hay columna"""
+    from pc_time import format_clock, pc_time_range
+
+    first, last = pc_time_range(df)
+    if first is None:
+        return ''
+    return f"{format_clock(first)} – {format_clock(last)}"
+
+
+def statistics_html(df, stats):
+    """HTML de la pestaña Estadísticas (tabla por campo)"""
+    parts = [
+        "<table style='width:100%; border-collapse:collapse;'>",
+        "<tr style='background-color:#f0f0f0; border-bottom:1px solid #ddd;'>",
+        "<td style='padding:6px; font-weight:bold;'>Campo</td>",
+        "<td style='padding:6px; font-weight:bold;'>Válidos</td>",
+        "<td style='padding:6px; font-weight:bold;'>Mínimo</td>",
+        "<td style='padding:6px; font-weight:bold;'>Máximo</td>",
+        "<td style='padding:6px; font-weight:bold;'>Promedio</td>",
+        "</tr>",
+    ]
+
+    for k, (col, row) in enumerate(stats.iterrows()):
+        bg_color = "#f9f9f9" if k % 2 == 0 else "#ffffff"
+        parts.append(
+            f"<tr style='background-color:{bg_color}; border-bottom:1px solid #eee;'>"
+            f"<td style='padding:6px;'><b>{col}</b></td>"
+            f"<td style='padding:6px;'>{int(row['count'])}</td>"
+            f"<td style='padding:6px;'>{row['min']:.2f}</td>"
+            f"<td style='padding:6px;'>{row['max']:.2f}</td>"
+            f"<td style='padding:6px;'>{row['mean']:.2f}</td>"
+            "</tr>"
+        )
+
+    parts.append("</table>")
+
+    # Información general
+    parts.append("<br><b>Información General:</b><br>")
+    parts.append(f"• Total de registros: {len(df)}<br>")
+    parts.append(f"• Total de columnas: {len(df.columns)}<br>")
+    if 'Timestamp_PC' in df.columns and len(df) > 0:
+        parts.append(f"• Timestamp (primer): {df['Timestamp_PC'].iloc[0]}<br>")
+    pc_range = pc_time_text(df)
+    if pc_range:
+        parts.append(f"• Hora PC: {pc_range}<br>")
+
+    return "".join(parts)
+
+
+def statistics_list_html(df, stats):
+    """HTML de la pestaña Estadísticas en formato lista (versión simple)"""
+    parts = [
+        "<b>Información del Conjunto de Datos</b><br><br>",
+        f"<b>Filas:</b> {len(df)}<br>",
+        f"<b>Columnas:</b> {len(df.columns)}<br><br>",
+        "<b>Campos detectados:</b><br>",
+    ]
+
+    for col, row in stats.iterrows():
+        parts.append(
+            f"<br><b>{col}</b><br>"
+            f"&nbsp;&nbsp;Válidos: {int(row['count'])}<br>"
+            f"&nbsp;&nbsp;Mínimo: {row['min']:.2f}<br>"
+            f"&nbsp;&nbsp;Máximo: {row['max']:.2f}<br>"
+            f"&nbsp;&nbsp;Promedio: {row['mean']:.2f}<br>"
+        )
+
+    if 'Timestamp_PC' in df.columns and len(df) > 0:
+        parts.append(f"<br><b>Timestamp (primer registro):</b> {df['Timestamp_PC'].iloc[0]}<br>")
+    pc_range = pc_time_text(df)
+    if pc_range:
+        parts.append(f"<b>Hora PC:</b> {pc_range}<br>")
+
+    return "".join(parts)
+
+
+def summary_text(df, params):
+    """Texto de la pestaña Resumen a partir de los parámetros aplicados"""
+    lines = [
+        "RESUMEN DE PROCESAMIENTO",
+        "=" * 50,
+        "",
+        f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "Archivos procesados: 1",
+        f"Total de filas: {len(df)}",
+        f"Total de columnas: {len(df.columns)}",
+        "",
+        "Parámetros aplicados:",
+    ]
+
+    if params.get('all_lotes'):
+        lines.append("  • Número de lote: todos")
+    else:
+        lines.append(f"  • Número de lote: {params['lote_number']}")
+    if 'coincidence_window' in params:
+        lines.append(f"  • Ventana coincidencia: {params['coincidence_window']:.2f} ns")
+    lines.extend([
+        f"  • Índice mínimo: {params['min_index']}",
+        f"  • Índice máximo: {params['max_index']}",
+    ])
+    if params.get('filter_expression'):
+        lines.append(f"  • Filtro: {params['filter_expression']}")
+    if params.get('pc_time_from') or params.get('pc_time_to'):
+        lines.append(
+            f"  • Hora PC: {params.get('pc_time_from') or 'inicio'} – {params.get('pc_time_to') or 'fin'}"
+        )
+    lines.extend([
+        f"  • Eliminar nulos: {params['remove_nulls']}",
+        f"  • Normalizar: {params['normalize']}",
+        f"  • Calibrar FineNS: {params.get('calibrate_fine', False)}",
+        f"  • Analizar huecos: {params.get('analyze_gaps', False)}",
+        f"  • Analizar tasa de hits: {params.get('analyze_rates', False)}",
+    ])
+    if params.get('rate_window') is not None:
+        from rate_analysis import window_label
+        lines.append(f"  • Ventana de tasa: {window_label(params['rate_window'])}")
+    lines.extend([
+        f"  • Ajustar pico T2-T1: {params.get('fit_peaks', False)}",
+        "",
+        "Campos en resultado:",
+    ])
+    lines.extend(f"  {i:2d}. {col}" for i, col in enumerate(df.columns, 1))
+
+    return "\n".join(lines) + "\n"
+
+
+def build_payload(df, params, max_rows, char_width, lote_result=None, stats_style='table',
+                  gap_result=None, buffer=None, rate_result=None, fit_result=None,
+                  stats=None):
+    """
+    Renderizar todo lo que la interfaz necesita mostrar tras un procesamiento
+
+    Args:
+        df (pd.DataFrame): Datos procesados
+        params (dict): Parámetros del procesamiento
+        max_rows (int): Filas visibles en la tabla
+        char_width (int): Ancho medio de carácter en píxeles
+        lote_result (dict): Resultado de lote_analysis.analyze_lotes (opcional)
+        stats_style (str): 'table' (versión avanzada) o 'list' (versión simple)
+        gap_result (dict): Resultado de gap_analysis.analyze_gaps (opcional)
+        buffer (ColumnBuffer): Bloque compartido que respalda df; su propiedad
+            pasa a quien recibe el paquete
+        rate_result (dict): Resultado de rate_analysis.analyze_rates (opcional)
+        fit_result (dict): Resultado de peak_fit.analyze_peaks (opcional)
+        stats (pd.DataFrame): Estadísticas por columna ya calculadas (p. ej. de
+            una sesión guardada); si es None se calculan con column_statistics
+
+    Returns:
+        RenderPayload: Paquete inmutable con datos y contenido renderizado
+    """
+    if stats is None:
+        stats = column_statistics(df)
+    if stats_style == 'list':
+        stats_html = statistics_list_html(df, stats)
+    else:
+        stats_html = statistics_html(df, stats)
+
+    lote_table = None
+    if lote_result is not None:
+        summary = lote_result['summary']
+        lote_table = table_content(summary, len(summary), char_width, float_format='{:.2f}')
+
+    gap_table = None
+    if gap_result is not None:
+        events = gap_result['events']
+        gap_table = table_content(events, len(events), char_width, float_format='{:.0f}')
+
+    rate_table = rate_svgs = None
+    if rate_result is not None:
+        from rate_analysis import interarrival_svgs, rate_svg
+        summary = rate_result['summary']
+        rate_table = table_content(summary, len(summary), char_width, float_format='{:.4g}')
+        # Primero la tasa vs tiempo, luego los intervalos de cada canal
+        rate_svgs = (rate_svg(rate_result, rate_result['window_ns']),) + interarrival_svgs(rate_result)
+
+    fit_table = None
+    if fit_result is not None:
+        summary = fit_result['summary']
+        fit_table = table_content(summary, len(summary), char_width, float_format='{:.4g}')
+
+    return RenderPayload(
+        df=df,
+        params=dict(params),
+        table=table_content(df, max_rows, char_width),
+        stats_html=stats_html,
+        summary_text=summary_text(df, params),
+        lote_result=lote_result,
+        lote_table=lote_table,
+        gap_result=gap_result,
+        gap_table=gap_table,
+        buffer=buffer,
+        rate_result=rate_result,
+        rate_table=rate_table,
+        rate_svgs=rate_svgs,
+        fit_result=fit_result,
+        fit_table=fit_table
+    )
@@ -0,0 +1,484 @@
+"""
+Comparación entre runs
+Compara un run de referencia con uno o más runs nuevos a partir de sus
+agregados (report_generator): estadísticas por columna y por lote, diferencias
+respecto de la referencia y una prueba de Kolmogorov-Smirnov de dos muestras
+sobre las CDF de los histogramas FineNS y T2-T1, global y por lote.
+
+Cada run se reduce a sus agregados antes de pasar al siguiente (desde el
+caché si existen), de modo que nunca hay dos conjuntos de datos crudos en
+memoria. Se aceptan archivos CSV o .xlsx, agregados .npz y sesiones guardadas.
+
+Uso:
+    python run_comparison.py referencia.csv nuevo.csv --output comparacion.html
+"""
+
+import argparse
+from html import escape
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from compressed_io import COMPRESSED_SUFFIXES
+from report_generator import (
+    REPORT_HISTOGRAMS, _html_table, aggregates_for_file, load_aggregates
+)
+
+
+# Colores de las curvas (referencia primero)
+RUN_COLORS = ['#212121', '#2196F3', '#FF9800', '#4CAF50', '#9C27B0', '#F44336']
+
+
+def run_label(source, used):
+    """Nombre corto de un run (nombre del archivo, sin repetir)"""
+    label = Path(str(source)).name
+    for suffix in COMPRESSED_SUFFIXES:
+        if label.endswith(suffix):
+            label = label[:-len(suffix)]
+            break
+    for suffix in ('.npz', config.SESSION_SUFFIX, '.csv', '.xlsx'):
+        if label.endswith(suffix):
+            label = label[:-len(suffix)]
+            break
+    base, k = label or 'run', 2
+    while label in used:
+        label = f"{base} ({k})"
+        k += 1
+    used.add(label)
+    return label
+
+
+def load_run(source, params=None, use_cache=None):
+    """
+    Agregados de un run
+
+    Args:
+        source (str | dict): Archivo CSV, agregados .npz, carpeta de sesión, o
+            agregados ya calculados (report_generator.compute_aggregates)
+        params (dict): Parámetros de procesamiento para los archivos CSV
+        use_cache (bool): None usa config.ENABLE_CACHE
+
+    Returns:
+        dict: Agregados del run
+    """
+    if isinstance(source, dict):
+        return source
+    path = Path(source)
+    if path.is_dir():
+        return load_aggregates(path / 'aggregates.npz')
+    if path.suffix == '.npz':
+        return load_aggregates(path)
+    return aggregates_for_file(path, params, use_cache=use_cache)
+
+
+# ============================================================================
+# HISTOGRAMAS Y PRUEBA KS
+# ============================================================================
+
+def cumulative_at(counts, edges, points):
+    """
+    Conteo acumulado de un histograma en puntos arbitrarios
+
+    Dentro de cada bin se supone distribución uniforme (interpolación lineal
+    de la CDF entre bordes).
+
+    Args:
+        counts (np.ndarray): Conteos por bin
+        edges (np.ndarray): Bordes (len(counts) + 1)
+        points (np.ndarray): Puntos donde evaluar
+
+    Returns:
+        np.ndarray: Entradas acumuladas hasta cada punto
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(counts, dtype=np.float64)))
+    return np.interp(points, edges, cumulative, left=0.0, right=cumulative[-1])
+
+
+def rebin(counts, edges, new_edges):
+    """Redistribuir un histograma en otros bordes (conserva las entradas en el rango común)"""
+    return np.diff(cumulative_at(counts, edges, new_edges))
+
+
+def ks_pvalue(d, n_a, n_b):
+    """
+    Valor p asintótico de Kolmogorov-Smirnov para dos muestras
+
+    Usa la distribución de Kolmogorov con el tamaño efectivo
+    n = n_a·n_b/(n_a + n_b) y la corrección de Stephens.
+    """
+    if n_a <= 0 or n_b <= 0:
+        return np.nan
+    n = np.sqrt(n_a * n_b / (n_a + n_b))
+    lam = (n + 0.12 + 0.11 / n) * d
+    if lam < 1e-3:
+        return 1.0
+    j = np.arange(1, 101)
+    terms = 2.0 * (-1.0) ** (j - 1) * np.exp(-2.0 * (j * lam) ** 2)
+    return float(np.clip(terms.sum(), 0.0, 1.0))
+
+
+def cumulative_bounds(counts, edges, points):
+    """
+    Cotas del conteo acumulado de un histograma en puntos arbitrarios
+
+    En un borde del histograma el acumulado es exacto; dentro de un bin solo
+    se sabe que está entre el acumulado de sus dos bordes (no se supone
+    ninguna forma dentro del bin, lo que importa con FineNS cuantizado).
+
+    Returns:
+        tuple: (cota inferior, cota superior) por punto
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(counts, dtype=np.float64)))
+    last = len(edges) - 1
+    k = np.searchsorted(edges, points, side='left')
+    upper = cumulative[np.clip(k, 0, last)]
+    exact = edges[np.clip(k, 0, last)] == points
+    lower = np.where(exact, upper, cumulative[np.clip(k - 1, 0, last)])
+    return lower, upper
+
+
+def ks_binned(counts_a, edges_a, counts_b, edges_b):
+    """
+    Prueba KS de dos muestras sobre CDF de histogramas
+
+    Las CDF se comparan en la unión de los bordes de ambos histogramas, de
+    modo que runs con rangos T2-T1 distintos se comparan sin volver a los
+    datos. Donde un histograma no tiene borde se usa la menor diferencia
+    compatible con sus bins; D es así una cota inferior de la estadística
+    exacta (la prueba es conservadora) y coincide con ella si los bordes son
+    los mismos.
+
+    Returns:
+        tuple: (D, valor p, entradas A, entradas B)
+    """
+    n_a = float(np.sum(counts_a))
+    n_b = float(np.sum(counts_b))
+    if n_a == 0 or n_b == 0:
+        return np.nan, np.nan, int(n_a), int(n_b)
+    grid = np.union1d(edges_a, edges_b)
+    low_a, high_a = cumulative_bounds(counts_a, edges_a, grid)
+    low_b, high_b = cumulative_bounds(counts_b, edges_b, grid)
+    gap = np.maximum(low_a / n_a - high_b / n_b, low_b / n_b - high_a / n_a)
+    d = float(max(gap.max(), 0.0))
+    return d, ks_pvalue(d, n_a, n_b), int(n_a), int(n_b)
+
+
+def _lote_histograms(aggregates, field):
+    """Num_Lote -> fila de la matriz de histogramas de un campo"""
+    lotes = aggregates['lote_summary']['Num_Lote'].to_numpy()
+    matrix = np.asarray(aggregates['histograms'][field])
+    return dict(zip(lotes.tolist(), matrix))
+
+
+def ks_table(runs, labels, alpha=None):
+    """
+    Prueba KS de cada run contra la referencia (el primero)
+
+    Returns:
+        pd.DataFrame: Una fila por campo, lote ('todos' = run completo) y run
+    """
+    alpha = config.COMPARE_KS_ALPHA if alpha is None else alpha
+    reference = runs[0]
+    rows = []
+    for field in REPORT_HISTOGRAMS:
+        if any(field not in run['histograms'] for run in runs):
+            continue
+        ref_edges = reference['edges'][field]
+        ref_lotes = _lote_histograms(reference, field)
+        ref_total = np.asarray(reference['histograms'][field]).sum(axis=0)
+        for label, run in zip(labels[1:], runs[1:]):
+            edges = run['edges'][field]
+            run_lotes = _lote_histograms(run, field)
+            pairs = [('todos', ref_total, np.asarray(run['histograms'][field]).sum(axis=0))]
+            pairs.extend(
+                (lote, ref_lotes[lote], run_lotes[lote])
+                for lote in sorted(set(ref_lotes) & set(run_lotes))
+            )
+            for lote, ref_counts, counts in pairs:
+                d, p, n_ref, n_run = ks_binned(ref_counts, ref_edges, counts, edges)
+                rows.append({
+                    'Campo': field,
+                    'Lote': lote,
+                    'Run': label,
+                    'Entradas ref.': n_ref,
+                    'Entradas': n_run,
+                    'D': d,
+                    'Valor p': p,
+                    'Distinto': bool(p < alpha) if np.isfinite(p) else False,
+                })
+    columns = ['Campo', 'Lote', 'Run', 'Entradas ref.', 'Entradas', 'D', 'Valor p', 'Distinto']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def common_histograms(runs, field):
+    """
+    Histogramas globales de un campo en bordes comunes a todos los runs
+
+    Returns:
+        tuple: (bordes, lista de conteos por run)
+    """
+    edges = [np.asarray(run['edges'][field]) for run in runs]
+    low = min(e[0] for e in edges)
+    high = max(e[-1] for e in edges)
+    n_bins = max(len(e) - 1 for e in edges)
+    common = np.linspace(low, high, n_bins + 1)
+    counts = [
+        rebin(np.asarray(run['histograms'][field]).sum(axis=0), e, common)
+        for run, e in zip(runs, edges)
+    ]
+    return common, counts
+
+
+# ============================================================================
+# DIFERENCIAS DE ESTADÍSTICAS
+# ============================================================================
+
+def column_differences(runs, labels):
+    """
+    Estadísticas por columna de cada run y diferencia del promedio con la referencia
+
+    Returns:
+        pd.DataFrame: Una fila por columna y run
+    """
+    reference = runs[0]['column_stats']
+    rows = []
+    for label, run in zip(labels, runs):
+        stats = run['column_stats']
+        for column in stats.index:
+            row = stats.loc[column]
+            ref_mean = reference.loc[column, 'mean'] if column in reference.index else np.nan
+            delta = row['mean'] - ref_mean
+            rows.append({
+                'Columna': column,
+                'Run': label,
+                'Válidos': int(row['count']),
+                'Mínimo': row['min'],
+                'Máximo': row['max'],
+                'Promedio': row['mean'],
+                'Δ promedio': delta,
+                'Δ promedio (%)': 100.0 * delta / ref_mean if ref_mean else np.nan,
+            })
+    table = pd.DataFrame(rows)
+    if len(table) == 0:
+        return table
+    # Columnas juntas, runs en el orden dado
+    order = {column: k for k, column in enumerate(dict.fromkeys(table['Columna']))}
+    return table.sort_values('Columna', key=lambda s: s.map(order), kind='stable').reset_index(drop=True)
+
+
+def lote_differences(runs, labels, metrics=None):
+    """
+    Métricas por lote de cada run y su diferencia con la referencia
+
+    Args:
+        metrics (list): Columnas del resumen por lote (config.COMPARE_LOTE_METRICS)
+
+    Returns:
+        pd.DataFrame: Una fila por lote y run, con 'Δ métrica' para cada métrica
+    """
+    metrics = metrics or config.COMPARE_LOTE_METRICS
+    reference = runs[0]['lote_summary'].set_index('Num_Lote')
+    metrics = [m for m in metrics if m in reference.columns]
+    frames = []
+    for label, run in zip(labels, runs):
+        summary = run['lote_summary'].set_index('Num_Lote')
+        present = [m for m in metrics if m in summary.columns]
+        table = summary[present].astype(np.float64)
+        deltas = table - reference[present].reindex(table.index).astype(np.float64)
+        frame = pd.DataFrame({'Num_Lote': table.index, 'Run': label})
+        for metric in present:
+            frame[metric] = table[metric].to_numpy()
+            frame[f'Δ {metric}'] = deltas[metric].to_numpy()
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, ignore_index=True)
+    return combined.sort_values('Num_Lote', kind='stable').reset_index(drop=True)
+
+
+def parameter_differences(runs, labels):
+    """Parámetros que difieren de los de la referencia (texto por run)"""
+    reference = runs[0].get('params') or {}
+    notes = []
+    for label, run in zip(labels[1:], runs[1:]):
+        params = run.get('params') or {}
+        keys = sorted(
+            key for key in set(reference) | set(params)
+            if reference.get(key) != params.get(key)
+        )
+        if keys:
+            changes = ", ".join(f"{key}: {reference.get(key)} → {params.get(key)}" for key in keys)
+            notes.append(f"{label}: parámetros distintos ({changes})")
+    return notes
+
+
+def compare_runs(sources, params=None, use_cache=None, labels=None):
+    """
+    Comparar runs contra el primero (referencia)
+
+    Args:
+        sources (list): Archivos CSV, agregados .npz, sesiones o agregados ya
+            calculados (al menos dos)
+        params (dict): Parámetros de procesamiento para los archivos CSV
+        use_cache (bool): None usa config.ENABLE_CACHE
+        labels (list): Nombres de los runs (por defecto, los de los archivos)
+
+    Returns:
+        dict: 'labels', 'runs' (agregados), 'columns', 'lotes', 'ks' y 'notes'
+    """
+    if len(sources) < 2:
+        raise ValueError("Se necesitan al menos dos runs para comparar")
+    runs = [load_run(source, params, use_cache) for source in sources]
+
+    if labels is None:
+        used = set()
+        labels = [
+            run_label(source if not isinstance(source, dict) else (source.get('source') or 'actual'), used)
+            for source in sources
+        ]
+
+    return {
+        'labels': list(labels),
+        'runs': runs,
+        'columns': column_differences(runs, labels),
+        'lotes': lote_differences(runs, labels),
+        'ks': ks_table(runs, labels),
+        'notes': parameter_differences(runs, labels),
+    }
+
+
+def comparison_summary(result):
+    """Líneas de texto con el resultado de la prueba KS global de cada campo"""
+    ks = result['ks']
+    lines = [f"Referencia: {result['labels'][0]}"]
+    whole = ks[ks['Lote'] == 'todos']
+    for row in whole.itertuples(index=False):
+        verdict = "distinto" if row.Distinto else "compatible"
+        lines.append(f"{row.Run} · {row.Campo}: D = {row.D:.4f}, p = {row[6]:.3g} ({verdict})")
+    lotes = ks[ks['Lote'] != 'todos']
+    if len(lotes):
+        lines.append(f"Lotes distintos (α = {config.COMPARE_KS_ALPHA:g}): {int(lotes['Distinto'].sum())} de {len(lotes)}")
+    lines.extend(result['notes'])
+    return lines
+
+
+# ============================================================================
+# RENDERIZADO
+# ============================================================================
+
+def overlay_svg(series, edges, title, width=640, height=240):
+    """
+    Gráfico SVG de varias distribuciones superpuestas (normalizadas a 1)
+
+    Args:
+        series (list): (etiqueta, conteos) por run, en bordes comunes
+        edges (np.ndarray): Bordes comunes
+        title (str): Título
+    """
+    margin_left, margin_bottom, margin_top = 50, 30, 24
+    plot_w = width - margin_left - 10
+    plot_h = height - margin_bottom - margin_top
+    base_y = margin_top + plot_h
+    densities = [counts / max(counts.sum(), 1.0) for _, counts in series]
+    peak = max([float(d.max()) for d in densities if len(d)] + [1e-12])
+    n_bins = len(edges) - 1
+
+    parts = [
+        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' "
+        f"viewBox='0 0 {width} {height}'>",
+        "<rect width='100%' height='100%' fill='#ffffff'/>",
+        f"<text x='{width / 2:.0f}' y='16' font-family='Arial' font-size='12' "
+        f"text-anchor='middle' font-weight='bold'>{escape(title)}</text>",
+    ]
+    for k, ((label, _), density) in enumerate(zip(series, densities)):
+        color = RUN_COLORS[k % len(RUN_COLORS)]
+        # Contorno escalonado del histograma
+        xs = margin_left + plot_w * np.repeat(np.arange(n_bins + 1), 2)[1:-1] / max(n_bins, 1)
+        ys = base_y - plot_h * np.repeat(density, 2) / peak
+        points = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+        parts.append(f"<polyline points='{points}' fill='none' stroke='{color}' stroke-width='1.5'/>")
+        parts.append(
+            f"<text x='{width - 12}' y='{margin_top + 12 * (k + 1)}' font-family='Arial' "
+            f"font-size='10' text-anchor='end' fill='{color}'>{escape(label)}</text>"
+        )
+    parts.extend([
+        f"<line x1='{margin_left}' y1='{base_y}' x2='{margin_left + plot_w}' y2='{base_y}' stroke='#555'/>",
+        f"<line x1='{margin_left}' y1='{margin_top}' x2='{margin_left}' y2='{base_y}' stroke='#555'/>",
+        f"<text x='{margin_left}' y='{height - 10}' font-family='Arial' font-size='10'>{edges[0]:.2f}</text>",
+        f"<text x='{margin_left + plot_w}' y='{height - 10}' font-family='Arial' font-size='10' "
+        f"text-anchor='end'>{edges[-1]:.2f}</text>",
+        "</svg>",
+    ])
+    return "".join(parts)
+
+
+def field_overlay_svg(result, field):
+    """Distribuciones globales de un campo de todos los runs superpuestas"""
+    edges, counts = common_histograms(result['runs'], field)
+    return overlay_svg(list(zip(result['labels'], counts)), edges, REPORT_HISTOGRAMS[field])
+
+
+def comparison_html(result):
+    """Documento HTML con diferencias, pruebas KS y distribuciones superpuestas"""
+    labels = result['labels']
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>Comparación - {escape(labels[0])}</title>",
+        "<style>body { font-family: Arial; font-size: 10pt; } "
+        "h1 { color: #2196F3; } h2 { border-bottom: 1px solid #ddd; }</style>",
+        "</head><body>",
+        f"<h1>Comparación de runs - referencia {escape(labels[0])}</h1>",
+        f"<p>{escape(config.WINDOW_TITLE)} v{escape(config.APP_VERSION)}</p><ul>",
+    ]
+    for label, run in zip(labels, result['runs']):
+        parts.append(
+            f"<li><b>{escape(label)}</b>: {escape(run['source'] or 'Datos en memoria')} · "
+            f"{run['rows']} registros</li>"
+        )
+    parts.append("</ul>")
+
+    parts.append("<h2>Resultado</h2><ul>")
+    parts.extend(f"<li>{escape(line)}</li>" for line in comparison_summary(result))
+    parts.append("</ul>")
+
+    parts.append("<h2>Distribuciones</h2>")
+    for field in REPORT_HISTOGRAMS:
+        if all(field in run['histograms'] for run in result['runs']):
+            parts.append(f"<p>{field_overlay_svg(result, field)}</p>")
+
+    parts.append("<h2>Prueba KS (CDF de los histogramas)</h2>")
+    parts.append(_html_table(result['ks'], float_format='{:.4g}'))
+    parts.append("<h2>Estadísticas por columna</h2>")
+    parts.append(_html_table(result['columns'], float_format='{:.4g}'))
+    parts.append("<h2>Por lote</h2>")
+    parts.append(_html_table(result['lotes'], float_format='{:.4g}'))
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparar runs contra una referencia")
+    parser.add_argument('runs', nargs='+',
+                        help="Referencia y runs a comparar (CSV, agregados .npz o sesiones)")
+    parser.add_argument('--output', default='comparacion.html', help="Reporte HTML")
+    parser.add_argument('--lote', type=int, default=0, help="Número de lote (0 = todos)")
+    parser.add_argument('--window', type=float, default=config.COINCIDENCE_WINDOW_NS,
+                        help="Ventana de coincidencia (ns)")
+    parser.add_argument('--no-cache', action='store_true', help="No usar el caché de agregados")
+    args = parser.parse_args(argv)
+
+    params = {
+        'lote_number': args.lote,
+        'all_lotes': args.lote == 0,
+        'coincidence_window': args.window,
+    }
+    result = compare_runs(args.runs, params, use_cache=False if args.no_cache else None)
+    print("\n".join(comparison_summary(result)))
+    Path(args.output).write_text(comparison_html(result), encoding='utf-8')
+    print(f"✓ Comparación: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Sesiones guardadas
+Guarda el estado de un procesamiento (parámetros, datos crudos y procesados y
+los agregados ya calculados) en una carpeta, y lo restaura sin volver a leer
+ni procesar el CSV.
+
+Estructura de la carpeta (sufijo config.SESSION_SUFFIX):
+
+    session.json        parámetros, origen y distribución de columnas
+    aggregates.npz      estadísticas por columna e histogramas por lote
+                        (report_generator.save_aggregates)
+    processed/, raw/    una columna por archivo .npy
+    gap_events/, ...    tablas de análisis con el mismo formato
+    rates/              tiempos ordenados, conteos por ventana base e
+                        intervalos entre hits de cada canal (tasa de hits)
+
+Cada columna es un .npy que se abre con np.load(mmap_mode='r'): restaurar solo
+mapea los archivos y las páginas se leen del disco a medida que se usan, de
+modo que una sesión de varios GB se abre en tiempo casi constante. Las
+columnas de texto se guardan como códigos enteros más sus categorías y se
+restauran como pd.Categorical, igual que en shared_columns.
+"""
+
+import json
+import os
+import shutil
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from shared_columns import column_arrays
+
+
+SESSION_VERSION = 1
+
+# Tablas de análisis guardadas (nombre de carpeta -> (análisis, clave))
+ANALYSIS_TABLES = {
+    'gap_events': ('gap_result', 'events'),
+    'gap_summary': ('gap_result', 'summary'),
+    'fit_summary': ('fit_result', 'summary'),
+    'rate_summary': ('rate_result', 'summary'),
+}
+
+# Sesión restaurada; raw_df es None si no se guardaron los datos crudos
+Session = namedtuple(
+    'Session',
+    ['params', 'raw_df', 'processed_df', 'analyses', 'aggregates', 'source', 'created']
+)
+
+
+def session_path(path):
+    """Ruta de la sesión con el sufijo config.SESSION_SUFFIX"""
+    path = Path(path)
+    return path if path.suffix == config.SESSION_SUFFIX else path.with_name(path.name + config.SESSION_SUFFIX)
+
+
+def save_frame(df, folder):
+    """
+    Guardar un DataFrame como una columna por archivo .npy
+
+    Returns:
+        dict: Distribución de columnas para load_frame
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    columns = []
+    for k, (name, values, categories) in enumerate(column_arrays(df)):
+        np.save(folder / f'{k:03d}.npy', np.ascontiguousarray(values), allow_pickle=False)
+        if categories is not None:
+            np.save(folder / f'{k:03d}.categories.npy', np.array(categories, dtype=str), allow_pickle=False)
+        columns.append({'name': str(name), 'file': f'{k:03d}.npy', 'text': categories is not None})
+
+    if isinstance(df.index, pd.RangeIndex):
+        index = [df.index.start, df.index.stop, df.index.step]
+    else:
+        np.save(folder / 'index.npy', df.index.to_numpy(dtype=np.int64), allow_pickle=False)
+        index = 'index.npy'
+    return {'n_rows': len(df), 'columns': columns, 'index': index}
+
+
+def load_frame(folder, layout):
+    """
+    Restaurar un DataFrame guardado con save_frame
+
+    Las columnas numéricas son mapeos de solo lectura de los archivos; las
+    operaciones de pandas que las modifican crean arreglos nuevos.
+    """
+    folder = Path(folder)
+    data = {}
+    for entry in layout['columns']:
+        values = np.load(folder / entry['file'], mmap_mode='r', allow_pickle=False)
+        if entry['text']:
+            categories = np.load(folder / entry['file'].replace('.npy', '.categories.npy'))
+            values = pd.Categorical.from_codes(values, categories)
+        data[entry['name']] = values
+
+    if isinstance(layout['index'], list):
+        index = pd.RangeIndex(*layout['index'])
+    else:
+        index = pd.Index(np.load(folder / layout['index'], mmap_mode='r'))
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def save_rates(rate_result, folder):
+    """
+    Guardar los histogramas de tasa e intervalos de rate_analysis.analyze_rates
+
+    Returns:
+        dict: Ventana y ventana base de cada canal para load_rates
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    channels = {}
+    for channel, histogram in rate_result['histograms'].items():
+        counts, edges = rate_result['interarrival'][channel]
+        np.save(folder / f'{channel}.times.npy', histogram.times, allow_pickle=False)
+        np.save(folder / f'{channel}.base_counts.npy', histogram.base_counts, allow_pickle=False)
+        np.save(folder / f'{channel}.interarrival_counts.npy', counts, allow_pickle=False)
+        np.save(folder / f'{channel}.interarrival_edges.npy', edges, allow_pickle=False)
+        channels[channel] = {'base_bin_ns': float(histogram.base_bin_ns), 'max_bins': int(histogram.max_bins)}
+    return {'window_ns': float(rate_result['window_ns']), 'channels': channels}
+
+
+def load_rates(folder, layout, summary):
+    """
+    Restaurar un resultado de analyze_rates guardado con save_rates
+
+    Args:
+        folder (str): Carpeta rates/ de la sesión
+        layout (dict): Resultado de save_rates
+        summary (pd.DataFrame): Tabla por canal (tabla rate_summary)
+    """
+    from rate_analysis import RateHistogram
+
+    folder = Path(folder)
+    histograms, interarrival = {}, {}
+    for channel, entry in layout['channels'].items():
+        histograms[channel] = RateHistogram.from_counts(
+            np.load(folder / f'{channel}.times.npy', mmap_mode='r'),
+            np.load(folder / f'{channel}.base_counts.npy', mmap_mode='r'),
+            entry['base_bin_ns'], entry['max_bins'],
+        )
+        interarrival[channel] = (
+            np.load(folder / f'{channel}.interarrival_counts.npy'),
+            np.load(folder / f'{channel}.interarrival_edges.npy'),
+        )
+    return {
+        'histograms': histograms,
+        'interarrival': interarrival,
+        'summary': summary,
+        'window_ns': layout['window_ns'],
+    }
+
+
+def save_session(path, params, processed_df, raw_df=None, analyses=None, aggregates=None, source=None):
+    """
+    Guardar una sesión
+
+    Se escribe en una carpeta temporal que reemplaza a la anterior al final,
+    de modo que una sesión existente no queda a medio escribir.
+
+    Args:
+        path (str): Carpeta de la sesión (se agrega config.SESSION_SUFFIX)
+        params (dict): Parámetros del procesamiento
+        processed_df (pd.DataFrame): Datos procesados
+        raw_df (pd.DataFrame): Datos crudos (se omiten si config.SESSION_SAVE_RAW
+            es False o si es None)
+        analyses (dict): Resultados de pipeline.analyze_processed
+        aggregates (dict): Agregados de report_generator.compute_aggregates
+            (se calculan si no se pasan)
+        source (str): Archivo(s) de origen
+
+    Returns:
+        Path: Carpeta de la sesión
+    """
+    from report_generator import compute_aggregates, save_aggregates
+
+    path = session_path(path)
+    analyses = analyses or {}
+    temp = path.with_name(path.name + '.tmp')
+    if temp.exists():
+        shutil.rmtree(temp)
+    temp.mkdir(parents=True)
+
+    try:
+        frames = {'processed': save_frame(processed_df, temp / 'processed')}
+        if raw_df is not None and config.SESSION_SAVE_RAW:
+            frames['raw'] = save_frame(raw_df, temp / 'raw')
+
+        tables = {}
+        for name, (analysis, key) in ANALYSIS_TABLES.items():
+            if analyses.get(analysis) is not None:
+                tables[name] = save_frame(analyses[analysis][key], temp / name)
+        rates = None
+        if analyses.get('rate_result') is not None:
+            rates = save_rates(analyses['rate_result'], temp / 'rates')
+
+        if aggregates is None:
+            aggregates = compute_aggregates(
+                processed_df, params, source=source, lote_result=analyses.get('lote_result')
+            )
+        save_aggregates(aggregates, temp / 'aggregates.npz')
+
+        meta = {
+            'version': SESSION_VERSION,
+            'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'source': str(source) if source else '',
+            'params': params,
+            'frames': frames,
+            'tables': tables,
+            'rates': rates,
+        }
+        with open(temp / 'session.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    except BaseException:
+        shutil.rmtree(temp, ignore_errors=True)
+        raise
+
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(temp, path)
+    return path
+
+
+def load_session(path):
+    """
+    Restaurar una sesión guardada con save_session
+
+    Los análisis de huecos, de ajuste del pico y de tasa de hits se restauran
+    desde sus tablas (la tasa también desde rates/); el de lotes desde los
+    agregados. En sesiones guardadas sin rates/ la tasa se recalcula si los
+    parámetros la pedían.
+
+    Returns:
+        Session: Parámetros, DataFrames mapeados en memoria, análisis y agregados
+    """
+    from pipeline import complete_params
+    from report_generator import load_aggregates
+
+    path = session_path(path)
+    with open(path / 'session.json', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != SESSION_VERSION:
+        raise ValueError(f"Versión de sesión no soportada: {meta.get('version')}")
+
+    params = complete_params(meta['params'])
+    processed_df = load_frame(path / 'processed', meta['frames']['processed'])
+    raw_df = None
+    if 'raw' in meta['frames']:
+        raw_df = load_frame(path / 'raw', meta['frames']['raw'])
+
+    aggregates = load_aggregates(path / 'aggregates.npz')
+
+    analyses = {'lote_result': None, 'gap_result': None, 'rate_result': None, 'fit_result': None}
+    if params['all_lotes']:
+        summary = aggregates['lote_summary']
+        analyses['lote_result'] = {
+            'summary': summary,
+            'histograms': aggregates['histograms'],
+            'edges': aggregates['edges'],
+            'lotes': summary['Num_Lote'].to_numpy(),
+        }
+    for name, layout in meta['tables'].items():
+        analysis, key = ANALYSIS_TABLES[name]
+        if analyses[analysis] is None:
+            analyses[analysis] = {}
+        analyses[analysis][key] = load_frame(path / name, layout)
+    if meta.get('rates') is not None:
+        analyses['rate_result'] = load_rates(
+            path / 'rates', meta['rates'], analyses['rate_result']['summary']
+        )
+    elif params['analyze_rates'] and len(processed_df) > 0:
+        from rate_analysis import analyze_rates
+        analyses['rate_result'] = analyze_rates(processed_df, window_ns=params['rate_window'])
+
+    return Session(
+        params=params,
+        raw_df=raw_df,
+        processed_df=processed_df,
+        analyses=analyses,
+        aggregates=aggregates,
+        source=meta['source'] or None,
+        created=meta['created'],
+    )
@@ -0,0 +1,188 @@
+"""
+Columnas en memoria compartida
+Empaqueta las columnas de un DataFrame en un único bloque de
+multiprocessing.shared_memory y las expone como vistas NumPy de solo lectura,
+de modo que un proceso de trabajo puede producir (o leer) los datos sin
+copiarlos ni serializarlos.
+
+Propiedad explícita: solo el dueño de un bloque lo elimina (release). El
+dueño puede cederlo con disown(); quien lo recibe lo adjunta con
+attach(descriptor, owner=True). Las columnas de texto se guardan como
+códigos enteros y se exponen como pd.Categorical.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+# Alineación de cada columna dentro del bloque (bytes)
+_ALIGNMENT = 64
+
+
+class _Segment(shared_memory.SharedMemory):
+    """SharedMemory que tolera cerrarse con vistas NumPy todavía vivas"""
+
+    def __del__(self):
+        try:
+            self.close()
+        except (OSError, BufferError):
+            # El mapeo se libera cuando desaparece la última vista
+            pass
+
+
+def _aligned(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def column_arrays(df):
+    """
+    Arreglos a guardar por columna
+
+    Returns:
+        list: (nombre, arreglo, categorías o None); las columnas no numéricas
+        se reemplazan por sus códigos (-1 = valor faltante)
+    """
+    columns = []
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            columns.append((col, values.to_numpy(), None))
+        else:
+            codes, uniques = pd.factorize(values)
+            columns.append((col, codes, [str(value) for value in uniques]))
+    return columns
+
+
+class ColumnBuffer:
+    """Columnas de un DataFrame en un bloque de memoria compartida"""
+
+    def __init__(self, segment, descriptor, owner):
+        """
+        Args:
+            segment (SharedMemory): Bloque abierto
+            descriptor (dict): Distribución de columnas (ver descriptor)
+            owner (bool): Si este objeto debe eliminar el bloque al liberarlo
+        """
+        self._segment = segment
+        self.descriptor = descriptor
+        self.owner = owner
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Copiar un DataFrame a un bloque nuevo (el llamador queda como dueño)
+
+        Returns:
+            ColumnBuffer: Bloque con una copia de las columnas de df
+        """
+        columns = column_arrays(df)
+        if isinstance(df.index, pd.RangeIndex):
+            range_index = (df.index.start, df.index.stop, df.index.step)
+        else:
+            range_index = None
+            columns.append((None, df.index.to_numpy(dtype=np.int64), None))
+
+        layout, offset = [], 0
+        for name, values, categories in columns:
+            offset = _aligned(offset)
+            layout.append({
+                'name': name,
+                'dtype': values.dtype.str,
+                'offset': offset,
+                'categories': categories,
+            })
+            offset += values.nbytes
+
+        segment = _Segment(create=True, size=max(offset, 1))
+        for entry, (_, values, _) in zip(layout, columns):
+            target = np.frombuffer(segment.buf, dtype=values.dtype, count=len(values), offset=entry['offset'])
+            target[:] = values
+        del target
+
+        descriptor = {
+            'segment': segment.name,
+            'n_rows': len(df),
+            'columns': [entry for entry in layout if entry['name'] is not None],
+            'index': next((entry for entry in layout if entry['name'] is None), None),
+            'range_index': range_index,
+        }
+        return cls(segment, descriptor, owner=True)
+
+    @classmethod
+    def attach(cls, descriptor, owner=False):
+        """
+        Abrir un bloque creado en otro proceso
+
+        Args:
+            descriptor (dict): Descriptor recibido del creador
+            owner (bool): Asumir la propiedad (el creador llamó a disown)
+        """
+        segment = _Segment(name=descriptor['segment'])
+        return cls(segment, descriptor, owner)
+
+    def _view(self, entry):
+        # np.frombuffer mantiene exportado el buffer: el bloque no se puede
+        # desmapear mientras exista la vista
+        view = np.frombuffer(
+            self._segment.buf, dtype=np.dtype(entry['dtype']),
+            count=self.descriptor['n_rows'], offset=entry['offset']
+        )
+        view.flags.writeable = False
+        return view
+
+    def frame(self):
+        """
+        DataFrame cuyas columnas son vistas de solo lectura del bloque
+
+        Las operaciones de pandas que modifican columnas crean arreglos
+        nuevos; el bloque compartido nunca se escribe.
+        """
+        data = {}
+        for entry in self.descriptor['columns']:
+            view = self._view(entry)
+            if entry['categories'] is not None:
+                view = pd.Categorical.from_codes(view, entry['categories'])
+            data[entry['name']] = view
+
+        if self.descriptor['index'] is not None:
+            index = pd.Index(self._view(self.descriptor['index']))
+        else:
+            index = pd.RangeIndex(*self.descriptor['range_index'])
+        return pd.DataFrame(data, index=index, copy=False)
+
+    @property
+    def nbytes(self):
+        return self._segment.size
+
+    def disown(self):
+        """
+        Ceder la propiedad del bloque (p. ej. del proceso de trabajo a la interfaz)
+
+        Returns:
+            dict: Descriptor para attach(descriptor, owner=True)
+        """
+        self.owner = False
+        descriptor = self.descriptor
+        self.release()
+        return descriptor
+
+    def release(self):
+        """Cerrar el bloque y eliminarlo si este objeto es su dueño"""
+        if self._segment is None:
+            return
+        if self.owner:
+            self._segment.unlink()
+        try:
+            self._segment.close()
+        except BufferError:
+            # Quedan vistas en uso; el mapeo se libera con la última de ellas
+            pass
+        self._segment = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,271 @@
+"""
+Historial de resultados del procesamiento (deshacer / rehacer)
+Cada procesamiento agrega una instantánea (el RenderPayload completo, con sus
+parámetros) en lugar de reemplazar el resultado anterior. Las instantáneas
+comparten columnas:
+
+    - con copy-on-write (pandas >= 3) las columnas que el procesamiento no
+      modificó siguen apuntando a los arreglos de los datos crudos o del
+      bloque compartido (shared_columns), sin copia
+    - al agregar una instantánea, cada columna igual a la misma columna de la
+      instantánea anterior (mismas filas, tipo y valores) se reemplaza por la
+      de aquella, de modo que solo las columnas cambiadas o derivadas
+      (p. ej. las *_normalized) ocupan memoria nueva
+
+La memoria del historial cuenta una sola vez cada arreglo de columnas, sin
+contar los de los datos crudos, más lo renderizado de cada instantánea
+(celdas de las tablas, HTML, SVG y resultados de los análisis), estimado una
+vez al agregarla. Si supera config.HISTORY_MEMORY_MB se descartan primero las
+instantáneas más antiguas (nunca la actual).
+
+La interfaz crea el historial al arrancar: pandas y NumPy se importan en el
+primer uso, no al importar el módulo.
+"""
+
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+import config
+
+
+# Resultado guardado: paquete mostrado, descripción, hora y bytes de lo renderizado
+Snapshot = namedtuple('Snapshot', ['payload', 'label', 'created', 'rendered_bytes'])
+
+# Campos del paquete que no son contenido renderizado (columnas y su bloque compartido)
+_DATA_FIELDS = ('df', 'buffer')
+
+
+def column_memory(series):
+    """
+    Arreglo que guarda los valores de una columna
+
+    Returns:
+        tuple: (dirección de los datos, bytes); dos columnas con la misma
+        clave comparten memoria
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = series.array
+    if isinstance(values, pd.Categorical):
+        values = values.codes
+    else:
+        values = np.asarray(values)
+    return values.__array_interface__['data'][0], values.nbytes
+
+
+def frame_memory(df):
+    """Memoria de las columnas de df: {(dirección, bytes): bytes}"""
+    if df is None:
+        return {}
+    memory = {}
+    for position in range(df.shape[1]):
+        key = column_memory(df.iloc[:, position])
+        memory[key] = key[1]
+    return memory
+
+
+def object_memory(value, seen=None):
+    """
+    Bytes aproximados de un resultado (tablas, textos, arreglos y DataFrames anidados)
+
+    Cada objeto se cuenta una sola vez.
+    """
+    import numpy as np
+    import pandas as pd
+
+    seen = set() if seen is None else seen
+    if value is None or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(object_memory(item, seen) for pair in value.items() for item in pair)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(object_memory(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        return size + object_memory(vars(value), seen)
+    return size
+
+
+def rendered_memory(payload):
+    """Bytes de lo renderizado de un RenderPayload (todo salvo df y buffer)"""
+    seen = set()
+    return sum(
+        object_memory(getattr(payload, field), seen)
+        for field in payload._fields if field not in _DATA_FIELDS
+    )
+
+
+def _same_values(new, old):
+    import numpy as np
+    import pandas as pd
+
+    if new.dtype != old.dtype:
+        return False
+    if pd.api.types.is_float_dtype(new.dtype):
+        return bool(np.array_equal(new.to_numpy(), old.to_numpy(), equal_nan=True))
+    return bool(new.equals(old))
+
+
+def share_columns(df, previous):
+    """
+    Reusar las columnas de previous que df repite
+
+    Args:
+        df (pd.DataFrame): Resultado nuevo
+        previous (pd.DataFrame): Resultado anterior (o None)
+
+    Returns:
+        pd.DataFrame: df con las columnas iguales tomadas de previous (sin copia)
+    """
+    import pandas as pd
+
+    if previous is None or not df.columns.is_unique or not df.index.equals(previous.index):
+        return df
+    columns, shared = {}, 0
+    for col in df.columns:
+        series = df[col]
+        if col in previous.columns and column_memory(series) != column_memory(previous[col]):
+            if _same_values(series, previous[col]):
+                series = previous[col]
+                shared += 1
+        columns[col] = series
+    if shared == 0:
+        return df
+    return pd.DataFrame(columns, index=previous.index, copy=False)
+
+
+class SnapshotHistory:
+    """Historial lineal de resultados con un presupuesto de memoria"""
+
+    def __init__(self, budget_mb=None):
+        """
+        Args:
+            budget_mb (float): Memoria máxima de las instantáneas (config.HISTORY_MEMORY_MB)
+        """
+        self.budget_mb = budget_mb if budget_mb is not None else config.HISTORY_MEMORY_MB
+        self.snapshots = []
+        self.position = -1
+        self.evicted = 0
+        self._base = {}
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def reset(self, base=None):
+        """
+        Vaciar el historial (otros datos cargados)
+
+        Args:
+            base (pd.DataFrame): Datos crudos; sus columnas no cuentan como
+                memoria del historial
+        """
+        self.snapshots = []
+        self.position = -1
+        self.evicted = 0
+        self._base = frame_memory(base)
+
+    @property
+    def current(self):
+        """Instantánea mostrada (None si no hay)"""
+        return self.snapshots[self.position] if self.snapshots else None
+
+    @property
+    def can_undo(self):
+        return self.position > 0
+
+    @property
+    def can_redo(self):
+        return 0 <= self.position < len(self.snapshots) - 1
+
+    def add(self, payload, label=None):
+        """
+        Agregar un resultado como instantánea actual
+
+        Las instantáneas posteriores a la actual (deshechas) se descartan. Un
+        resultado igual al actual (mismos parámetros y datos, p. ej. al volver
+        a procesar sin cambios) no agrega otra instantánea.
+
+        Args:
+            payload (RenderPayload): Resultado del procesamiento
+            label (str): Descripción (por defecto la hora)
+
+        Returns:
+            RenderPayload: payload con las columnas repetidas compartidas con
+            la instantánea anterior (el de la actual si es el mismo resultado)
+        """
+        previous = self.current.payload.df if self.current is not None else None
+        payload = payload._replace(df=share_columns(payload.df, previous))
+        if self._same_result(payload):
+            return self.current.payload
+        del self.snapshots[self.position + 1:]
+        created = datetime.now()
+        self.snapshots.append(Snapshot(
+            payload, label or created.strftime('%H:%M:%S'), created, rendered_memory(payload)
+        ))
+        self.position = len(self.snapshots) - 1
+        self._evict()
+        return payload
+
+    def _same_result(self, payload):
+        """Indicar si payload (ya con columnas compartidas) repite la instantánea actual"""
+        if self.current is None:
+            return False
+        current = self.current.payload
+        if current is payload:
+            return True
+        if payload.params != current.params or list(payload.df.columns) != list(current.df.columns):
+            return False
+        return payload.df.index.equals(current.df.index) and all(
+            column_memory(payload.df.iloc[:, k]) == column_memory(current.df.iloc[:, k])
+            for k in range(payload.df.shape[1])
+        )
+
+    def undo(self):
+        """Volver a la instantánea anterior (None si no hay)"""
+        if not self.can_undo:
+            return None
+        self.position -= 1
+        return self.current
+
+    def redo(self):
+        """Avanzar a la instantánea siguiente (None si no hay)"""
+        if not self.can_redo:
+            return None
+        self.position += 1
+        return self.current
+
+    def memory_bytes(self, snapshots=None):
+        """Bytes de las instantáneas: columnas (cada arreglo una vez, sin los crudos) y lo renderizado"""
+        memory, rendered = {}, 0
+        for snapshot in self.snapshots if snapshots is None else snapshots:
+            memory.update(frame_memory(snapshot.payload.df))
+            rendered += snapshot.rendered_bytes
+        return rendered + sum(size for key, size in memory.items() if key not in self._base)
+
+    def _evict(self):
+        # Las más antiguas primero; la actual siempre queda
+        budget = self.budget_mb * 1024 ** 2
+        while self.position > 0 and self.memory_bytes() > budget:
+            del self.snapshots[0]
+            self.position -= 1
+            self.evicted += 1
+
+    def status(self):
+        """Texto 'Historial: actual/total · MB'"""
+        if not self.snapshots:
+            return "Historial: vacío"
+        text = (
+            f"Historial: {self.position + 1}/{len(self.snapshots)} · "
+            f"{self.memory_bytes() / 1024 ** 2:.1f} MB"
+        )
+        if self.evicted:
+            text += f" ({self.evicted} descartadas)"
+        return text
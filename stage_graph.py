@@ -0,0 +1,233 @@
+"""
+Grafo de etapas de procesamiento
+Describe un procesamiento como etapas con nombre que dependen de los
+resultados de otras etapas y de algunas claves de los parámetros. Al pedir
+unas etapas objetivo se ejecutan solo las necesarias:
+
+    - las etapas cuyas entradas están listas corren a la vez en un pool de
+      hilos (NumPy y pandas liberan el GIL en las operaciones pesadas)
+    - cada resultado se recuerda con una clave formada por sus parámetros y
+      las claves de sus entradas; si nada cambió no se vuelve a calcular.
+      Las etapas agregadas con retain=False (p. ej. las que devuelven una
+      copia de los datos) no se recuerdan: su resultado se suelta al terminar
+      la ejecución y se vuelve a calcular cuando otra etapa lo necesita
+    - el avance se calcula con el costo medido de cada etapa en ejecuciones
+      anteriores (segundos por fila), no con porcentajes fijos
+
+pipeline.processing_graph() arma el grafo del programa (parse, validate,
+filter, timestamps, stats, histograms, ..., export, render).
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import config
+
+
+# function(params, *resultados de inputs) -> resultado
+Stage = namedtuple('Stage', ['name', 'function', 'inputs', 'params', 'weight', 'retain'])
+
+
+class StageGraph:
+    """Etapas con dependencias, ejecución concurrente y resultados recordados"""
+
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers (int): Hilos del pool (config.STAGE_MAX_WORKERS)
+        """
+        self.max_workers = max_workers or config.STAGE_MAX_WORKERS
+        self.stages = {}
+        # Último resultado de cada etapa con retain: nombre -> (clave, resultado).
+        # Mantiene vivos esos resultados entre ejecuciones (hasta clear())
+        self._memo = {}
+        # Costo medido: nombre -> segundos por fila
+        self._costs = {}
+        # Última ejecución: nombre -> segundos (None = resultado recordado)
+        self.timings = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, function, inputs=(), params=(), weight=1.0, retain=True):
+        """
+        Agregar una etapa
+
+        Args:
+            name (str): Nombre único
+            function (callable): function(params, *resultados de inputs)
+            inputs (tuple): Etapas cuyos resultados recibe, en orden
+            params (tuple): Claves de los parámetros de las que depende
+            weight (float): Costo relativo inicial (hasta medirlo)
+            retain (bool): Recordar el resultado entre ejecuciones
+        """
+        for dependency in inputs:
+            if dependency not in self.stages:
+                raise ValueError(f"Etapa '{name}': entrada desconocida '{dependency}'")
+        self.stages[name] = Stage(name, function, tuple(inputs), tuple(params), weight, retain)
+        return self
+
+    def clear(self):
+        """Olvidar los resultados recordados (p. ej. al cargar otros datos)"""
+        # Sin tomar el lock: no espera a una ejecución en curso
+        self._memo.clear()
+
+    def plan(self, targets, provided=()):
+        """
+        Etapas necesarias para los objetivos, en orden topológico
+
+        Args:
+            targets (list): Etapas pedidas
+            provided (iterable): Etapas cuyo resultado ya se tiene (no se
+                recorren sus entradas)
+
+        Returns:
+            list: Nombres de etapas (cada una después de sus entradas)
+        """
+        order, seen = [], set(provided)
+
+        def visit(name):
+            if name in seen:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Etapa desconocida: {name}")
+            seen.add(name)
+            for dependency in self.stages[name].inputs:
+                visit(dependency)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _estimate(self, name, size):
+        """Segundos estimados de una etapa para size filas"""
+        stage = self.stages[name]
+        if name in self._costs:
+            return self._costs[name] * max(size, 1)
+        # Sin medición: peso relativo a la etapa medida más barata por unidad de peso
+        measured = [self._costs[n] / self.stages[n].weight for n in self._costs if n in self.stages]
+        per_weight = min(measured) if measured else 1e-7
+        return stage.weight * per_weight * max(size, 1)
+
+    def run(self, targets, params, values=None, progress=None, size=None):
+        """
+        Ejecutar las etapas necesarias para obtener los objetivos
+
+        Args:
+            targets (list): Etapas cuyos resultados se devuelven
+            params (dict): Parámetros (cada etapa lee solo sus claves)
+            values (dict): Resultados ya disponibles (nombre -> valor), p. ej.
+                los datos ya cargados en lugar de 'parse' y 'validate'
+            progress (callable): Recibe el avance (0-100)
+            size (int): Filas de los datos, para escalar los costos medidos
+
+        Returns:
+            dict: Nombre -> resultado de los objetivos y de las etapas
+            ejecutadas o recordadas
+        """
+        with self._lock:
+            return self._run(targets, params, dict(values or {}), progress, size)
+
+    def _run(self, targets, params, values, progress, size):
+        report = progress or (lambda value: None)
+        results, keys = {}, {}
+        self.timings = {}
+
+        # Valores dados: el mismo objeto conserva su clave, uno nuevo recibe otra
+        for name, value in values.items():
+            memo = self._memo.get(name)
+            if memo is None or memo[1] is not value:
+                self._version += 1
+                memo = (('dado', self._version), value)
+                if self._retained(name):
+                    self._memo[name] = memo
+            keys[name] = memo[0]
+            results[name] = value
+
+        order = self.plan(targets, provided=values)
+
+        # Claves de todas las etapas del plan (antes de ejecutar nada)
+        for name in order:
+            stage = self.stages[name]
+            keys[name] = (
+                name,
+                tuple(repr(params.get(key)) for key in stage.params),
+                tuple(keys[dependency] for dependency in stage.inputs),
+            )
+
+        missing = set()
+        for name in order:
+            memo = self._memo.get(name)
+            if memo is not None and memo[0] == keys[name]:
+                results[name] = memo[1]
+                self.timings[name] = None
+            else:
+                missing.add(name)
+
+        # Solo las etapas pedidas o que alimentan a otra que se ejecuta (una
+        # etapa no recordada cuyos consumidores están recordados no corre)
+        needed = set()
+        for name in reversed(order):
+            if name in missing and (
+                name in targets or any(name in self.stages[c].inputs for c in needed)
+            ):
+                needed.add(name)
+        pending = [name for name in order if name in needed]
+
+        if size is None:
+            size = next((len(v) for v in values.values() if hasattr(v, '__len__')), 1)
+        estimates = {name: self._estimate(name, size) for name in pending}
+        total = sum(estimates.values()) or 1.0
+        done = 0.0
+        report(0)
+
+        def execute(name):
+            stage = self.stages[name]
+            start = time.perf_counter()
+            result = stage.function(params, *(results[d] for d in stage.inputs))
+            return result, time.perf_counter() - start
+
+        running = {}
+        remaining = list(pending)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='etapa') as pool:
+            try:
+                while remaining or running:
+                    ready = [
+                        name for name in remaining
+                        if all(d in results for d in self.stages[name].inputs)
+                    ]
+                    for name in ready:
+                        remaining.remove(name)
+                        running[pool.submit(execute, name)] = name
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name = running.pop(future)
+                        result, seconds = future.result()
+                        results[name] = result
+                        if self._retained(name):
+                            self._memo[name] = (keys[name], result)
+                        self.timings[name] = seconds
+                        self._costs[name] = seconds / max(size, 1)
+                        done += estimates[name]
+                        report(int(100 * done / total))
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+
+        report(100)
+        return results
+
+    def _retained(self, name):
+        stage = self.stages.get(name)
+        return stage is None or stage.retain
+
+    def timing_report(self):
+        """Texto con la duración de cada etapa de la última ejecución"""
+        lines = []
+        for name, seconds in self.timings.items():
+            text = "recordado" if seconds is None else f"{1000 * seconds:.1f} ms"
+            lines.append(f"  {name:<12s} {text}")
+        return "\n".join(lines)
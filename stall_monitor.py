@@ -0,0 +1,216 @@
+"""
+Monitor de bloqueos del bucle de eventos
+Mide la latencia de la interfaz con un temporizador de latido en el hilo
+principal: cada latido que llega tarde es tiempo en que el bucle de eventos
+no pudo atender al usuario. Un hilo vigía muestrea la pila del hilo principal
+(sys._current_frames) mientras el latido está atrasado, de modo que cada
+bloqueo se atribuye al slot o método que se estaba ejecutando.
+
+Uso:
+    python data_processor_advanced.py --monitor-stalls
+
+Al cerrar la ventana se imprime el informe. ui_benchmark.py usa el mismo
+monitor para medir la carga, el procesamiento y la exportación sin pantalla.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+
+import config
+
+
+MONITOR_FLAG = '--monitor-stalls'
+
+# Bloqueo detectado: inicio (s, relativo al monitor), duración (ms), fase y
+# atribución (ver describe_stack)
+Stall = namedtuple('Stall', ['start', 'duration_ms', 'phase', 'source'])
+
+# Archivos del programa (para elegir los marcos de la pila que se informan)
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def monitor_requested(argv):
+    """Indicar si se pidió --monitor-stalls (y quitarlo de argv para Qt)"""
+    if MONITOR_FLAG in argv:
+        argv.remove(MONITOR_FLAG)
+        return True
+    return False
+
+
+def percentile(values, q):
+    """Percentil q (0-100) por el método del rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[rank - 1]
+
+
+def describe_stack(frame):
+    """
+    Atribuir una pila del hilo principal
+
+    El slot es el marco más externo que es un método de un QObject (lo que el
+    bucle de eventos llamó); el detalle es el marco más interno del programa
+    y, si desde ahí se llamó a una biblioteca, la función llamada.
+
+    Returns:
+        str: 'Clase.slot → función (archivo:línea) → módulo.función', o '(Qt)'
+        si no se ejecuta código Python
+    """
+    from PyQt6.QtCore import QObject
+
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+
+    slot = None
+    for f in frames:
+        owner = f.f_locals.get('self')
+        if isinstance(owner, QObject) and not isinstance(owner, StallMonitor):
+            slot = f"{type(owner).__name__}.{f.f_code.co_name}"
+            break
+
+    parts = []
+    for k in range(len(frames) - 1, -1, -1):
+        f = frames[k]
+        path = os.path.abspath(f.f_code.co_filename)
+        if path.startswith(_PACKAGE_DIR) and path != os.path.abspath(__file__):
+            if slot is None or f.f_code.co_name != slot.split('.')[-1]:
+                parts.append(f"{f.f_code.co_name} ({os.path.basename(path)}:{f.f_lineno})")
+            if k + 1 < len(frames):
+                callee = frames[k + 1]
+                module = callee.f_globals.get('__name__', '').split('.')[0]
+                parts.append(f"{module}.{callee.f_code.co_name}")
+            break
+
+    if slot is not None:
+        parts.insert(0, slot)
+    return " → ".join(parts) or "(Qt)"
+
+
+class StallMonitor:
+    """Latencia del bucle de eventos y bloqueos atribuidos a su origen"""
+
+    def __init__(self, threshold_ms=None, heartbeat_ms=None, sample_ms=None):
+        """
+        Args:
+            threshold_ms (float): Duración mínima de un bloqueo (config.STALL_THRESHOLD_MS)
+            heartbeat_ms (int): Intervalo del latido (config.STALL_HEARTBEAT_MS)
+            sample_ms (int): Intervalo de muestreo de la pila (config.STALL_SAMPLE_MS)
+        """
+        self.threshold_ms = threshold_ms if threshold_ms is not None else config.STALL_THRESHOLD_MS
+        self.heartbeat_ms = heartbeat_ms or config.STALL_HEARTBEAT_MS
+        self.sample_ms = sample_ms or config.STALL_SAMPLE_MS
+        self.phase = ''
+        self.latencies = {}
+        self.stalls = []
+        self._origin = time.perf_counter()
+        self._last_beat = None
+        self._samples = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._main_thread = threading.main_thread().ident
+        self._timer = None
+        self._watchdog = None
+
+    def start(self):
+        """Iniciar el latido (en el hilo principal) y el hilo vigía"""
+        from PyQt6.QtCore import Qt, QTimer
+
+        self._timer = QTimer()
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(self.heartbeat_ms)
+        self._timer.timeout.connect(self._beat)
+        self._last_beat = time.perf_counter()
+        self._timer.start()
+
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name='stall-watchdog', daemon=True)
+        self._watchdog.start()
+        return self
+
+    def stop(self):
+        """Detener el latido y el hilo vigía"""
+        if self._timer is not None:
+            self._timer.stop()
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def set_phase(self, name):
+        """Etiquetar las mediciones siguientes (p. ej. 'carga', 'exportación')"""
+        self.phase = name
+
+    def _beat(self):
+        now = time.perf_counter()
+        gap_ms = 1000.0 * (now - self._last_beat)
+        self._last_beat = now
+        latency = max(0.0, gap_ms - self.heartbeat_ms)
+        self.latencies.setdefault(self.phase, []).append(latency)
+
+        with self._lock:
+            samples, self._samples = self._samples, Counter()
+        if gap_ms >= self.threshold_ms:
+            source = samples.most_common(1)[0][0] if samples else "(sin muestra)"
+            start = now - gap_ms / 1000.0 - self._origin
+            self.stalls.append(Stall(start, gap_ms, self.phase, source))
+
+    def _watch(self):
+        """Muestrear la pila del hilo principal mientras el latido esté atrasado"""
+        interval = self.sample_ms / 1000.0
+        while not self._stop.wait(interval):
+            last = self._last_beat
+            if last is None or 1000.0 * (time.perf_counter() - last) < self.threshold_ms / 2:
+                continue
+            frame = sys._current_frames().get(self._main_thread)
+            if frame is None:
+                continue
+            source = describe_stack(frame)
+            del frame
+            with self._lock:
+                self._samples[source] += 1
+
+    def phase_summary(self):
+        """
+        Latencia por fase
+
+        Returns:
+            list: (fase, latidos, p95 ms, peor ms, bloqueos) en orden de aparición
+        """
+        rows = []
+        for phase, values in self.latencies.items():
+            stalls = [stall for stall in self.stalls if stall.phase == phase]
+            rows.append((phase, len(values), percentile(values, 95), max(values, default=0.0), len(stalls)))
+        return rows
+
+    def report(self, top=10):
+        """Texto con la latencia por fase y los bloqueos más largos"""
+        lines = ["BLOQUEOS DE LA INTERFAZ", "=" * 72,
+                 f"  Umbral {self.threshold_ms:.0f} ms · latido {self.heartbeat_ms} ms", ""]
+        rows = self.phase_summary()
+        width = max([len(phase) for phase, *_ in rows] + [len('(sin fase)')])
+        lines.append(f"  {'Fase':<{width}s} {'Latidos':>8s} {'p95 (ms)':>10s} {'Peor (ms)':>10s} {'Bloqueos':>9s}")
+        for phase, beats, p95, worst, count in rows:
+            lines.append(f"  {phase or '(sin fase)':<{width}s} {beats:8d} {p95:10.1f} {worst:10.1f} {count:9d}")
+
+        if self.stalls:
+            lines.extend(["", f"  Bloqueos más largos (de {len(self.stalls)}):"])
+            for stall in sorted(self.stalls, key=lambda s: s.duration_ms, reverse=True)[:top]:
+                lines.append(f"  {stall.duration_ms:8.0f} ms  [{stall.phase}] {stall.source}")
+
+        # Tiempo bloqueado total por origen
+        by_source = Counter()
+        for stall in self.stalls:
+            by_source[stall.source] += stall.duration_ms
+        if by_source:
+            lines.extend(["", "  Tiempo bloqueado por origen:"])
+            for source, total in by_source.most_common(top):
+                lines.append(f"  {total:8.0f} ms  {source}")
+        return "\n".join(lines)
@@ -0,0 +1,45 @@
+"""
+Perfil de arranque de las aplicaciones
+Registra marcas de tiempo (importaciones, construcción de la ventana, primer
+pintado) para la opción --profile-startup. No importa módulos pesados.
+"""
+
+import time
+
+
+PROFILE_FLAG = '--profile-startup'
+
+
+class StartupProfiler:
+    """Marcas de tiempo del arranque relativas a un instante inicial"""
+
+    def __init__(self, start=None):
+        """
+        Args:
+            start (float): Instante inicial (time.perf_counter); por defecto ahora
+        """
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = []
+
+    def mark(self, name, at=None):
+        """Registrar una etapa terminada"""
+        self.marks.append((name, at if at is not None else time.perf_counter()))
+
+    def report(self):
+        """Texto con la duración de cada etapa y el total"""
+        lines = ["PERFIL DE ARRANQUE", "=" * 40]
+        previous = self.start
+        for name, at in self.marks:
+            lines.append(f"  {name:<28s} {1000 * (at - previous):8.1f} ms")
+            previous = at
+        lines.append("-" * 40)
+        lines.append(f"  {'Total hasta ventana visible':<28s} {1000 * (previous - self.start):8.1f} ms")
+        return "\n".join(lines)
+
+
+def profile_requested(argv):
+    """Indicar si se pidió --profile-startup (y quitarlo de argv para Qt)"""
+    if PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+        return True
+    return False
@@ -0,0 +1,222 @@
+"""
+Funciones base para datos de TDC
+Conversión numérica de columnas y reconstrucción de tiempos absolutos,
+compartidas por la interfaz gráfica y los módulos de análisis
+"""
+
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+import config
+from compressed_io import is_compressed_file, open_input
+
+
+# Período del contador grueso (ResetCount) en nanosegundos
+COARSE_PERIOD_NS = config.TDC_COARSE_PERIOD_NS
+
+
+# Filas usadas para estimar si una columna de texto tiene pocos valores distintos
+_CARDINALITY_SAMPLE = 10_000
+
+
+def _parse_decimal_text(series):
+    """Convertir texto con coma decimal a float64 (NaN si no es numérico)"""
+    return pd.to_numeric(
+        series.str.replace(',', '.', regex=False),
+        errors='coerce'
+    ).astype(np.float64)
+
+
+def to_numeric(series):
+    """
+    Convertir una columna a float64 aceptando coma decimal
+
+    Las columnas de texto con pocos valores distintos (FineNS cuantizado,
+    Timestamp_PC repetido) se convierten una sola vez por valor distinto.
+
+    Args:
+        series (pd.Series): Columna original (texto o numérica)
+
+    Returns:
+        pd.Series: Columna float64; los valores inválidos quedan como NaN
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(np.float64)
+    if series.dtype == object:
+        series = series.astype(str)
+
+    sample = series.iloc[:_CARDINALITY_SAMPLE]
+    if len(series) > _CARDINALITY_SAMPLE and sample.nunique() < len(sample) // 2:
+        codes, uniques = pd.factorize(series)
+        values = _parse_decimal_text(pd.Series(uniques)).to_numpy()
+        # Código -1 (valor vacío) -> NaN agregado al final de la tabla
+        values = np.append(values, np.nan)
+        converted = values.take(codes)
+        return pd.Series(converted, index=series.index, name=series.name)
+
+    return _parse_decimal_text(series)
+
+
+def read_data_file(file_path, sep=None):
+    """
+    Leer un archivo de datos con columnas numéricas ya tipadas
+
+    La coma decimal se interpreta durante el parseo, de modo que FineNS y
+    t1_nS llegan como float64 sin conversiones de texto posteriores.
+
+    Los libros Excel exportados (.xlsx) se leen con excel_io con el mismo
+    resultado; los CSV comprimidos (.csv.gz / .csv.zst) se descomprimen
+    mientras se parsean (compressed_io).
+
+    Args:
+        file_path (str): Archivo CSV, CSV comprimido o .xlsx
+        sep (str): Separador de columnas (por defecto config.CSV_SEPARATOR)
+
+    Returns:
+        pd.DataFrame: Datos leídos
+    """
+    from excel_io import is_excel_file
+    if is_excel_file(file_path):
+        from excel_io import read_excel_file
+        return read_excel_file(file_path)
+    if is_compressed_file(file_path):
+        with open_input(file_path) as handle:
+            return read_data_file(handle, sep)
+    return pd.read_csv(
+        file_path,
+        sep=sep or config.CSV_SEPARATOR,
+        decimal=config.DECIMAL_SEPARATOR
+    )
+
+
+def read_data_chunks(file_path, chunksize=None, sep=None):
+    """
+    Leer un archivo de datos por bloques (mismo formato que read_data_file)
+
+    El archivo se abre recién al pedir el primer bloque.
+
+    Args:
+        file_path (str): Archivo CSV, CSV comprimido o .xlsx (o archivo abierto
+            en modo binario)
+        chunksize (int): Filas por bloque (por defecto config.READ_CHUNK_ROWS)
+        sep (str): Separador de columnas (por defecto config.CSV_SEPARATOR)
+
+    Yields:
+        pd.DataFrame: Bloques consecutivos del archivo
+    """
+    from excel_io import ExcelReader, is_excel_file
+    if is_excel_file(file_path):
+        yield from ExcelReader(file_path, chunksize).blocks()
+        return
+    if is_compressed_file(file_path):
+        with open_input(file_path) as handle:
+            yield from read_data_chunks(handle, chunksize, sep)
+        return
+    with pd.read_csv(
+        file_path,
+        sep=sep or config.CSV_SEPARATOR,
+        decimal=config.DECIMAL_SEPARATOR,
+        chunksize=chunksize or config.READ_CHUNK_ROWS
+    ) as reader:
+        yield from reader
+
+
+def numeric_frame(df, columns):
+    """
+    Obtener las columnas indicadas convertidas a float64
+
+    Args:
+        df (pd.DataFrame): Datos originales
+        columns (list): Columnas a convertir (las ausentes se ignoran)
+
+    Returns:
+        pd.DataFrame: Nuevo DataFrame con las columnas convertidas
+    """
+    return pd.DataFrame(
+        {col: to_numeric(df[col]) for col in columns if col in df.columns},
+        index=df.index
+    )
+
+
+def reset_counts(df, channel):
+    """
+    Contador grueso ResetCount de un canal como float64
+
+    Si config.TDC_RESET_COUNTER_BITS indica el ancho del contador, se
+    reconstruyen sus desbordes en el orden de las filas (kernels.unwrap).
+
+    Returns:
+        np.ndarray: Conteos (NaN si falta el dato)
+    """
+    reset = to_numeric(df[f'{channel}_ResetCount']).to_numpy()
+    if config.TDC_RESET_COUNTER_BITS:
+        from kernels import unwrap_valid
+        reset = unwrap_valid(reset, float(2 ** config.TDC_RESET_COUNTER_BITS), np.isfinite(reset))
+    return reset
+
+
+def absolute_time_ns(df, channel):
+    """
+    Reconstruir el tiempo absoluto de un canal: ResetCount * período + FineNS
+
+    Args:
+        df (pd.DataFrame): Datos con columnas <canal>_ResetCount y <canal>_FineNS
+        channel (str): 'T1' o 'T2'
+
+    Returns:
+        np.ndarray: Tiempos en nanosegundos (float64, NaN si falta algún dato)
+    """
+    reset = reset_counts(df, channel)
+    fine = to_numeric(df[f'{channel}_FineNS']).to_numpy()
+    return reset * COARSE_PERIOD_NS + fine
+
+
+class AbsoluteTimes(Mapping):
+    """
+    Tiempos absolutos de T1 y T2 calculados una sola vez, en el primer uso
+
+    Se comparte entre análisis que corren en hilos distintos (ver
+    pipeline.processing_graph): el primero que pide un canal lo reconstruye
+    y los demás esperan y reutilizan el resultado.
+    """
+
+    CHANNELS = ('T1', 'T2')
+
+    def __init__(self, df):
+        self._df = df
+        self._times = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, channel):
+        if channel not in self.CHANNELS:
+            raise KeyError(channel)
+        with self._lock:
+            if channel not in self._times:
+                self._times[channel] = absolute_time_ns(self._df, channel)
+            return self._times[channel]
+
+    def __iter__(self):
+        return iter(self.CHANNELS)
+
+    def __len__(self):
+        return len(self.CHANNELS)
+
+
+def absolute_times(df, times=None):
+    """
+    Tiempos absolutos de T1 y T2, reutilizando los ya calculados
+
+    Args:
+        df (pd.DataFrame): Datos con las columnas de ambos canales
+        times (Mapping): Tiempos ya reconstruidos (canal -> arreglo alineado
+            con df), p. ej. AbsoluteTimes
+
+    Returns:
+        Mapping: 'T1' y 'T2' -> np.ndarray (ns)
+    """
+    if times is not None:
+        return times
+    return {channel: absolute_time_ns(df, channel) for channel in ('T1', 'T2')}
@@ -0,0 +1,27 @@
+"""Pruebas del informe de encabezado de data_validation"""
+
+import pandas as pd
+
+import config
+from data_validation import validate_dataframe
+
+
+def _frame(extra=()):
+    columns = list(config.EXPECTED_COLUMNS) + ['t1_nS.1', 'Unnamed: 12'] + list(extra)
+    return pd.DataFrame(columns=columns)
+
+
+def test_unexpected_columns_reported_without_invalidating():
+    result = validate_dataframe(_frame(['T1_Fine_NS']))
+
+    assert result.unexpected_columns == ['T1_Fine_NS']
+    assert result.is_valid and not result.is_clean
+    assert "Columnas inesperadas: T1_Fine_NS" in result.summary()
+
+
+def test_known_extra_columns_are_not_unexpected():
+    result = validate_dataframe(_frame([config.MERGE_SOURCE_COLUMN]))
+
+    assert result.unexpected_columns == []
+    assert result.is_clean
+    assert result.summary() == "Sin problemas detectados"
@@ -0,0 +1,52 @@
+"""Pruebas del filtro por expresión (filter_expression) frente a DataFrame.query"""
+
+import numpy as np
+import pytest
+
+from filter_expression import FilterSyntaxError, filter_context, filter_mask
+from pipeline import process_dataframe
+from tdc_core import read_data_file
+
+
+EXPRESSIONS = [
+    'T1_FineNS > 20',
+    'T1_FineNS > 20 and T2_ResetCount - T1_ResetCount < 500000',
+    '100 <= T1_Index < 200',
+    'Num_Lote == 1 and 50 <= T1_Index <= 150 and T2_FineNS < 30',
+    'T1_Index < 10 or T1_Index > 300',
+    'not (T1_FineNS >= 40)',
+    'abs(`t1_nS.1` - t1_nS) < 5e8',
+    'T2_Index != T1_Index',
+    'T1_FineNS * 2 + 1 > T2_FineNS / 2',
+]
+
+
+@pytest.fixture(scope='module')
+def data():
+    return process_dataframe(read_data_file('lote_1.csv'), {})
+
+
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+def test_same_rows_as_query(data, expression):
+    expected = data.index.isin(data.query(expression).index)
+    assert np.array_equal(filter_mask(data, expression), expected)
+
+
+def test_cached_masks_give_same_result(data):
+    context = filter_context(data)
+    first = context.evaluate(EXPRESSIONS[1])
+    assert np.array_equal(context.evaluate(EXPRESSIONS[1]), first)
+    assert filter_context(data) is context
+
+
+@pytest.mark.parametrize('expression', [
+    '__import__("os").system("echo")',
+    'T1_FineNS.__class__',
+    'lambda: 1',
+    '[x for x in T1_FineNS]',
+    'T1_FineNS > "a"',
+    'Columna_Inexistente > 1',
+])
+def test_rejects_unsafe_or_invalid(data, expression):
+    with pytest.raises(FilterSyntaxError):
+        filter_mask(data, expression)
@@ -0,0 +1,38 @@
+"""Pruebas del filtro por hora del PC (pc_time_bounds / pipeline.pc_time_mask)"""
+
+import pandas as pd
+
+from pc_time import DAY_MS, pc_time_bounds
+from pipeline import pc_time_mask
+
+
+def _frame(stamps):
+    return pd.DataFrame({'Timestamp_PC': stamps, 'Num_Lote': range(len(stamps))})
+
+
+def test_from_earlier_than_first_record():
+    df = _frame(['17:19:38.494', '17:19:38.494', '17:30:00.000', '18:05:00.000'])
+
+    assert pc_time_mask(df, '17:19:38', '').sum() == 4
+    assert pc_time_mask(df, '17:00', '18:00').tolist() == [True, True, True, False]
+    # El "desde" se lleva al inicio del run, no al día siguiente
+    first_ms = (17 * 3600 + 19 * 60 + 38) * 1000 + 494
+    assert pc_time_bounds('17:00', '', first_ms)[0] == first_ms
+
+
+def test_range_crossing_midnight():
+    df = _frame(['23:50:00.000', '23:59:59.999', '00:00:00.500', '00:20:00.000', '01:00:00.000'])
+
+    assert pc_time_mask(df, '23:55', '00:30').tolist() == [False, True, True, True, False]
+    assert pc_time_mask(df, '', '00:10').tolist() == [True, True, True, False, False]
+    low, high = pc_time_bounds('23:55', '00:30', 23 * 3600_000 + 50 * 60_000)
+    assert high - low == 35 * 60_000 and high > DAY_MS
+
+
+def test_from_after_midnight_in_run_crossing_midnight():
+    df = _frame(['23:50:00.000', '23:59:59.999', '00:00:00.500', '00:20:00.000', '01:00:00.000'])
+
+    assert pc_time_mask(df, '00:10', '00:30').tolist() == [False, False, False, True, False]
+    assert pc_time_mask(df, '00:10', '').tolist() == [False, False, False, True, True]
+    # Después del final del run (al día siguiente): ninguna fila
+    assert pc_time_mask(df, '01:30', '').sum() == 0
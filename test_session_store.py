@@ -0,0 +1,78 @@
+"""Pruebas de guardar y restaurar sesiones (session_store)"""
+
+import numpy as np
+import pandas as pd
+
+from pipeline import analyze_processed, complete_params, process_dataframe
+from session_store import load_session, save_session
+from tdc_core import read_data_file
+
+
+def _values_equal(restored, original):
+    # Columnas restauradas: mapeos .npy y texto como Categorical
+    if list(restored.columns) != list(original.columns) or len(restored) != len(original):
+        return False
+    for col in original.columns:
+        a, b = np.asarray(restored[col]), np.asarray(original[col])
+        if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+            if not np.array_equal(a.astype(float), b.astype(float), equal_nan=True):
+                return False
+        elif not np.array_equal(a.astype(str), b.astype(str)):
+            return False
+    return True
+
+
+def _processed():
+    raw = read_data_file('lote_1.csv')
+    params = complete_params({
+        'all_lotes': True, 'normalize': True, 'analyze_gaps': True,
+        'analyze_rates': True, 'fit_peaks': True,
+    })
+    processed = process_dataframe(raw, params)
+    return raw, params, processed, analyze_processed(processed, params)
+
+
+def test_round_trip(tmp_path):
+    raw, params, processed, analyses = _processed()
+    folder = save_session(tmp_path / 'run', params, processed, raw_df=raw, analyses=analyses,
+                          source='lote_1.csv')
+    session = load_session(folder)
+
+    assert session.params == params
+    assert session.source == 'lote_1.csv'
+    assert _values_equal(session.processed_df, processed)
+    assert _values_equal(session.raw_df, raw)
+    assert _values_equal(session.analyses['gap_result']['events'], analyses['gap_result']['events'])
+    assert _values_equal(session.analyses['fit_result']['summary'], analyses['fit_result']['summary'])
+    assert session.analyses['lote_result'] is not None
+
+
+def test_rates_restored_without_recomputing(tmp_path, monkeypatch):
+    raw, params, processed, analyses = _processed()
+    folder = save_session(tmp_path / 'run', params, processed, analyses=analyses)
+
+    import rate_analysis
+
+    def fail(*args, **kwargs):
+        raise AssertionError("la tasa se recalculó")
+
+    monkeypatch.setattr(rate_analysis, 'analyze_rates', fail)
+    restored = load_session(folder).analyses['rate_result']
+    original = analyses['rate_result']
+
+    assert restored['window_ns'] == original['window_ns']
+    assert _values_equal(restored['summary'], original['summary'])
+    for channel, histogram in original['histograms'].items():
+        for window_ns in (1e3, 1e6, 3.3e5):
+            for a, b in zip(restored['histograms'][channel].rate(window_ns), histogram.rate(window_ns)):
+                assert np.array_equal(a, b)
+
+
+def test_overwrite_replaces_previous_session(tmp_path):
+    raw, params, processed, analyses = _processed()
+    save_session(tmp_path / 'run', params, processed, raw_df=raw)
+    folder = save_session(tmp_path / 'run', params, processed.iloc[:10])
+
+    session = load_session(folder)
+    assert len(session.processed_df) == 10 and session.raw_df is None
+    assert isinstance(session.processed_df, pd.DataFrame)
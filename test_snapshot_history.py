@@ -0,0 +1,71 @@
+"""Pruebas del historial de resultados (snapshot_history)"""
+
+import numpy as np
+import pandas as pd
+
+from result_rendering import RenderPayload
+from snapshot_history import SnapshotHistory, column_memory
+
+
+def _payload(df, params=None):
+    return RenderPayload(df=df, params=params or {}, table=None, stats_html='', summary_text='',
+                         lote_result=None, lote_table=None)
+
+
+def test_shared_column_and_undo_redo():
+    first = pd.DataFrame({'a': np.arange(1000, dtype=np.float64), 'b': np.zeros(1000)})
+    # 'a' con los mismos valores en otro arreglo, 'b' cambiada
+    second = pd.DataFrame({'a': np.arange(1000, dtype=np.float64), 'b': np.ones(1000)})
+
+    history = SnapshotHistory(budget_mb=100)
+    history.add(_payload(first, {'normalize': False}))
+    stored = history.add(_payload(second, {'normalize': True}))
+
+    assert column_memory(stored.df['a']) == column_memory(first['a'])
+    assert column_memory(stored.df['b']) != column_memory(first['b'])
+    assert stored.df.equals(second)
+
+    assert history.can_undo and not history.can_redo
+    assert history.undo().payload.params == {'normalize': False}
+    assert history.undo() is None
+    assert history.redo().payload.params == {'normalize': True}
+    assert history.redo() is None
+
+
+def test_same_result_is_not_added_again():
+    df = pd.DataFrame({'a': np.arange(10.0)})
+    history = SnapshotHistory(budget_mb=100)
+    first = history.add(_payload(df, {'normalize': False}))
+
+    # Mismo resultado recalculado (otro arreglo, mismos valores y parámetros)
+    again = history.add(_payload(pd.DataFrame({'a': np.arange(10.0)}), {'normalize': False}))
+    assert again is first and len(history) == 1
+
+    history.add(_payload(df, {'normalize': True}))
+    assert len(history) == 2 and history.undo().payload is first
+
+
+def test_budget_evicts_oldest_but_keeps_current():
+    rows = 128 * 1024  # 1 MB por columna float64
+    history = SnapshotHistory(budget_mb=2.5)
+    for k in range(4):
+        history.add(_payload(pd.DataFrame({'a': np.full(rows, float(k))}), {'k': k}))
+
+    assert history.memory_bytes() <= 2.5 * 1024 ** 2
+    assert history.evicted == 2 and len(history) == 2
+    assert history.current.payload.params == {'k': 3}
+
+    # Una instantánea mayor que el presupuesto queda igual (es la actual)
+    history.add(_payload(pd.DataFrame({'a': np.zeros(4 * rows)}), {'k': 4}))
+    assert len(history) == 1 and history.current.payload.params == {'k': 4}
+
+
+def test_raw_columns_and_rendered_content_are_accounted():
+    raw = pd.DataFrame({'a': np.arange(1000.0)})
+    history = SnapshotHistory(budget_mb=100)
+    history.reset(base=raw)
+
+    # Resultado que reutiliza la columna cruda: no cuenta, solo lo renderizado
+    snapshot_payload = _payload(raw.copy(deep=False), {'k': 0})._replace(stats_html='x' * 100_000)
+    history.add(snapshot_payload)
+    assert 100_000 <= history.memory_bytes() < 100_000 + raw['a'].nbytes
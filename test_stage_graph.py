@@ -0,0 +1,75 @@
+"""Pruebas del grafo de etapas (stage_graph) y de processing_graph"""
+
+from collections import Counter
+
+from pipeline import complete_params, processing_graph
+from stage_graph import StageGraph
+from tdc_core import read_data_file
+
+
+def _counting_graph():
+    calls = Counter()
+
+    def stage(name, function):
+        def run(params, *inputs):
+            calls[name] += 1
+            return function(params, *inputs)
+        return run
+
+    graph = StageGraph(max_workers=2)
+    graph.add('source', stage('source', lambda p: list(range(p['n']))), params=('n',))
+    graph.add('double', stage('double', lambda p, xs: [2 * x for x in xs]), ('source',), retain=False)
+    graph.add('total', stage('total', lambda p, xs: sum(xs) + p['offset']), ('double',), ('offset',))
+    graph.add('count', stage('count', lambda p, xs: len(xs)), ('source',))
+    return graph, calls
+
+
+def test_memoised_stages_do_not_run_again():
+    graph, calls = _counting_graph()
+    params = {'n': 5, 'offset': 0}
+
+    assert graph.run(['total', 'count'], params)['total'] == 20
+    assert graph.run(['total', 'count'], params)['total'] == 20
+    assert calls == Counter(source=1, double=1, total=1, count=1)
+    assert graph.timings['total'] is None
+
+
+def test_changed_param_recomputes_only_dependents():
+    graph, calls = _counting_graph()
+    graph.run(['total', 'count'], {'n': 5, 'offset': 0})
+    results = graph.run(['total', 'count'], {'n': 5, 'offset': 1})
+
+    assert results['total'] == 21
+    # 'double' no se recuerda (retain=False): se recalcula para 'total'
+    assert calls == Counter(source=1, double=2, total=2, count=1)
+
+    graph.run(['total', 'count'], {'n': 6, 'offset': 1})
+    assert calls == Counter(source=2, double=3, total=3, count=2)
+
+
+def test_given_values_keyed_by_identity():
+    graph, calls = _counting_graph()
+    data = [1, 2, 3]
+    graph.run(['count'], {}, values={'source': data})
+    graph.run(['count'], {}, values={'source': data})
+    assert calls['count'] == 1
+    graph.run(['count'], {}, values={'source': list(data)})
+    assert calls['count'] == 2
+
+    graph.clear()
+    graph.run(['count'], {}, values={'source': data})
+    assert calls['count'] == 3
+
+
+def test_processing_graph_does_not_keep_processed_data():
+    df = read_data_file('lote_1.csv')
+    graph = processing_graph()
+    params = complete_params({'all_lotes': True, 'analyze_gaps': True, 'max_rows': 10})
+
+    first = graph.run(['render'], params, values={'validate': df})
+    assert not {'filter', 'timestamps', 'render'} & set(graph._memo)
+
+    second = graph.run(['render'], dict(params, analyze_rates=True), values={'validate': df})
+    assert graph.timings['histograms'] is None and graph.timings['gaps'] is None
+    assert second['render'].rate_result is not None
+    assert first['render'].df.equals(second['render'].df)
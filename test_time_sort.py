@@ -0,0 +1,59 @@
+"""Pruebas del ordenamiento por tiempo (time_sort) y de la fusión de archivos (file_merge)"""
+
+import numpy as np
+
+import config
+from compressed_io import write_csv
+from file_merge import FileMerger
+from tdc_core import read_data_file
+from time_sort import ExternalSorter, is_time_sorted, sort_by_time, sort_file
+
+
+def _text_as_str(df):
+    # Los tramos volcados a disco devuelven el texto como Categorical
+    return df.astype({'Timestamp_PC': str})
+
+
+def _shuffled(tmp_path):
+    df = read_data_file('lote_1.csv')
+    shuffled = df.iloc[np.random.default_rng(0).permutation(len(df))].reset_index(drop=True)
+    path = tmp_path / 'desordenado.csv'
+    write_csv(shuffled, path)
+    return read_data_file(path), path
+
+
+def test_sort_file_matches_sort_by_time(tmp_path):
+    df, path = _shuffled(tmp_path)
+    expected = sort_by_time(df)
+
+    output = tmp_path / 'ordenado.csv'
+    assert sort_file(path, output) == len(df)
+    assert read_data_file(output).equals(expected)
+
+
+def test_external_sort_in_runs_matches_sort_by_time(tmp_path):
+    df, path = _shuffled(tmp_path)
+    sorter = ExternalSorter(path, memory_rows=50, chunksize=20, temp_dir=tmp_path)
+    result = sorter.to_dataframe()
+
+    assert sorter.runs > 1
+    assert len(result) == len(df) and is_time_sorted(result)
+    assert _text_as_str(result).equals(_text_as_str(sort_by_time(df)))
+
+
+def test_merge_of_split_files_is_time_ordered(tmp_path):
+    df = sort_by_time(read_data_file('lote_1.csv'))
+    paths = []
+    for k in range(3):
+        path = tmp_path / f'parte_{k}.csv'
+        write_csv(df.iloc[k::3], path)
+        paths.append(path)
+
+    merger = FileMerger(paths, chunksize=25)
+    merged = merger.to_dataframe()
+
+    assert merger.out_of_order == 0
+    assert merged[config.MERGE_SOURCE_COLUMN].nunique() == 3
+    merged = merged.drop(columns=config.MERGE_SOURCE_COLUMN).reset_index(drop=True)
+    assert is_time_sorted(merged)
+    assert merged.equals(sort_by_time(df))
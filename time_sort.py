@@ -0,0 +1,267 @@
+"""
+Ordenamiento externo de hits por tiempo reconstruido
+Los archivos de adquisiciones reiniciadas o de varias placas no están
+ordenados en el tiempo. sort_file los ordena por el tiempo absoluto de T1 o
+T2 (ResetCount * período + FineNS) con memoria acotada:
+
+    1. el archivo se lee por bloques (tdc_core.read_data_chunks) y se junta
+       en tramos de unas config.SORT_MEMORY_ROWS filas
+    2. cada tramo se ordena con un único argsort estable y se vuelca a una
+       carpeta temporal, una columna por .npy (session_store.save_frame)
+    3. los tramos se mapean en memoria y se fusionan leyendo de cada uno a lo
+       sumo SORT_MEMORY_ROWS / tramos filas por vez
+
+Si el archivo entra en un solo tramo no se escribe nada temporal: se ordena
+en memoria (sort_by_time) y se escribe directamente. La salida es un CSV con
+el formato de entrada (separador ';' y coma decimal).
+
+Las filas sin ningún tiempo conservan la posición de la fila anterior, igual
+que en file_merge. El orden es estable: a igual tiempo se respeta el orden
+del archivo.
+
+Uso:
+    python time_sort.py entrada.csv salida.csv --channel T2
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from compressed_io import open_output
+from file_merge import merge_keys
+from session_store import save_frame
+from tdc_core import read_data_chunks
+
+
+def sort_keys(df, channel=None, last_key=-np.inf):
+    """
+    Tiempo que ordena cada fila
+
+    Args:
+        df (pd.DataFrame): Datos o bloque de datos
+        channel (str): Canal principal (por defecto config.MERGE_TIME_CHANNEL)
+        last_key (float): Tiempo de la fila anterior al bloque
+
+    Returns:
+        np.ndarray: float64 sin NaN (las filas sin tiempo toman el anterior)
+    """
+    keys = merge_keys(df, channel)
+    return pd.Series(keys).ffill().fillna(last_key).to_numpy()
+
+
+def sort_by_time(df, channel=None):
+    """
+    Ordenar en memoria por tiempo reconstruido (un único argsort estable)
+
+    Returns:
+        pd.DataFrame: Filas ordenadas con índice 0..n-1
+    """
+    order = np.argsort(sort_keys(df, channel), kind='stable')
+    return df.iloc[order].reset_index(drop=True)
+
+
+def is_time_sorted(df, channel=None):
+    """Indicar si las filas ya están en orden de tiempo"""
+    keys = sort_keys(df, channel)
+    return bool(np.all(keys[1:] >= keys[:-1]))
+
+
+class _Run:
+    """Tramo ordenado volcado a disco y leído por partes"""
+
+    def __init__(self, folder, layout):
+        folder = Path(folder)
+        # Columnas mapeadas; las partes se arman recién al leerlas
+        self.columns = []
+        for entry in layout['columns']:
+            values = np.load(folder / entry['file'], mmap_mode='r', allow_pickle=False)
+            categories = None
+            if entry['text']:
+                categories = np.load(folder / entry['file'].replace('.npy', '.categories.npy'))
+            self.columns.append((entry['name'], values, categories))
+        self.keys = np.load(folder / 'keys.npy', mmap_mode='r')
+        self.position = 0
+
+    @property
+    def exhausted(self):
+        return self.position >= len(self.keys)
+
+    def horizon(self, block_rows):
+        """Último tiempo de la próxima parte de block_rows filas"""
+        end = min(self.position + block_rows, len(self.keys))
+        return self.keys[end - 1]
+
+    def _rows(self, start, stop):
+        data = {}
+        for name, values, categories in self.columns:
+            part = np.asarray(values[start:stop])
+            data[name] = part if categories is None else pd.Categorical.from_codes(part, categories)
+        return pd.DataFrame(data)
+
+    def take_until(self, frontier, block_rows):
+        """Filas siguientes con tiempo <= frontier (a lo sumo block_rows)"""
+        end = min(self.position + block_rows, len(self.keys))
+        cut = self.position + int(np.searchsorted(self.keys[self.position:end], frontier, side='right'))
+        rows = self._rows(self.position, cut)
+        keys = np.asarray(self.keys[self.position:cut])
+        self.position = cut
+        return rows, keys
+
+
+class ExternalSorter:
+    """Ordenamiento por tiempo de un archivo que no necesita caber en memoria"""
+
+    def __init__(self, path, channel=None, memory_rows=None, chunksize=None, sep=None,
+                 temp_dir=None):
+        """
+        Args:
+            path (str): Archivo CSV de entrada
+            channel (str): Canal del tiempo ('T1' o 'T2'; el otro si falta)
+            memory_rows (int): Filas por tramo en memoria (config.SORT_MEMORY_ROWS)
+            chunksize (int): Filas por bloque de lectura (config.READ_CHUNK_ROWS)
+            sep (str): Separador de columnas
+            temp_dir (str): Carpeta de los tramos temporales (config.SORT_TEMP_DIR)
+        """
+        self.path = path
+        self.channel = channel
+        self.memory_rows = memory_rows or config.SORT_MEMORY_ROWS
+        self.chunksize = min(chunksize or config.READ_CHUNK_ROWS, self.memory_rows)
+        self.sep = sep
+        self.temp_dir = temp_dir if temp_dir is not None else config.SORT_TEMP_DIR
+        self.rows = 0
+        self.runs = 0
+
+    def _pending_runs(self):
+        """
+        Juntar bloques en tramos de al menos memory_rows filas (o el resto)
+
+        Yields:
+            tuple: (filas del tramo, tiempos) sin ordenar
+        """
+        parts, keys, rows = [], [], 0
+        last_key = -np.inf
+        for chunk in read_data_chunks(self.path, self.chunksize, self.sep):
+            chunk_keys = sort_keys(chunk, self.channel, last_key)
+            if len(chunk_keys):
+                last_key = chunk_keys[-1]
+            parts.append(chunk)
+            keys.append(chunk_keys)
+            rows += len(chunk)
+            if rows >= self.memory_rows:
+                yield pd.concat(parts, ignore_index=True), np.concatenate(keys)
+                parts, keys, rows = [], [], 0
+        if parts:
+            yield pd.concat(parts, ignore_index=True), np.concatenate(keys)
+
+    def chunks(self):
+        """
+        Generar las filas ordenadas por tiempo
+
+        Yields:
+            pd.DataFrame: Bloques consecutivos ordenados
+        """
+        self.rows = 0
+        self.runs = 0
+        with tempfile.TemporaryDirectory(prefix='orden_', dir=self.temp_dir) as temp:
+            runs = []
+            pending = None
+            for block, keys in self._pending_runs():
+                if pending is not None:
+                    runs.append(self._spill(*pending, Path(temp) / f'{len(runs):04d}'))
+                pending = (block, keys)
+            if pending is None:
+                return
+            if not runs:
+                # Todo entra en memoria: un único argsort estable
+                block, keys = pending
+                self.runs = 1
+                order = np.argsort(keys, kind='stable')
+                self.rows = len(block)
+                yield block.iloc[order].reset_index(drop=True)
+                return
+            runs.append(self._spill(*pending, Path(temp) / f'{len(runs):04d}'))
+            del pending
+            self.runs = len(runs)
+            yield from self._merge(runs)
+
+    def _spill(self, block, keys, folder):
+        """Ordenar un tramo y volcarlo a disco"""
+        order = np.argsort(keys, kind='stable')
+        layout = save_frame(block.iloc[order].reset_index(drop=True), folder)
+        np.save(folder / 'keys.npy', keys[order], allow_pickle=False)
+        return _Run(folder, layout)
+
+    def _merge(self, runs):
+        """Fusión k-way de los tramos con memoria acotada"""
+        block_rows = max(self.memory_rows // len(runs), 1)
+        active = [run for run in runs if not run.exhausted]
+        while active:
+            # Ninguna parte siguiente puede traer un tiempo menor que este
+            frontier = min(run.horizon(block_rows) for run in active)
+            parts, keys = [], []
+            for run in active:
+                rows, run_keys = run.take_until(frontier, block_rows)
+                if len(rows):
+                    parts.append(rows)
+                    keys.append(run_keys)
+            keys = np.concatenate(keys)
+            # Estable: a igual tiempo, los tramos anteriores del archivo primero
+            order = np.argsort(keys, kind='stable')
+            block = pd.concat(parts, ignore_index=True).iloc[order]
+            block.index = pd.RangeIndex(self.rows, self.rows + len(block))
+            self.rows += len(block)
+            yield block
+            active = [run for run in active if not run.exhausted]
+
+    def to_dataframe(self):
+        """Resultado completo en memoria"""
+        blocks = list(self.chunks())
+        if not blocks:
+            return pd.DataFrame()
+        return pd.concat(blocks, ignore_index=True)
+
+    def to_csv(self, output_file):
+        """
+        Escribir el resultado en un CSV con el formato de entrada, bloque a bloque
+
+        Returns:
+            int: Filas escritas
+        """
+        header = True
+        with open_output(output_file) as handle:
+            for block in self.chunks():
+                block.to_csv(
+                    handle, header=header,
+                    sep=self.sep or config.CSV_SEPARATOR, decimal=config.DECIMAL_SEPARATOR, index=False
+                )
+                header = False
+        return self.rows
+
+
+def sort_file(path, output_file, channel=None, memory_rows=None):
+    """Atajo: ExternalSorter(path, ...).to_csv(output_file)"""
+    return ExternalSorter(path, channel=channel, memory_rows=memory_rows).to_csv(output_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ordenar hits por tiempo reconstruido")
+    parser.add_argument('input', help="Archivo CSV de entrada")
+    parser.add_argument('output', help="Archivo CSV ordenado")
+    parser.add_argument('--channel', choices=['T1', 'T2'], default=None,
+                        help="Canal del tiempo (por defecto config.MERGE_TIME_CHANNEL)")
+    parser.add_argument('--memory-rows', type=int, default=None,
+                        help="Filas por tramo en memoria (config.SORT_MEMORY_ROWS)")
+    args = parser.parse_args(argv)
+
+    sorter = ExternalSorter(args.input, channel=args.channel, memory_rows=args.memory_rows)
+    rows = sorter.to_csv(args.output)
+    where = "en memoria" if sorter.runs <= 1 else f"{sorter.runs} tramos fusionados"
+    print(f"✓ {rows:,} filas ordenadas ({where}): {args.output}")
+
+
+if __name__ == '__main__':
+    main()
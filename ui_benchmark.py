@@ -0,0 +1,251 @@
+"""
+Benchmark de respuesta de la interfaz
+Genera archivos sintéticos con el formato del TDC y recorre, sin pantalla
+(plataforma offscreen), el flujo de la interfaz avanzada:
+
+    load_file → process_data → pestañas de resultados → export_data (CSV y Excel)
+
+Los diálogos se responden automáticamente. Durante cada fase un StallMonitor
+mide la latencia del bucle de eventos; se informa la latencia p95 y la peor
+por fase y los bloqueos atribuidos al slot que los causó.
+
+Uso:
+    python ui_benchmark.py --rows 20000 200000
+    python ui_benchmark.py --files datos.csv --threshold 50 --output latencias.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config
+
+
+# Excel admite como máximo 1.048.576 filas por hoja (una es el encabezado)
+XLSX_MAX_ROWS = 1_048_575
+
+HEADER = 'Timestamp_PC;Num_Lote;T1_Index;T1_ResetCount;T1_FineNS;T2_Index;T2_ResetCount;T2_FineNS;t1_nS;t1_nS;'
+
+
+def synthetic_frame(rows, lotes=4, seed=0):
+    """
+    Datos sintéticos con las columnas del TDC (numéricas, ya tipadas)
+
+    Args:
+        rows (int): Filas de datos
+        lotes (int): Número de lotes (bloques consecutivos de filas)
+        seed (int): Semilla del generador
+
+    Returns:
+        pd.DataFrame: Columnas del archivo del equipo (sin la columna vacía final)
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    period = config.TDC_COARSE_PERIOD_NS
+    lote = np.repeat(np.arange(1, lotes + 1), -(-rows // lotes))[:rows]
+    index = np.arange(rows) - np.searchsorted(lote, lote)
+    # Tiempos crecientes con intervalos exponenciales; T2 coincide con T1 más un retardo
+    t1 = np.cumsum(rng.exponential(5_000.0, rows))
+    t2 = t1 + rng.normal(20.0, 0.5, rows)
+    fine = lambda t: np.round((t % period) / config.FINE_LSB_NS) * config.FINE_LSB_NS
+
+    start = pd.Timestamp('2024-01-01 17:19:38')
+    stamps = (start + pd.to_timedelta(t1 // 1e6, unit='ms')).strftime('%H:%M:%S.%f').str[:-3]
+
+    df = pd.DataFrame({
+        'Timestamp_PC': stamps,
+        'Num_Lote': lote,
+        'T1_Index': index,
+        'T1_ResetCount': (t1 // period).astype(np.int64),
+        'T1_FineNS': fine(t1).round(2),
+        'T2_Index': index,
+        'T2_ResetCount': (t2 // period).astype(np.int64),
+        'T2_FineNS': fine(t2).round(2),
+    })
+    df['t1_nS'] = (df['T1_ResetCount'] * period + df['T1_FineNS']).round(2)
+    df['t1_nS.1'] = (df['T2_ResetCount'] * period + df['T2_FineNS']).round(2)
+    return df
+
+
+def write_synthetic_file(path, rows, lotes=4, seed=0):
+    """
+    Escribir un archivo con el formato del TDC (separador ';', coma decimal)
+
+    Args:
+        path (str): Archivo de salida
+        rows (int): Filas de datos
+        lotes (int): Número de lotes (bloques consecutivos de filas)
+        seed (int): Semilla del generador
+    """
+    df = synthetic_frame(rows, lotes, seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(HEADER + '\n')
+        # Columna vacía final como en los archivos del equipo
+        df.assign(_='').to_csv(f, sep=';', decimal=',', header=False, index=False)
+
+
+def _wait(signal, timeout_ms):
+    """Correr el bucle de eventos hasta que se emita signal (o venza el plazo)"""
+    from PyQt6.QtCore import QEventLoop, QTimer
+
+    loop = QEventLoop()
+    signal.connect(lambda *args: loop.quit())
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+
+
+def _idle(ms):
+    """Atender eventos durante ms milisegundos (separa las fases)"""
+    from PyQt6.QtCore import QEventLoop, QTimer
+
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+
+
+def _answer_dialogs(output_dir, state):
+    """Responder los diálogos de archivos y mensajes sin intervención"""
+    from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+    QFileDialog.getOpenFileNames = staticmethod(lambda *args, **kwargs: ([state['input']], ''))
+    QFileDialog.getSaveFileName = staticmethod(
+        lambda *args, **kwargs: (str(Path(output_dir) / f"export.{state['extension']}"), '')
+    )
+
+    def message(*args, **kwargs):
+        state['messages'].append(args[2] if len(args) > 2 else '')
+        return QMessageBox.StandardButton.Ok
+
+    for name in ('information', 'warning', 'critical'):
+        setattr(QMessageBox, name, staticmethod(message))
+
+
+def run_benchmark(files, threshold_ms=None, all_analyses=False, timeout_s=600):
+    """
+    Recorrer carga, procesamiento, pestañas y exportación para cada archivo
+
+    Args:
+        files (list): Archivos a cargar
+        threshold_ms (float): Umbral de bloqueo (config.STALL_THRESHOLD_MS)
+        all_analyses (bool): Activar también huecos, tasa y ajuste del pico
+        timeout_s (int): Plazo máximo de cada fase asíncrona
+
+    Returns:
+        tuple: (filas de resultados, StallMonitor)
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    import data_processor_advanced
+    from stall_monitor import StallMonitor
+
+    output_dir = tempfile.mkdtemp(prefix='ui_benchmark_')
+    state = {'input': None, 'extension': 'csv', 'messages': []}
+    _answer_dialogs(output_dir, state)
+
+    window = data_processor_advanced.AdvancedDataProcessorGUI()
+    window.show()
+    monitor = StallMonitor(threshold_ms=threshold_ms).start()
+    _idle(200)
+
+    results = []
+    timeout_ms = int(timeout_s * 1000)
+    for path in files:
+        name = Path(path).name
+        with open(path, 'rb') as f:
+            rows = sum(1 for _ in f) - 1
+        state['input'] = str(path)
+
+        def phase(label, action, wait_for=None):
+            monitor.set_phase(f"{name}: {label}")
+            start = time.perf_counter()
+            action()
+            if wait_for is not None:
+                _wait(wait_for(), timeout_ms)
+            elapsed = time.perf_counter() - start
+            _idle(100)
+            results.append((name, rows, label, elapsed))
+
+        phase("carga", window.load_file, lambda: window.load_thread.finished)
+
+        window.all_lotes_check.setChecked(True)
+        for check in (window.gaps_check, window.rates_check, window.fit_check):
+            check.setChecked(all_analyses)
+        phase("procesamiento", window.process_data, lambda: window.thread.finished)
+
+        def visit_tabs():
+            for index in range(window.tab_widget.count()):
+                window.tab_widget.setCurrentIndex(index)
+                app.processEvents()
+        phase("pestañas", visit_tabs)
+
+        for extension in ('csv', 'xlsx'):
+            if extension == 'xlsx' and len(window.processed_df) > XLSX_MAX_ROWS:
+                continue
+            state['extension'] = extension
+            phase(f"exportación {extension}", lambda: window.export_data(extension))
+
+    monitor.set_phase('')
+    monitor.stop()
+    window.close()
+
+    summary = {phase: row for phase, *row in monitor.phase_summary()}
+    table = []
+    for name, rows, label, elapsed in results:
+        beats, p95, worst, stalls = summary.get(f"{name}: {label}", (0, 0.0, 0.0, 0))
+        table.append({
+            'archivo': name, 'filas': rows, 'fase': label,
+            'duración (s)': round(elapsed, 3), 'p95 (ms)': round(p95, 1),
+            'peor (ms)': round(worst, 1), 'bloqueos': stalls,
+        })
+    return table, monitor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de respuesta de la interfaz (sin pantalla)")
+    parser.add_argument('--files', nargs='+', help="Archivos a usar (si no, se generan sintéticos)")
+    parser.add_argument('--rows', nargs='+', type=int, default=[20_000, 200_000],
+                        help="Filas de cada archivo sintético")
+    parser.add_argument('--threshold', type=float, default=None, help="Umbral de bloqueo (ms)")
+    parser.add_argument('--all-analyses', action='store_true',
+                        help="Activar huecos, tasa y ajuste del pico al procesar")
+    parser.add_argument('--output', help="CSV con los resultados por fase")
+    args = parser.parse_args(argv)
+
+    files = args.files
+    if not files:
+        folder = tempfile.mkdtemp(prefix='ui_benchmark_data_')
+        files = []
+        for rows in args.rows:
+            path = Path(folder) / f"sintetico_{rows}.csv"
+            print(f"Generando {path.name}...")
+            write_synthetic_file(path, rows)
+            files.append(path)
+
+    table, monitor = run_benchmark(files, args.threshold, args.all_analyses)
+
+    print()
+    print(f"{'Archivo':<26s} {'Filas':>9s} {'Fase':<16s} {'Duración':>9s} {'p95':>8s} {'Peor':>8s} {'Bloq.':>6s}")
+    for row in table:
+        print(f"{row['archivo']:<26s} {row['filas']:9d} {row['fase']:<16s} {row['duración (s)']:8.2f}s "
+              f"{row['p95 (ms)']:7.1f}  {row['peor (ms)']:7.1f}  {row['bloqueos']:5d}")
+    print()
+    print(monitor.report())
+
+    if args.output and table:
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(table[0]), delimiter=';')
+            writer.writeheader()
+            writer.writerows(table)
+        print(f"\nResultados: {args.output}")
+
+
+if __name__ == '__main__':
+    main()